@@ -0,0 +1,119 @@
+"""
+Benchmark: connection concurrency under ASGI versus WSGI.
+
+Drives the project's ASGI and WSGI applications in-process with the same
+number of concurrent slow clients (each takes CLIENT_LATENCY seconds to
+receive its response, like a learner on a 2G/3G link). WSGI is given a
+fixed pool of worker threads, as gunicorn/waitress would; ASGI serves
+everyone from one event loop. Runs against a throwaway test database.
+
+Run with: python bench_asgi.py [clients] [wsgi_threads]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tujiimarishe.settings')
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from materials.models import SkillCategory, LearningMaterial
+from tujiimarishe.asgi import application as asgi_application
+from tujiimarishe.wsgi import application as wsgi_application
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+WSGI_THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+CLIENT_LATENCY = 0.2  # seconds each client takes to drain its response
+PATH = '/'
+
+
+def seed():
+    for i in range(10):
+        category = SkillCategory.objects.create(
+            name=f'Skill {i}', slug=f'skill-{i}', icon='fa-book', description='Benchmark skill'
+        )
+        LearningMaterial.objects.bulk_create([
+            LearningMaterial(category=category, title=f'Lesson {j}', description='Lesson',
+                             material_type='pdf', access_level='basic', order=j)
+            for j in range(10)
+        ])
+
+
+async def asgi_request():
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': PATH, 'raw_path': PATH.encode(), 'query_string': b'',
+        'root_path': '', 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    sent_body = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            await asyncio.sleep(CLIENT_LATENCY)  # slow client draining the body
+
+    await asgi_application(scope, receive, send)
+    disconnected.set()
+
+
+async def run_asgi():
+    start = time.perf_counter()
+    await asyncio.gather(*(asgi_request() for _ in range(CLIENTS)))
+    return time.perf_counter() - start
+
+
+def wsgi_request():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': PATH, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(b''),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    body = wsgi_application(environ, lambda status, headers: None)
+    for _ in body:
+        pass
+    time.sleep(CLIENT_LATENCY)  # the worker thread is held while the client drains
+    body.close()
+
+
+def run_wsgi():
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WSGI_THREADS) as pool:
+        list(pool.map(lambda _: wsgi_request(), range(CLIENTS)))
+    return time.perf_counter() - start
+
+
+setup_test_environment()
+old_name = connection.creation.create_test_db(verbosity=0)
+try:
+    seed()
+    wsgi_time = run_wsgi()
+    asgi_time = asyncio.run(run_asgi())
+
+    print("=" * 50)
+    print(f"{CLIENTS} CONCURRENT CLIENTS, {CLIENT_LATENCY * 1000:.0f} ms CLIENT LATENCY, GET {PATH}")
+    print("=" * 50)
+    print(f"WSGI ({WSGI_THREADS} threads): {wsgi_time:.2f}s total | {CLIENTS / wsgi_time:.1f} req/s "
+          f"| max in flight: {WSGI_THREADS}")
+    print(f"ASGI (event loop): {asgi_time:.2f}s total | {CLIENTS / asgi_time:.1f} req/s "
+          f"| max in flight: {CLIENTS}")
+finally:
+    connection.creation.destroy_test_db(old_name, verbosity=0)
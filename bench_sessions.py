@@ -0,0 +1,67 @@
+"""
+Benchmark: session storage cost on warm page views.
+
+Compares the plain database session backend with the cache-backed one
+configured in settings, counting django_session queries and timing warm
+requests to the profile page. Runs against a throwaway test database.
+
+Run with: python bench_sessions.py [requests]
+"""
+
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tujiimarishe.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+ENGINES = [
+    ('database', 'django.contrib.sessions.backends.db'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db'),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies'),
+]
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def run(engine):
+    with override_settings(SESSION_ENGINE=engine, CACHES=LOCMEM_CACHE):
+        client = Client()
+        client.post(reverse('login'), {'username': 'bench', 'password': 'benchpass123!'})
+        url = reverse('profile')
+        client.get(url)  # warm the session cache
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get(url)
+            elapsed = time.perf_counter() - start
+
+    session_queries = sum('django_session' in q['sql'] for q in ctx.captured_queries)
+    return session_queries, len(ctx.captured_queries), elapsed
+
+
+setup_test_environment()
+old_name = connection.creation.create_test_db(verbosity=0)
+try:
+    get_user_model().objects.create_user(username='bench', password='benchpass123!')
+
+    print("=" * 50)
+    print(f"WARM PAGE VIEWS ({REQUESTS} requests to /users/profile/)")
+    print("=" * 50)
+    for label, engine in ENGINES:
+        session_queries, total_queries, elapsed = run(engine)
+        print(
+            f"{label:15} session queries: {session_queries:5} | total queries: {total_queries:5} | "
+            f"{elapsed / REQUESTS * 1000:.2f} ms/request"
+        )
+finally:
+    connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -1,5 +1,22 @@
+from datetime import timedelta
+
 from django.contrib import admin
-from .models import SkillCategory, LearningMaterial, UserSkillAccess, Payment, WorkSubmission, MentorFeedback
+from django.core.exceptions import PermissionDenied
+from django.db.models import Sum
+from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+from users.admin_mixins import LargeTableAdminMixin
+from users.exports import export_action
+from . import analytics, cohorts, tasks
+from .exports import PAYMENT_COLUMNS, SUBMISSION_COLUMNS
+from .models import (
+    SkillCategory, LearningMaterial, UserSkillAccess, Payment, WorkSubmission, MentorFeedback, ProgressEvent,
+    CategoryProgress, RevenueRollup, MentorProfile,
+)
+from .forms import CohortImportForm, LearningMaterialAdminForm
 
 @admin.register(SkillCategory)
 class SkillCategoryAdmin(admin.ModelAdmin):
@@ -8,31 +25,216 @@ class SkillCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(LearningMaterial)
 class LearningMaterialAdmin(admin.ModelAdmin):
+    form = LearningMaterialAdminForm
+    readonly_fields = ['pdf_sha256', 'pdf_content_type', 'pdf_size']
     list_display = ['title', 'category', 'material_type', 'access_level', 'order']
     list_filter = ['category', 'material_type', 'access_level']
     search_fields = ['title', 'description']
     ordering = ['category', 'order']
 
+    def get_form(self, request, obj=None, **kwargs):
+        return super().get_form(request, obj, **kwargs).for_request(request)
+
 @admin.register(UserSkillAccess)
-class UserSkillAccessAdmin(admin.ModelAdmin):
+class UserSkillAccessAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'category', 'access_level', 'purchased_at']
     list_filter = ['access_level', 'category']
+    list_select_related = ['user', 'category']
     search_fields = ['user__username', 'category__name']
+    autocomplete_fields = ['user', 'category']
+
+    def get_urls(self):
+        return [
+            path('import-cohort/', self.admin_site.admin_view(self.import_cohort_view), name='materials_import_cohort'),
+        ] + super().get_urls()
+
+    def import_cohort_view(self, request):
+        """Upload a cohort CSV, create its learners and grant the chosen tier"""
+        if not (self.has_add_permission(request) and request.user.has_perm('users.add_user')):
+            raise PermissionDenied
+        result, links_url = None, None
+        form = CohortImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            started = timezone.now()
+            grants = [f"{category.slug}:{form.cleaned_data['tier']}" for category in form.cleaned_data['categories']]
+            try:
+                result = cohorts.import_cohort(
+                    form.cleaned_data['cohort'], grants=grants, workers=form.cleaned_data['workers'],
+                )
+            except cohorts.CohortError as exc:
+                form.add_error('cohort', str(exc))
+            else:
+                # Learners without a password pick one through these links
+                links_url = reverse('admin:users_user_changelist') + '?' + urlencode({
+                    'date_joined__gte': started.isoformat(),
+                })
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import cohort',
+            'form': form,
+            'result': result,
+            'links_url': links_url,
+        }
+        return TemplateResponse(request, 'admin/materials/userskillaccess/import_cohort.html', context)
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'category', 'access_level', 'amount', 'mpesa_code', 'is_verified', 'created_at']
     list_filter = ['is_verified', 'access_level', 'created_at']
-    search_fields = ['user__username', 'mpesa_code', 'phone_number']
+    list_select_related = ['user', 'category']
+    search_fields = ['mpesa_code', 'phone_number', 'user__username']
+    autocomplete_fields = ['user', 'category']
     readonly_fields = ['created_at']
+    actions = [export_action('csv', PAYMENT_COLUMNS, 'payments'), export_action('xlsx', PAYMENT_COLUMNS, 'payments')]
 
 @admin.register(WorkSubmission)
-class WorkSubmissionAdmin(admin.ModelAdmin):
-    list_display = ['title', 'user', 'category', 'submitted_at', 'is_reviewed']
+class WorkSubmissionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['title', 'user', 'category', 'submitted_at', 'is_reviewed', 'assigned_to']
+    readonly_fields = ['sha256', 'content_type', 'file_size', 'assigned_to', 'assigned_at']
     list_filter = ['is_reviewed', 'category', 'submitted_at']
+    list_select_related = ['user', 'category', 'assigned_to']
     search_fields = ['title', 'user__username']
+    autocomplete_fields = ['user', 'category']
+    actions = [
+        export_action('csv', SUBMISSION_COLUMNS, 'submissions'), export_action('xlsx', SUBMISSION_COLUMNS, 'submissions'),
+    ]
 
 @admin.register(MentorFeedback)
-class MentorFeedbackAdmin(admin.ModelAdmin):
+class MentorFeedbackAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['submission', 'mentor', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
+    # WorkSubmission.__str__ shows the learner's username
+    list_select_related = ['submission__user', 'mentor']
+    search_fields = ['submission__title', 'mentor__username']
+    autocomplete_fields = ['submission', 'mentor']
+
+@admin.register(MentorProfile)
+class MentorProfileAdmin(admin.ModelAdmin):
+    list_display = ['mentor', 'is_available', 'open_reviews', 'turnaround', 'reviews_done', 'load']
+    list_filter = ['is_available', 'categories']
+    list_select_related = ['mentor']
+    search_fields = ['mentor__username']
+    autocomplete_fields = ['mentor']
+    filter_horizontal = ['categories']
+    readonly_fields = ['open_reviews', 'turnaround', 'reviews_done', 'load']
+    actions = ['go_offline', 'rebalance']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # The load counters move while the form is open; only write what the form edits
+        was_available = MentorProfile.objects.filter(pk=obj.pk).values_list('is_available', flat=True).first()
+        obj.save(update_fields=['is_available'])
+        if obj.is_available != was_available:
+            tasks.rebalance_reviews.enqueue([] if obj.is_available else [obj.pk])
+
+    def go_offline(self, request, queryset):
+        """Take the selected mentors offline and hand their open reviews to others"""
+        offline = list(queryset.values_list('pk', flat=True))
+        tasks.rebalance_reviews.enqueue(offline)
+        self.message_user(request, f'{len(offline)} mentor(s) going offline; their reviews are being handed on.')
+    go_offline.short_description = 'Take selected mentors offline'
+
+    def rebalance(self, request, queryset):
+        """Hand unassigned work, and work held by offline mentors, to available mentors"""
+        tasks.rebalance_reviews.enqueue()
+        self.message_user(request, 'Pending reviews are being rebalanced.')
+    rebalance.short_description = 'Rebalance pending reviews'
+
+@admin.register(ProgressEvent)
+class ProgressEventAdmin(admin.ModelAdmin):
+    """Read-only: the event log is append-only"""
+    list_display = ['occurred_at', 'user', 'material', 'event']
+    list_filter = ['event']
+    search_fields = ['user__username', 'material__title']
+    list_select_related = ['user', 'material']
+    date_hierarchy = 'occurred_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(CategoryProgress)
+class CategoryProgressAdmin(admin.ModelAdmin):
+    """Read-only: rebuilt from the event log with ``manage.py rebuild_progress``"""
+    list_display = ['user', 'category', 'completed_count', 'next_material', 'last_activity_at']
+    list_filter = ['category']
+    search_fields = ['user__username']
+    list_select_related = ['user', 'category', 'next_material']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class RecentDaysFilter(admin.SimpleListFilter):
+    title = 'period'
+    parameter_name = 'period'
+    PERIODS = {'7': 'Last 7 days', '30': 'Last 30 days', '90': 'Last 90 days', '365': 'Last 12 months'}
+
+    def lookups(self, request, model_admin):
+        return list(self.PERIODS.items())
+
+    def queryset(self, request, queryset):
+        if self.value() in self.PERIODS:
+            return queryset.filter(day__gt=timezone.localdate() - timedelta(days=int(self.value())))
+        return queryset
+
+@admin.register(RevenueRollup)
+class RevenueRollupAdmin(admin.ModelAdmin):
+    """Staff analytics: revenue and enrolment per category per day, read from the rollup"""
+    list_display = ['day', 'category', 'access_level', 'payments', 'revenue', 'new_entitlements', 'upgrades']
+    list_filter = [RecentDaysFilter, 'category', 'access_level']
+    date_hierarchy = 'day'
+    list_select_related = ['category']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path('refresh/', self.admin_site.admin_view(self.refresh_view), name='materials_revenuerollup_refresh'),
+        ] + super().get_urls()
+
+    def refresh_view(self, request):
+        """Roll up payments added since the last refresh, then return to the dashboard"""
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        days = analytics.refresh()
+        self.message_user(request, f'Refreshed {days} day(s).')
+        next_url = request.POST.get('next')
+        if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+            next_url = reverse('admin:materials_revenuerollup_changelist')
+        return HttpResponseRedirect(next_url)
+
+    def changelist_view(self, request, extra_context=None):
+        """Chart the filtered days above the rollup rows"""
+        response = super().changelist_view(request, extra_context=extra_context)
+        context = getattr(response, 'context_data', None)
+        if not context or 'cl' not in context:
+            return response
+        rows = context['cl'].queryset.order_by()
+        sums = {name: Sum(name) for name in ('payments', 'revenue', 'new_entitlements', 'upgrades')}
+        daily = list(rows.values('day').annotate(**sums).order_by('day'))
+        peak_revenue = max((day['revenue'] for day in daily), default=0) or 1
+        peak_enrolments = max((day['new_entitlements'] + day['upgrades'] for day in daily), default=0) or 1
+        for day in daily:
+            day['revenue_height'] = round(day['revenue'] / peak_revenue * 100)
+            day['new_height'] = round(day['new_entitlements'] / peak_enrolments * 100)
+            day['upgrade_height'] = round(day['upgrades'] / peak_enrolments * 100)
+        context['daily'] = daily
+        context['totals'] = rows.aggregate(**sums)
+        return response
@@ -0,0 +1,145 @@
+"""
+Daily revenue and enrolment rollups (RevenueRollup) for the staff dashboard.
+
+One row per (day, category, tier) counts verified payments, revenue, new
+entitlements (a learner's first paid tier in the category) and upgrades
+(premium bought on top of enterprise). Reports read these rows, so a year of
+history costs a few thousand rows however many payments there were.
+
+``refresh()`` is incremental: it looks only at payments past the high-water
+mark (the highest Payment id already rolled up) and recomputes just the days
+they fall on. Payment ids are assigned as rows are written and SQLite
+serializes writes, so no payment can appear below the mark later. An
+existing payment that is verified, revoked or re-priced afterwards changes a
+day that may be below the mark: saving or deleting it through the ORM
+re-rolls its day (``payment_changing``/``payment_saved``/``payment_deleted``,
+connected in MaterialsConfig.ready), and code that changes payments with
+``update()`` calls ``refresh_days()`` itself. (Such a change can also alter
+whether the learner's later payments count as new or as upgrades; that is
+left to ``refresh_analytics --rebuild``.)
+
+New payments are rolled up by ``refresh_analytics`` (run it from cron) or the
+"Refresh" button on the dashboard; viewing the dashboard writes nothing.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Payment, RevenueRollup, RollupWatermark
+
+PAYMENTS_MARK = 'revenue:payments'
+PAYMENT_COLUMNS = ('user_id', 'category_id', 'access_level', 'amount', 'created_at')
+# Columns of a payment whose change alters the rollup of its day
+ROLLED_UP_COLUMNS = ('is_verified', *PAYMENT_COLUMNS)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _previous_tiers(pairs, before):
+    """Tier of each (user, category) pair's last verified payment before ``before``"""
+    if not pairs:
+        return {}
+    earlier = Payment.objects.filter(
+        is_verified=True, created_at__lt=before,
+        user_id__in={user_id for user_id, _ in pairs},
+        category_id__in={category_id for _, category_id in pairs},
+    ).order_by('created_at', 'id').values_list('user_id', 'category_id', 'access_level')
+    # Later payments overwrite earlier ones
+    tiers = {(user_id, category_id): level for user_id, category_id, level in earlier}
+    return {pair: level for pair, level in tiers.items() if pair in pairs}
+
+
+def rollup_rows(payments, previous):
+    """Aggregate verified payments, oldest first, into unsaved RevenueRollup rows.
+
+    ``previous`` maps (user, category) to the tier of that learner's last
+    verified payment before these; it is updated as payments are read.
+    """
+    rows = {}
+    for user_id, category_id, level, amount, created_at in payments:
+        key = (timezone.localdate(created_at), category_id, level)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = RevenueRollup(day=key[0], category_id=category_id, access_level=level)
+        row.payments += 1
+        row.revenue += amount
+        prior = previous.get((user_id, category_id))
+        if prior is None:
+            row.new_entitlements += 1
+        elif prior == 'enterprise' and level == 'premium':
+            row.upgrades += 1
+        previous[user_id, category_id] = level
+    return list(rows.values())
+
+
+def refresh_days(days):
+    """Recompute the rollup rows for each of ``days``"""
+    days = sorted(set(days))
+    rows = []
+    for day in days:
+        start, end = _day_bounds(day)
+        payments = list(Payment.objects.filter(
+            is_verified=True, created_at__gte=start, created_at__lt=end,
+        ).order_by('created_at', 'id').values_list(*PAYMENT_COLUMNS))
+        previous = _previous_tiers({(user_id, category_id) for user_id, category_id, *_ in payments}, start)
+        rows.extend(rollup_rows(payments, previous))
+    with transaction.atomic():
+        RevenueRollup.objects.filter(day__in=days).delete()
+        RevenueRollup.objects.bulk_create(rows, batch_size=500)
+
+
+def refresh():
+    """Roll up payments added since the last refresh; returns the number of days recomputed"""
+    with transaction.atomic():
+        mark, _ = RollupWatermark.objects.get_or_create(name=PAYMENTS_MARK)
+        added = list(Payment.objects.filter(pk__gt=mark.value).values_list('pk', 'created_at'))
+        if not added:
+            return 0
+        days = {timezone.localdate(created_at) for _, created_at in added}
+        refresh_days(days)
+        mark.value = max(pk for pk, _ in added)
+        mark.save()
+    return len(days)
+
+
+def payment_changing(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for Payment: note the rolled-up columns as stored before this save"""
+    if raw or instance._state.adding:
+        return
+    instance._rolled_up = sender.objects.filter(pk=instance.pk).values_list(*ROLLED_UP_COLUMNS).first()
+
+
+def payment_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for Payment: re-roll the days an edited payment was and is counted on"""
+    before = getattr(instance, '_rolled_up', None)
+    if raw or created or before is None:
+        return
+    after = tuple(getattr(instance, column) for column in ROLLED_UP_COLUMNS)
+    if after == before or not (before[0] or after[0]):
+        return
+    refresh_days({timezone.localdate(before[-1]), timezone.localdate(after[-1])})
+
+
+def payment_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Payment"""
+    if instance.is_verified:
+        refresh_days([timezone.localdate(instance.created_at)])
+
+
+def rebuild():
+    """Recompute every rollup row in one pass over the payments; returns rows written"""
+    with transaction.atomic():
+        top = Payment.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        payments = Payment.objects.filter(is_verified=True, pk__lte=top).order_by(
+            'created_at', 'id'
+        ).values_list(*PAYMENT_COLUMNS)
+        rows = rollup_rows(payments.iterator(chunk_size=2000), {})
+        RevenueRollup.objects.all().delete()
+        RevenueRollup.objects.bulk_create(rows, batch_size=500)
+        RollupWatermark.objects.update_or_create(name=PAYMENTS_MARK, defaults={'value': top})
+    return len(rows)
@@ -0,0 +1,290 @@
+"""
+Read-only JSON API over the catalogue, for the mobile client (``/api/v1/``).
+
+    GET /api/v1/                     catalogue version
+    GET /api/v1/categories/          every SkillCategory
+    GET /api/v1/materials/           LearningMaterials, cursor-paginated
+    GET /api/v1/access/              the caller's tier per category
+    GET /api/v1/sync/?since=<cursor> what changed since a previous sync
+
+``?fields=id,title`` limits the keys returned (and the columns selected).
+Catalogue responses carry a strong ETag built from the catalogue version and
+the request, so a conditional re-poll is answered with a 304 before the
+catalogue is queried. Bodies are gzipped when the client accepts it; the
+gzipped representation has its own ETag.
+"""
+import base64
+import gzip
+import hashlib
+import json
+
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .catalogue import acatalogue_version
+from .models import CatalogueChange, LearningMaterial, SkillCategory, UserSkillAccess
+
+API_VERSION = 1
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# API key -> model column
+CATEGORY_FIELDS = {
+    'id': 'id', 'slug': 'slug', 'name': 'name', 'icon': 'icon', 'description': 'description',
+}
+CATEGORY_DEFAULT_FIELDS = ['id', 'slug', 'name', 'icon']
+MATERIAL_FIELDS = {
+    'id': 'id', 'category': 'category_id', 'title': 'title', 'description': 'description',
+    'type': 'material_type', 'tier': 'access_level', 'order': 'order',
+    'pdf_size': 'pdf_size',
+}
+# No video links: catalogue rows are public and cached for everyone, while a
+# lesson's video is for learners its tier unlocks (material_detail checks that)
+MATERIAL_DEFAULT_FIELDS = ['id', 'category', 'title', 'type', 'tier', 'order']
+MATERIAL_ORDERING = ['category_id', 'order', 'id']
+ACCESS_FIELDS = {'id': 'id', 'category': 'category_id', 'tier': 'access_level'}
+SYNC_PAGE_SIZE = 500
+# change kind -> (payload key, model, fields)
+SYNC_SOURCES = {
+    'category': ('categories', SkillCategory, CATEGORY_FIELDS),
+    'material': ('materials', LearningMaterial, MATERIAL_FIELDS),
+    'access': ('access', UserSkillAccess, ACCESS_FIELDS),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _accepts_gzip(request):
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+def _etag(request, *parts):
+    """Strong ETag for this request's representation"""
+    digest = hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'"{digest}-gz"' if _accepts_gzip(request) else f'"{digest}"'
+
+
+def _query_key(request):
+    return '&'.join(f'{k}={v}' for k, v in sorted(request.GET.items()))
+
+
+def _not_modified(request, etag, cache_control):
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        _finish(response, etag, cache_control)
+    return response
+
+
+def _finish(response, etag, cache_control):
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def _json(request, payload, etag, cache_control):
+    """Compact JSON, gzipped when the client accepts it"""
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+    response = HttpResponse(content_type='application/json')
+    # Always compress when accepted: the ETag was chosen before the body existed
+    if _accepts_gzip(request):
+        body = gzip.compress(body, mtime=0)
+        response['Content-Encoding'] = 'gzip'
+    response.content = body
+    response['Content-Length'] = len(body)
+    return _finish(response, etag, cache_control)
+
+
+def _fields(request, available, default):
+    """Parse ?fields= against the fields an endpoint offers"""
+    requested = request.GET.get('fields')
+    if not requested:
+        return default
+    fields = [f.strip() for f in requested.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise BadRequest(f'Unknown field(s): {", ".join(unknown)}')
+    return fields
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit must be a whole number')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise BadRequest('Invalid cursor')
+    if not (isinstance(values, list) and len(values) == len(MATERIAL_ORDERING)
+            and all(isinstance(v, int) for v in values)):
+        raise BadRequest('Invalid cursor')
+    return values
+
+
+def _after(values):
+    """Keyset filter for rows strictly after ``values`` in MATERIAL_ORDERING"""
+    category_id, order, pk = values
+    return (
+        Q(category_id__gt=category_id)
+        | Q(category_id=category_id, order__gt=order)
+        | Q(category_id=category_id, order=order, id__gt=pk)
+    )
+
+
+CATALOGUE_CACHE_CONTROL = 'public, no-cache'
+
+
+@require_safe
+async def api_root(request):
+    """Current catalogue version; the cheapest thing for a client to poll"""
+    version = await acatalogue_version()
+    etag = _etag(request, API_VERSION, version)
+    return _not_modified(request, etag, CATALOGUE_CACHE_CONTROL) or _json(
+        request, {'api': API_VERSION, 'version': version}, etag, CATALOGUE_CACHE_CONTROL
+    )
+
+
+@require_safe
+async def api_categories(request):
+    """Every skill category"""
+    try:
+        fields = _fields(request, CATEGORY_FIELDS, CATEGORY_DEFAULT_FIELDS)
+    except BadRequest as exc:
+        return _error(str(exc))
+
+    version = await acatalogue_version()
+    etag = _etag(request, API_VERSION, version, request.path, _query_key(request))
+    not_modified = _not_modified(request, etag, CATALOGUE_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    columns = [CATEGORY_FIELDS[f] for f in fields]
+    items = [
+        dict(zip(fields, row))
+        async for row in SkillCategory.objects.order_by('id').values_list(*columns)
+    ]
+    return _json(request, {'version': version, 'items': items}, etag, CATALOGUE_CACHE_CONTROL)
+
+
+@require_safe
+async def api_materials(request):
+    """Learning materials in (category, order) order, ``limit`` per page.
+
+    ``next`` is the cursor for the following page, or null on the last one.
+    ``?category=<id>`` restricts the list to one category.
+    """
+    try:
+        fields = _fields(request, MATERIAL_FIELDS, MATERIAL_DEFAULT_FIELDS)
+        limit = _page_size(request)
+        cursor = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+        category = request.GET.get('category')
+        if category is not None and not category.isdigit():
+            raise BadRequest('category must be a category id')
+    except BadRequest as exc:
+        return _error(str(exc))
+
+    version = await acatalogue_version()
+    etag = _etag(request, API_VERSION, version, request.path, _query_key(request))
+    not_modified = _not_modified(request, etag, CATALOGUE_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    materials = LearningMaterial.objects.order_by(*MATERIAL_ORDERING)
+    if category is not None:
+        materials = materials.filter(category_id=int(category))
+    if cursor:
+        materials = materials.filter(_after(cursor))
+    columns = list(dict.fromkeys(MATERIAL_ORDERING + [MATERIAL_FIELDS[f] for f in fields]))
+    rows = [row async for row in materials.values(*columns)[:limit + 1]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][column] for column in MATERIAL_ORDERING])
+    items = [{f: row[MATERIAL_FIELDS[f]] for f in fields} for row in rows]
+    return _json(request, {'version': version, 'items': items, 'next': next_cursor}, etag, CATALOGUE_CACHE_CONTROL)
+
+
+@require_safe
+async def api_access(request):
+    """The caller's tier in each category they have access rows for; 'basic' elsewhere"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error('Authentication required', status=401)
+
+    tiers = {
+        str(category_id): level
+        async for category_id, level in UserSkillAccess.objects.filter(user=user)
+        .order_by('category_id').values_list('category_id', 'access_level')
+    }
+    etag = _etag(request, API_VERSION, user.pk, json.dumps(tiers, sort_keys=True))
+    cache_control = 'private, no-cache'
+    return _not_modified(request, etag, cache_control) or _json(
+        request, {'default': 'basic', 'tiers': tiers}, etag, cache_control
+    )
+
+
+@require_safe
+async def api_sync(request):
+    """Changes after ``?since=<cursor>``, oldest first, up to SYNC_PAGE_SIZE.
+
+    Omit ``since`` for a full snapshot. Each kind lists ``updated`` objects
+    (all fields) and ``deleted`` ids; entitlements are the caller's own.
+    Store ``cursor`` for the next call and repeat while ``more`` is true.
+    Change rows are numbered as they are written; SQLite serializes writes,
+    so a sequence number never becomes visible after a higher one.
+    """
+    since = request.GET.get('since') or '0'
+    if not since.isdigit():
+        return _error('since must be a cursor returned by a previous sync')
+    since = int(since)
+
+    user = await request.auser()
+    visible = Q(user__isnull=True)
+    if user.is_authenticated:
+        visible |= Q(user=user)
+    changes = [
+        change async for change in CatalogueChange.objects.filter(visible, seq__gt=since)
+        .order_by('seq').values_list('seq', 'kind', 'object_id', 'deleted')[:SYNC_PAGE_SIZE + 1]
+    ]
+    more = len(changes) > SYNC_PAGE_SIZE
+    changes = changes[:SYNC_PAGE_SIZE]
+    cursor = changes[-1][0] if changes else since
+
+    payload = {'cursor': str(cursor), 'more': more}
+    for kind, (key, model, fields) in SYNC_SOURCES.items():
+        changed = [object_id for _, k, object_id, deleted in changes if k == kind and not deleted]
+        deleted = [object_id for _, k, object_id, is_deleted in changes if k == kind and is_deleted]
+        rows = {}
+        if changed:
+            objects = model.objects.filter(pk__in=changed)
+            if kind == 'access':
+                objects = objects.filter(user=user)
+            rows = {row['id']: row async for row in objects.values(*fields.values())}
+        payload[key] = {
+            'updated': [{f: rows[pk][column] for f, column in fields.items()} for pk in changed if pk in rows],
+            # Logged as changed but gone by now: deleted since
+            'deleted': deleted + [pk for pk in changed if pk not in rows],
+        }
+
+    etag = _etag(request, API_VERSION, 'sync', user.pk, since, cursor)
+    cache_control = 'private, no-cache'
+    return _not_modified(request, etag, cache_control) or _json(request, payload, etag, cache_control)
+
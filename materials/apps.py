@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class MaterialsConfig(AppConfig):
@@ -6,3 +8,39 @@ class MaterialsConfig(AppConfig):
     name = 'materials'
     verbose_name = 'Learning Materials'
 
+    def ready(self):
+        from . import analytics, assignment, notifications, progress, sla
+        from .catalogue import change_receiver
+
+        tracked = {'SkillCategory': 'category', 'LearningMaterial': 'material', 'UserSkillAccess': 'access'}
+        for model_name, kind in tracked.items():
+            model = self.get_model(model_name)
+            post_save.connect(change_receiver(kind, deleted=False), sender=model, weak=False,
+                              dispatch_uid=f'catalogue-save-{kind}')
+            post_delete.connect(change_receiver(kind, deleted=True), sender=model, weak=False,
+                                dispatch_uid=f'catalogue-delete-{kind}')
+        request_finished.connect(progress.flush_if_due, dispatch_uid='progress-flush')
+
+        # Learner emails (materials/notifications.py)
+        post_save.connect(notifications.feedback_saved, sender=self.get_model('MentorFeedback'),
+                          dispatch_uid='notify-feedback-saved')
+        pre_save.connect(notifications.payment_changing, sender=self.get_model('Payment'),
+                         dispatch_uid='notify-payment-changing')
+        post_save.connect(notifications.payment_saved, sender=self.get_model('Payment'),
+                          dispatch_uid='notify-payment-saved')
+
+        # Revenue rollups of edited payments (materials/analytics.py)
+        pre_save.connect(analytics.payment_changing, sender=self.get_model('Payment'),
+                         dispatch_uid='analytics-payment-changing')
+        post_save.connect(analytics.payment_saved, sender=self.get_model('Payment'),
+                          dispatch_uid='analytics-payment-saved')
+        post_delete.connect(analytics.payment_deleted, sender=self.get_model('Payment'),
+                            dispatch_uid='analytics-payment-deleted')
+
+        # Mentor load and turnaround (materials/assignment.py)
+        post_save.connect(assignment.review_saved, sender=self.get_model('MentorFeedback'),
+                          dispatch_uid='assignment-review-saved')
+
+        # Time-to-first-review sketches (materials/sla.py)
+        post_save.connect(sla.review_saved, sender=self.get_model('MentorFeedback'),
+                          dispatch_uid='sla-review-saved')
@@ -0,0 +1,235 @@
+"""
+Assigning submitted work to mentors.
+
+Every mentor with a MentorProfile (one is made when a mentor first opens
+the dashboard) declares the skill categories they review. A mentor's
+``load`` is the hours new work would wait for them: their open reviews plus
+one, times their turnaround, a moving average of the hours from assignment
+to feedback (MENTOR_DEFAULT_TURNAROUND until their first review).
+
+Only profiles that are available and whose user is still an active reviewer
+(``users.roles.reviewers``) are given work, so a mentor who is demoted or
+deactivated stops receiving it without their profile being touched.
+
+New work goes to the available mentor with the lowest load who covers its
+category. A mentor outside the category is chosen only when every
+specialist would take more than OFF_TOPIC_PENALTY times as long; work with
+no category goes to whoever is least loaded. Learners are never given their
+own work.
+
+``assign()`` runs once per submission (from the notify_mentors_of_submission
+task) and does not recompute anything: the least loaded mentor is one seek
+of the partial ``mentor_available_load_idx``, the specialist one is bounded
+by the category's mentors, and the winner's counters are bumped in a single
+UPDATE. Feedback closes a review the same way (``review_saved``, connected
+in MaterialsConfig.ready).
+
+``rebalance()`` handles mentors going offline, and work that found nobody
+available. It recounts open reviews from the submissions themselves, then
+hands every pending submission that has no available mentor to one, oldest
+first, using in-memory heaps of mentors keyed by load (``Balancer``): one
+over everyone and one per category, so each submission costs O(log n).
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from users.roles import reviewers
+from .models import MentorProfile, WorkSubmission
+
+# How much longer a specialist's wait may be before an off-topic mentor is preferred
+OFF_TOPIC_PENALTY = 3.0
+# Weight of the latest review in a mentor's turnaround
+TURNAROUND_ALPHA = 0.2
+
+
+def turnaround():
+    return Coalesce(F('turnaround'), Value(float(settings.MENTOR_DEFAULT_TURNAROUND)))
+
+
+def profile_for(user):
+    """``user``'s MentorProfile, made on first use"""
+    profile, created = MentorProfile.objects.get_or_create(mentor=user)
+    if created:
+        refresh_load([user.pk])
+    return profile
+
+
+def refresh_load(mentor_ids):
+    MentorProfile.objects.filter(pk__in=mentor_ids).update(load=(F('open_reviews') + 1) * turnaround())
+
+
+def _adjust(mentor_id, delta):
+    """Change a mentor's open reviews by ``delta`` and their load with it, in one statement"""
+    # Every expression in a SET clause reads the row as it was before the UPDATE
+    MentorProfile.objects.filter(pk=mentor_id).update(
+        open_reviews=Greatest(F('open_reviews') + delta, 0),
+        load=(Greatest(F('open_reviews') + delta, 0) + 1) * turnaround(),
+    )
+
+
+def candidates():
+    """Profiles that may be given work"""
+    return MentorProfile.objects.filter(reviewers('mentor__'), is_available=True)
+
+
+def best_mentor(category_id, learner_id):
+    """The id of the mentor who should review new work in ``category_id``, or None if nobody is available"""
+    # Ties go to the lowest id, as in Balancer's heaps
+    available = candidates().exclude(mentor_id=learner_id).order_by('load', 'pk')
+    anyone = available.values_list('mentor_id', 'load').first()
+    if anyone is None or category_id is None:
+        return anyone and anyone[0]
+    specialist = available.filter(categories=category_id).values_list('mentor_id', 'load').first()
+    if specialist and specialist[1] <= anyone[1] * OFF_TOPIC_PENALTY:
+        return specialist[0]
+    return anyone[0]
+
+
+def assign(submission):
+    """Give ``submission`` to a mentor unless it already has one; returns the mentor's id or None"""
+    if submission.assigned_to_id or submission.is_reviewed:
+        return submission.assigned_to_id
+    mentor_id = best_mentor(submission.category_id, submission.user_id)
+    if mentor_id is None:
+        return None
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = WorkSubmission.objects.filter(pk=submission.pk, assigned_to=None, is_reviewed=False).update(
+            assigned_to_id=mentor_id, assigned_at=now,
+        )
+        if claimed:
+            _adjust(mentor_id, 1)
+    if claimed:
+        submission.assigned_to_id, submission.assigned_at = mentor_id, now
+    return submission.assigned_to_id
+
+
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for MentorFeedback: close the assignment and time the reviewer"""
+    if raw or not created:
+        return
+    submission = instance.submission
+    if submission.assigned_to_id:
+        _adjust(submission.assigned_to_id, -1)
+    started = submission.assigned_at or submission.submitted_at
+    hours = max((instance.created_at - started).total_seconds() / 3600, 0.0)
+    updated = MentorProfile.objects.filter(pk=instance.mentor_id).update(
+        turnaround=Coalesce(F('turnaround') * (1 - TURNAROUND_ALPHA) + hours * TURNAROUND_ALPHA, Value(hours)),
+        reviews_done=F('reviews_done') + 1,
+    )
+    if updated:
+        refresh_load([instance.mentor_id])
+
+
+def recount(mentor_ids=None):
+    """Set open reviews, and so load, from the pending submissions assigned to each mentor"""
+    profiles = MentorProfile.objects.all() if mentor_ids is None else MentorProfile.objects.filter(pk__in=mentor_ids)
+    open_reviews = (
+        WorkSubmission.objects.filter(assigned_to=OuterRef('pk'), is_reviewed=False)
+        .order_by().values('assigned_to').annotate(n=Count('pk')).values('n')
+    )
+    profiles.update(open_reviews=Coalesce(Subquery(open_reviews), 0))
+    profiles.update(load=(F('open_reviews') + 1) * turnaround())
+
+
+class Balancer:
+    """Available mentors in heaps keyed by load: one over everyone, one per category they cover.
+
+    A mentor's entries go stale when they are given work; rather than search
+    the heaps, a new entry is pushed and old ones are dropped when they
+    surface (each entry carries the mentor's version at push time).
+    """
+
+    def __init__(self, mentors, coverage):
+        """``mentors`` maps mentor id to (open reviews, turnaround hours), ``coverage`` to category ids"""
+        self.open = {mentor_id: open_reviews for mentor_id, (open_reviews, _) in mentors.items()}
+        self.turnaround = {mentor_id: hours for mentor_id, (_, hours) in mentors.items()}
+        self.coverage = coverage
+        self.version = dict.fromkeys(mentors, 0)
+        self.anyone = []
+        self.by_category = defaultdict(list)
+        for mentor_id in mentors:
+            self._push(mentor_id)
+
+    def load(self, mentor_id):
+        return (self.open[mentor_id] + 1) * self.turnaround[mentor_id]
+
+    def _push(self, mentor_id):
+        entry = (self.load(mentor_id), mentor_id, self.version[mentor_id])
+        heapq.heappush(self.anyone, entry)
+        for category_id in self.coverage.get(mentor_id, ()):
+            heapq.heappush(self.by_category[category_id], entry)
+
+    def _best(self, heap, learner_id):
+        """(load, mentor id) at the top of ``heap``, skipping ``learner_id``, or None"""
+        skipped, best = None, None
+        while heap:
+            load, mentor_id, version = heap[0]
+            if version != self.version[mentor_id]:
+                heapq.heappop(heap)
+            elif mentor_id == learner_id:
+                skipped = heapq.heappop(heap)
+            else:
+                best = (load, mentor_id)
+                break
+        if skipped:
+            heapq.heappush(heap, skipped)
+        return best
+
+    def choose(self, category_id, learner_id):
+        """Give one submission to the best mentor, as ``best_mentor`` would; returns their id or None"""
+        anyone = self._best(self.anyone, learner_id)
+        if anyone is None:
+            return None
+        mentor_id = anyone[1]
+        if category_id is not None:
+            specialist = self._best(self.by_category[category_id], learner_id)
+            if specialist and specialist[0] <= anyone[0] * OFF_TOPIC_PENALTY:
+                mentor_id = specialist[1]
+        self.open[mentor_id] += 1
+        self.version[mentor_id] += 1
+        self._push(mentor_id)
+        return mentor_id
+
+
+def rebalance(offline=()):
+    """Take mentors ``offline`` and give every pending submission without an available mentor to one.
+
+    Returns {mentor id: [submission ids]} for the work handed out.
+    """
+    with transaction.atomic():
+        if offline:
+            MentorProfile.objects.filter(pk__in=offline).update(is_available=False)
+        recount()
+        available = candidates()
+        mentors = {
+            mentor_id: (open_reviews, hours)
+            for mentor_id, open_reviews, hours in available.values_list('mentor_id', 'open_reviews', turnaround())
+        }
+        coverage = defaultdict(list)
+        for mentor_id, category_id in MentorProfile.categories.through.objects.filter(
+            mentorprofile__in=available.values('pk'),
+        ).values_list('mentorprofile_id', 'skillcategory_id'):
+            coverage[mentor_id].append(category_id)
+        balancer = Balancer(mentors, coverage)
+
+        stranded = WorkSubmission.objects.filter(is_reviewed=False).exclude(assigned_to__in=available.values('pk'))
+        handed = defaultdict(list)
+        for pk, category_id, learner_id in stranded.order_by('submitted_at').values_list('pk', 'category', 'user'):
+            mentor_id = balancer.choose(category_id, learner_id)
+            if mentor_id is not None:
+                handed[mentor_id].append(pk)
+
+        now = timezone.now()
+        for mentor_id, pks in handed.items():
+            WorkSubmission.objects.filter(pk__in=pks).update(assigned_to_id=mentor_id, assigned_at=now)
+        # Work nobody could take is left unassigned rather than with an offline or former mentor
+        stranded.exclude(assigned_to=None).update(assigned_to=None, assigned_at=None)
+        recount()
+    return dict(handed)
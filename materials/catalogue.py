@@ -0,0 +1,79 @@
+"""
+Catalogue change tracking.
+
+Two things move whenever a SkillCategory or LearningMaterial is saved or
+deleted:
+
+* the catalogue version, a token in the cache. API responses derive their
+  ETags from it, so a client re-polling an unchanged catalogue gets a 304
+  without any catalogue query being run;
+* the change log (CatalogueChange), which delta sync reads. UserSkillAccess
+  changes are logged too, against their user.
+
+Both are driven by signals connected in MaterialsConfig.ready. Code that
+writes through ``bulk_create``/``bulk_update``/``update()`` bypasses the
+signals and must call ``record_changes()`` itself.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+# kinds whose changes alter the shared catalogue (and so its version)
+CATALOGUE_KINDS = {'category', 'material'}
+
+
+def catalogue_version():
+    """Return the current catalogue version token"""
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+async def acatalogue_version():
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = await cache.aget(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every catalogue ETag"""
+    # A fresh random token rather than an increment, so concurrent bumps can
+    # never land on the same value
+    cache.set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def record_changes(kind, object_ids, deleted=False, user_ids=None):
+    """Log a change to each object, replacing its previous change row.
+
+    Keeping only the latest row per object bounds the log by the number of
+    objects (plus tombstones) rather than the number of edits. ``user_ids``
+    runs parallel to ``object_ids`` for per-user kinds.
+    """
+    from .models import CatalogueChange
+
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    user_ids = list(user_ids) if user_ids is not None else [None] * len(object_ids)
+    CatalogueChange.objects.filter(kind=kind, object_id__in=object_ids).delete()
+    CatalogueChange.objects.bulk_create([
+        CatalogueChange(kind=kind, object_id=object_id, user_id=user_id, deleted=deleted)
+        for object_id, user_id in zip(object_ids, user_ids)
+    ], batch_size=500)
+    if kind in CATALOGUE_KINDS:
+        # After commit, or a reader could cache pre-commit rows under the new version
+        transaction.on_commit(bump_catalogue_version)
+
+
+def change_receiver(kind, deleted):
+    """Build a post_save/post_delete receiver that logs changes of ``kind``"""
+    def receiver(sender, instance, **kwargs):
+        user_ids = [instance.user_id] if kind == 'access' else None
+        record_changes(kind, [instance.pk], deleted=deleted, user_ids=user_ids)
+    return receiver
@@ -0,0 +1,293 @@
+"""
+Cohort onboarding: create a partner organisation's learners and grant their
+entitlements in one pass (see ``import_cohort`` and the "Import cohort" page
+on the User Skill Access admin).
+
+A cohort file is a CSV with a header row and these columns:
+
+    username      required
+    email         required; identifies a learner who already has an account
+    first_name    optional
+    last_name     optional
+    phone_number  optional
+    password      optional; without one the account gets an unusable password
+                  and the learner sets their own through a set-password link
+    categories    optional extra grants for this learner, as
+                  ``slug:tier`` separated by ``;``
+
+Grants passed to ``import_cohort`` apply to every row. A learner whose email
+is already registered is not created again, but still receives the grants.
+
+Rows are never half-imported: a row that fails validation, or repeats an
+earlier row's username or email, is skipped and reported with its line
+number, and the rest of the file is imported. Supplied passwords are hashed
+on a process pool (hashing is CPU-bound, so threads would not help), users
+are written with bulk_create, and entitlements are upserted with
+``bulk_create(update_conflicts=True)``. A grant never lowers a learner's
+existing tier.
+"""
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connections, transaction
+
+from users.functions import NoCase
+from .catalogue import record_changes
+from .models import SkillCategory, UserSkillAccess
+from .packs import TIER_INCLUDES
+
+User = get_user_model()
+
+COLUMNS = ['username', 'email', 'first_name', 'last_name', 'phone_number', 'password', 'categories']
+PROFILE_FIELDS = ['first_name', 'last_name', 'phone_number']
+# SQLite allows 999 variables per statement in older builds
+LOOKUP_BATCH = 500
+# Hashing processes never outnumber the CPUs, whatever a caller asks for
+MAX_WORKERS = os.cpu_count() or 1
+
+
+class CohortError(Exception):
+    """The cohort file cannot be read at all"""
+
+
+@dataclass
+class CohortRow:
+    line: int
+    username: str
+    email: str
+    first_name: str = ''
+    last_name: str = ''
+    phone_number: str = ''
+    password: str = ''
+    grants: dict = field(default_factory=dict)  # category id -> tier
+    user: object = None
+
+
+@dataclass
+class CohortResult:
+    rows: int = 0
+    created: int = 0
+    existing: int = 0
+    granted: int = 0
+    upgraded: int = 0
+    unchanged: int = 0
+    skipped: list = field(default_factory=list)  # (line, reason)
+    duplicates: list = field(default_factory=list)  # (line, reason)
+    created_users: list = field(default_factory=list)
+
+
+def parse_grants(specs, categories=None):
+    """Map ``slug:tier`` strings to {category id: tier}; raises ValueError naming the bad spec"""
+    if categories is None:
+        categories = dict(SkillCategory.objects.values_list('slug', 'id'))
+    grants = {}
+    for spec in specs:
+        slug, _, tier = spec.strip().partition(':')
+        if slug.strip() not in categories:
+            raise ValueError(f'unknown category {slug.strip()!r}')
+        if tier.strip() not in TIER_INCLUDES:
+            raise ValueError(f'tier must be one of {", ".join(TIER_INCLUDES)}, not {tier.strip()!r}')
+        category_id = categories[slug.strip()]
+        grants[category_id] = _higher(grants.get(category_id), tier.strip())
+    return grants
+
+
+def _higher(current, tier):
+    if current is None or current in TIER_INCLUDES[tier]:
+        return tier
+    return current
+
+
+def read_cohort(source):
+    """Rows of a cohort CSV (a path or a binary file object) as (line, dict)"""
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                data = f.read()
+        else:
+            data = source.read()
+        text = data.decode('utf-8-sig')
+    except (OSError, UnicodeDecodeError) as exc:
+        raise CohortError(f'Cannot read cohort file: {exc}')
+    reader = csv.DictReader(io.StringIO(text, newline=''))
+    headers = {(name or '').strip().lower() for name in reader.fieldnames or []}
+    missing = {'username', 'email'} - headers
+    if missing:
+        raise CohortError(f'Cohort file has no {" or ".join(sorted(missing))} column')
+    # Line 1 is the header
+    return list(enumerate(reader, start=2))
+
+
+def validate_rows(raw_rows, grants, result):
+    """CohortRows for every valid, first-seen row; the rest go to ``result``"""
+    categories = dict(SkillCategory.objects.values_list('slug', 'id'))
+    limits = {name: User._meta.get_field(name).max_length for name in ['username', 'email', *PROFILE_FIELDS]}
+    rows, usernames, emails = [], {}, {}
+
+    for line, raw in raw_rows:
+        raw = {(key or '').strip().lower(): (value or '').strip() for key, value in raw.items() if key}
+        try:
+            if not raw.get('username') or not raw.get('email'):
+                raise ValidationError('username and email are required')
+            for name, limit in limits.items():
+                if len(raw.get(name, '')) > limit:
+                    raise ValidationError(f'{name} is longer than {limit} characters')
+            User.username_validator(raw['username'])
+            validate_email(raw['email'])
+            row_grants = dict(grants)
+            if raw.get('categories'):
+                for category_id, tier in parse_grants(raw['categories'].split(';'), categories).items():
+                    row_grants[category_id] = _higher(row_grants.get(category_id), tier)
+        except ValidationError as exc:
+            result.skipped.append((line, ' '.join(exc.messages)))
+            continue
+        except ValueError as exc:
+            result.skipped.append((line, str(exc)))
+            continue
+
+        username, email = raw['username'].lower(), raw['email'].lower()
+        if username in usernames:
+            result.duplicates.append((line, f'username repeats line {usernames[username]}'))
+            continue
+        if email in emails:
+            result.duplicates.append((line, f'email repeats line {emails[email]}'))
+            continue
+        usernames[username] = emails[email] = line
+        rows.append(CohortRow(
+            line=line, username=raw['username'], email=raw['email'], password=raw.get('password', ''),
+            grants=row_grants, **{name: raw.get(name, '') for name in PROFILE_FIELDS},
+        ))
+    return rows
+
+
+def _lookup(column, values):
+    """Users whose ``column`` matches one of ``values`` case-insensitively, keyed by the lowered value"""
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_BATCH):
+        batch = values[start:start + LOOKUP_BATCH]
+        # Served by the admin search indexes on these columns; values are lowercase
+        for user in User.objects.alias(ci=NoCase(column)).filter(ci__in=batch):
+            found[getattr(user, column).lower()] = user
+    return found
+
+
+def match_existing(rows, result):
+    """Attach existing accounts by email; skip rows whose username belongs to someone else"""
+    by_email = _lookup('email', {row.email.lower() for row in rows})
+    for row in rows:
+        row.user = by_email.get(row.email.lower())
+    taken = _lookup('username', {row.username.lower() for row in rows if row.user is None})
+    kept = []
+    for row in rows:
+        if row.user is None and row.username.lower() in taken:
+            result.skipped.append((row.line, f'username {row.username!r} belongs to another account'))
+            continue
+        kept.append(row)
+    return kept
+
+
+def _init_hasher():
+    django.setup()
+
+
+def hash_passwords(passwords, workers):
+    """Hashes of ``passwords`` (None for blank, which gives an unusable password)"""
+    passwords = [password or None for password in passwords]
+    supplied = [password for password in passwords if password]
+    workers = min(workers, MAX_WORKERS, len(supplied))
+    if workers > 1:
+        # Children must not inherit open database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_hasher) as pool:
+            hashed = iter(pool.map(make_password, supplied, chunksize=max(1, len(supplied) // (workers * 4))))
+    else:
+        hashed = iter(map(make_password, supplied))
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+def grant_access(rows, result):
+    """Upsert each row's grants, never lowering a tier the learner already has"""
+    wanted = {(row.user.pk, category_id): tier for row in rows for category_id, tier in row.grants.items()}
+    if not wanted:
+        return
+    current = {}
+    user_ids = list({user_id for user_id, _ in wanted})
+    for start in range(0, len(user_ids), LOOKUP_BATCH):
+        for user_id, category_id, level in UserSkillAccess.objects.filter(
+            user_id__in=user_ids[start:start + LOOKUP_BATCH], category_id__in={c for _, c in wanted},
+        ).values_list('user_id', 'category_id', 'access_level'):
+            current[user_id, category_id] = level
+
+    writes = []
+    for (user_id, category_id), tier in wanted.items():
+        level = current.get((user_id, category_id))
+        if level is not None and tier in TIER_INCLUDES.get(level, []):
+            result.unchanged += 1
+            continue
+        if level is None:
+            result.granted += 1
+        else:
+            result.upgraded += 1
+        writes.append(UserSkillAccess(user_id=user_id, category_id=category_id, access_level=tier))
+
+    UserSkillAccess.objects.bulk_create(
+        writes, batch_size=LOOKUP_BATCH, update_conflicts=True,
+        unique_fields=['user', 'category'], update_fields=['access_level'],
+    )
+    # Bulk writes send no signals; the changed rows go to the delta-sync log by hand
+    written = {(access.user_id, access.category_id) for access in writes}
+    changed_ids, changed_users = [], []
+    for start in range(0, len(user_ids), LOOKUP_BATCH):
+        for pk, user_id, category_id in UserSkillAccess.objects.filter(
+            user_id__in=user_ids[start:start + LOOKUP_BATCH],
+        ).values_list('pk', 'user_id', 'category_id'):
+            if (user_id, category_id) in written:
+                changed_ids.append(pk)
+                changed_users.append(user_id)
+    record_changes('access', changed_ids, user_ids=changed_users)
+
+
+def import_cohort(source, grants=(), workers=None, dry_run=False):
+    """Create the cohort's learners and grant their entitlements; returns a CohortResult.
+
+    ``grants`` are ``slug:tier`` strings applied to every row; ``workers``
+    is the size of the password hashing pool (default and maximum: one per
+    CPU).
+    """
+    grants = parse_grants(grants)
+    result = CohortResult()
+    raw_rows = read_cohort(source)
+    result.rows = len(raw_rows)
+    rows = match_existing(validate_rows(raw_rows, grants, result), result)
+    result.skipped.sort()
+    new_rows = [row for row in rows if row.user is None]
+    result.existing = len(rows) - len(new_rows)
+    if dry_run:
+        result.created = len(new_rows)
+        return result
+
+    passwords = hash_passwords([row.password for row in new_rows], workers or MAX_WORKERS)
+    with transaction.atomic():
+        users = [
+            User(
+                username=row.username, email=row.email, password=password, user_type='student',
+                first_name=row.first_name, last_name=row.last_name, phone_number=row.phone_number or None,
+            )
+            for row, password in zip(new_rows, passwords)
+        ]
+        User.objects.bulk_create(users, batch_size=LOOKUP_BATCH)
+        for row, user in zip(new_rows, users):
+            row.user = user
+        grant_access(rows, result)
+    result.created = len(users)
+    result.created_users = users
+    return result
@@ -0,0 +1,145 @@
+"""
+Per-learner course completion (CategoryProgress), rolled up from ProgressEvent.
+
+materials.progress hands every batch it writes to ``apply_events``, in the
+same transaction, so the rollup only does work for what the batch added:
+
+* last activity becomes the newer of the stored time and the batch's;
+* the completed count and next lesson are recomputed only for (learner,
+  category) pairs the batch completed something in, or has just started.
+
+The next lesson is the first lesson, in category order, the learner has not
+completed. A lesson added or reordered later shows up in it on the learner's
+next completion, or after ``rebuild_progress``.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from .models import CategoryProgress, LearningMaterial, ProgressEvent, SkillCategory
+from .progress import COMPLETE
+
+ROLLUP_FIELDS = ['completed_count', 'last_activity_at', 'next_material']
+
+
+def lesson_order(category_ids):
+    """Each category's lesson ids in learning order"""
+    order = {category_id: [] for category_id in category_ids}
+    lessons = LearningMaterial.objects.filter(category_id__in=category_ids).order_by(
+        'category_id', 'order', 'id'
+    ).values_list('category_id', 'id')
+    for category_id, material_id in lessons:
+        order[category_id].append(material_id)
+    return order
+
+
+def completed_lessons(pairs):
+    """The lesson ids each (user, category) pair has a completion event for"""
+    completed = {pair: set() for pair in pairs}
+    if not pairs:
+        return completed
+    rows = ProgressEvent.objects.filter(
+        event=COMPLETE,
+        user_id__in={user_id for user_id, _ in pairs},
+        material__category_id__in={category_id for _, category_id in pairs},
+    ).values_list('user_id', 'material__category_id', 'material_id').distinct()
+    for user_id, category_id, material_id in rows:
+        if (user_id, category_id) in completed:
+            completed[user_id, category_id].add(material_id)
+    return completed
+
+
+def _summarize(row, lessons, completed):
+    row.completed_count = len(completed)
+    row.next_material_id = next((pk for pk in lessons if pk not in completed), None)
+
+
+def apply_events(events, categories):
+    """Fold a batch of written events into the rollup.
+
+    ``events`` are ``(user_id, material_id, event, occurred_at)`` tuples and
+    ``categories`` maps each material id to its category id.
+    """
+    activity, completions = {}, set()
+    for user_id, material_id, event, occurred_at in events:
+        pair = (user_id, categories[material_id])
+        activity[pair] = max(activity.get(pair, occurred_at), occurred_at)
+        if event == COMPLETE:
+            completions.add(pair)
+    if not activity:
+        return
+
+    existing = {
+        (row.user_id, row.category_id): row for row in CategoryProgress.objects.filter(
+            user_id__in={user_id for user_id, _ in activity},
+            category_id__in={category_id for _, category_id in activity},
+        )
+    }
+    recompute = completions | (activity.keys() - existing.keys())
+    order = lesson_order({category_id for _, category_id in recompute})
+    completed = completed_lessons(recompute)
+
+    rows = []
+    for pair, occurred_at in activity.items():
+        row = existing.get(pair)
+        if row is None:
+            row = CategoryProgress(user_id=pair[0], category_id=pair[1], last_activity_at=occurred_at)
+        row.last_activity_at = max(row.last_activity_at, occurred_at)
+        if pair in recompute:
+            lessons = order[pair[1]]
+            _summarize(row, lessons, completed[pair] & set(lessons))
+        rows.append(row)
+    CategoryProgress.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user', 'category'], update_fields=ROLLUP_FIELDS,
+    )
+
+
+def _rebuild_rows(user_ids, order, category_ids=None):
+    """Fresh rollup rows for ``user_ids``, optionally only in ``category_ids``"""
+    events = ProgressEvent.objects.filter(user_id__in=user_ids)
+    if category_ids is not None:
+        events = events.filter(material__category_id__in=category_ids)
+    activity = {
+        (user_id, category_id): last
+        for user_id, category_id, last in events.values_list(
+            'user_id', 'material__category_id'
+        ).annotate(last=Max('occurred_at')).order_by()
+    }
+    completed = completed_lessons(activity.keys())
+    rows = []
+    for pair, last in activity.items():
+        row = CategoryProgress(user_id=pair[0], category_id=pair[1], last_activity_at=last)
+        lessons = order[pair[1]]
+        _summarize(row, lessons, completed[pair] & set(lessons))
+        rows.append(row)
+    return rows
+
+
+def rebuild(batch_size=500):
+    """Recompute every rollup row from the event log; returns rows written"""
+    user_ids = list(ProgressEvent.objects.order_by('user_id').values_list('user_id', flat=True).distinct())
+    order = lesson_order(list(SkillCategory.objects.values_list('id', flat=True)))
+    written = 0
+    with transaction.atomic():
+        CategoryProgress.objects.all().delete()
+        for start in range(0, len(user_ids), batch_size):
+            rows = _rebuild_rows(user_ids[start:start + batch_size], order)
+            CategoryProgress.objects.bulk_create(rows, batch_size=batch_size)
+            written += len(rows)
+    return written
+
+
+def rebuild_category(category_id, batch_size=500):
+    """Recompute one category's rollup rows, e.g. after lessons moved into it; returns rows written"""
+    user_ids = list(
+        ProgressEvent.objects.filter(material__category_id=category_id)
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+    order = lesson_order([category_id])
+    written = 0
+    with transaction.atomic():
+        CategoryProgress.objects.filter(category_id=category_id).delete()
+        for start in range(0, len(user_ids), batch_size):
+            rows = _rebuild_rows(user_ids[start:start + batch_size], order, [category_id])
+            CategoryProgress.objects.bulk_create(rows, batch_size=batch_size)
+            written += len(rows)
+    return written
@@ -0,0 +1,210 @@
+"""
+Merging duplicate skill categories (see ``merge_duplicate_categories``).
+
+Categories are duplicates when their names match after trimming and case
+folding, the normalization the ``unique_category_name`` constraint
+enforces. Groups are found with one GROUP BY query. In each group the
+oldest category (lowest id) survives.
+
+A duplicate is never simply deleted: every foreign key to a category
+cascades or nulls, so deleting it would take its lessons, entitlements and
+payments with it. Each group is merged in one transaction of set-based
+UPDATEs:
+
+* lessons, payments, submissions and upload sessions move to the survivor;
+* a mentor who reviews any category of the group reviews the survivor;
+* the duplicates' review turnaround sketches are merged into the survivor's;
+* a learner with access through several categories of the group keeps one
+  row, at the highest tier, moved to the survivor; the rest are deleted;
+* the emptied duplicates are deleted, taking their derived rows
+  (CategoryProgress, RevenueRollup) with them, and the survivor's are
+  recomputed.
+
+Bulk writes send no signals, so moved lessons and entitlements are logged
+for delta sync by hand. The deleted categories and entitlement rows log
+their own tombstones through the usual receivers.
+
+Migration 0013 refuses to run while duplicates exist, so the merge also has
+to work on a database stopped just before it: tables from later migrations
+(mentor coverage, review sketches) are skipped when they do not exist yet,
+including by the category delete's cascade. There are no review sketches
+to fold before 0016; ``rebuild_review_sla`` counts earlier reviews after
+migrating.
+"""
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.db.models.deletion import Collector
+from django.db.models import Case, Count, F, IntegerField, Min, Subquery, Value, When, Window
+from django.db.models.functions import Lower, RowNumber, Trim
+from django.utils import timezone
+
+from . import analytics, completion, sla
+from .catalogue import record_changes
+from .models import (
+    LearningMaterial, MentorProfile, Payment, ReviewSketch, SkillCategory, UploadSession, UserSkillAccess,
+    WorkSubmission,
+)
+
+# Higher wins when a learner has access through more than one duplicate
+TIER_RANK = Case(
+    When(access_level='premium', then=Value(2)),
+    When(access_level='enterprise', then=Value(1)),
+    default=Value(0),
+    output_field=IntegerField(),
+)
+
+
+def normalized_name():
+    return Lower(Trim('name'))
+
+
+@dataclass
+class MergeResult:
+    survivor: SkillCategory
+    duplicates: list = field(default_factory=list)  # names and ids of the merged categories
+    materials: int = 0
+    access_moved: int = 0
+    access_dropped: int = 0
+    payments: int = 0
+    submissions: int = 0
+
+
+def duplicate_groups():
+    """[survivor id, duplicate id, ...] for every name shared by more than one category"""
+    shared = (
+        SkillCategory.objects.annotate(key=normalized_name()).values('key')
+        .annotate(n=Count('id')).filter(n__gt=1).values('key')
+    )
+    groups = {}
+    for key, pk in (
+        SkillCategory.objects.annotate(key=normalized_name()).filter(key__in=Subquery(shared))
+        .order_by('key', 'id').values_list('key', 'id')
+    ):
+        groups.setdefault(key, []).append(pk)
+    return list(groups.values())
+
+
+def ranked_access(survivor_id, duplicate_ids):
+    """The group's entitlements, numbered per learner from the one to keep (``position`` 1)"""
+    return UserSkillAccess.objects.filter(category_id__in=[survivor_id, *duplicate_ids]).annotate(position=Window(
+        RowNumber(),
+        partition_by=[F('user_id')],
+        # Best tier first; on a tie, the row already on the survivor
+        order_by=[
+            TIER_RANK.desc(),
+            Case(When(category_id=survivor_id, then=Value(0)), default=Value(1)).asc(),
+            F('id').asc(),
+        ],
+    ))
+
+
+def merge_access(survivor_id, duplicate_ids, result):
+    """Keep each learner's best entitlement across the group, on the survivor"""
+    dropped = ranked_access(survivor_id, duplicate_ids).filter(position__gt=1).values('pk')
+    # Through the ORM, so each deleted row leaves a delta-sync tombstone
+    _, deleted = UserSkillAccess.objects.filter(pk__in=dropped).delete()
+    result.access_dropped = deleted.get(UserSkillAccess._meta.label, 0)
+
+    moving = UserSkillAccess.objects.filter(category_id__in=duplicate_ids)
+    moved = list(moving.values_list('pk', 'user_id'))
+    result.access_moved = moving.update(category_id=survivor_id)
+    record_changes('access', [pk for pk, _ in moved], user_ids=[user_id for _, user_id in moved])
+
+
+class ExistingTablesCollector(Collector):
+    """Deletion collector that skips related models whose table has not been created yet"""
+
+    def __init__(self, *args, tables, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tables = tables
+
+    def related_objects(self, related_model, related_fields, objs):
+        if related_model._meta.db_table not in self.tables:
+            return related_model._base_manager.none()
+        return super().related_objects(related_model, related_fields, objs)
+
+
+def delete_categories(ids, tables):
+    queryset = SkillCategory.objects.filter(pk__in=ids)
+    collector = ExistingTablesCollector(using=queryset.db, origin=queryset, tables=tables)
+    collector.collect(queryset)
+    collector.delete()
+
+
+def merge_mentor_categories(survivor_id, duplicate_ids):
+    """Move mentors' coverage of the duplicates to the survivor, one link per mentor"""
+    links = MentorProfile.categories.through.objects
+    covered = links.filter(skillcategory_id=survivor_id).values('mentorprofile_id')
+    moving = list(
+        links.filter(skillcategory_id__in=duplicate_ids).exclude(mentorprofile_id__in=covered)
+        .values('mentorprofile_id').annotate(first=Min('id')).values_list('first', flat=True)
+    )
+    # The other links cascade with the duplicates
+    links.filter(pk__in=moving).update(skillcategory_id=survivor_id)
+
+
+def merge_group(ids):
+    """Merge the categories ``ids`` into the first of them; returns a MergeResult"""
+    survivor_id, duplicate_ids = ids[0], list(ids[1:])
+    tables = set(connection.introspection.table_names())
+    with transaction.atomic():
+        categories = {c.pk: c for c in SkillCategory.objects.select_for_update().filter(pk__in=ids)}
+        result = MergeResult(
+            survivor=categories[survivor_id],
+            duplicates=[(categories[pk].pk, categories[pk].name) for pk in duplicate_ids],
+        )
+        merge_access(survivor_id, duplicate_ids, result)
+
+        materials = LearningMaterial.objects.filter(category_id__in=duplicate_ids)
+        moved_materials = list(materials.values_list('pk', flat=True))
+        result.materials = materials.update(category_id=survivor_id)
+        record_changes('material', moved_materials)
+
+        payments = Payment.objects.filter(category_id__in=duplicate_ids)
+        # The duplicates' rollup rows go with them; these days are rolled up again for the survivor
+        days = {
+            timezone.localdate(created_at)
+            for created_at in payments.filter(is_verified=True).values_list('created_at', flat=True).distinct()
+        }
+        result.payments = payments.update(category_id=survivor_id)
+        result.submissions = WorkSubmission.objects.filter(category_id__in=duplicate_ids).update(
+            category_id=survivor_id,
+        )
+        UploadSession.objects.filter(category_id__in=duplicate_ids).update(category_id=survivor_id)
+        if MentorProfile.categories.through._meta.db_table in tables:
+            merge_mentor_categories(survivor_id, duplicate_ids)
+        if ReviewSketch._meta.db_table in tables:
+            sla.merge_keys('category', survivor_id, duplicate_ids)
+
+        delete_categories(duplicate_ids, tables)
+        if days:
+            analytics.refresh_days(days)
+        if moved_materials:
+            completion.rebuild_category(survivor_id)
+    return result
+
+
+def merge_duplicates():
+    """Merge every group of duplicate categories in one transaction; returns a MergeResult per group"""
+    with transaction.atomic():
+        return [merge_group(ids) for ids in duplicate_groups()]
+
+
+def preview():
+    """What ``merge_duplicates`` would do, without writing: a MergeResult per group"""
+    results = []
+    for ids in duplicate_groups():
+        categories = SkillCategory.objects.in_bulk(ids)
+        survivor_id, duplicate_ids = ids[0], ids[1:]
+        ranked = ranked_access(survivor_id, duplicate_ids)
+        results.append(MergeResult(
+            survivor=categories[survivor_id],
+            duplicates=[(pk, categories[pk].name) for pk in duplicate_ids],
+            materials=LearningMaterial.objects.filter(category_id__in=duplicate_ids).count(),
+            access_moved=ranked.filter(position=1, category_id__in=duplicate_ids).count(),
+            access_dropped=ranked.filter(position__gt=1).count(),
+            payments=Payment.objects.filter(category_id__in=duplicate_ids).count(),
+            submissions=WorkSubmission.objects.filter(category_id__in=duplicate_ids).count(),
+        ))
+    return results
@@ -0,0 +1,42 @@
+"""
+Column specs for the payment and submission exports (see users/exports.py),
+and the datasets the ``export_data`` command can write.
+"""
+from django.contrib.auth import get_user_model
+
+from users.exports import USER_COLUMNS
+from .models import Payment, WorkSubmission
+
+PAYMENT_COLUMNS = [
+    ('ID', 'id'),
+    ('Created at', 'created_at'),
+    ('Username', 'user__username'),
+    ('Email', 'user__email'),
+    ('Category', 'category__name'),
+    ('Access level', 'access_level'),
+    ('Amount', 'amount'),
+    ('M-Pesa code', 'mpesa_code'),
+    ('Phone number', 'phone_number'),
+    ('Verified', 'is_verified'),
+]
+
+SUBMISSION_COLUMNS = [
+    ('ID', 'id'),
+    ('Submitted at', 'submitted_at'),
+    ('Title', 'title'),
+    ('Username', 'user__username'),
+    ('Category', 'category__name'),
+    ('File', 'file'),
+    ('File size', 'file_size'),
+    ('SHA-256', 'sha256'),
+    ('Reviewed', 'is_reviewed'),
+]
+
+
+def datasets():
+    """Export name -> (queryset, columns)"""
+    return {
+        'payments': (Payment.objects.all(), PAYMENT_COLUMNS),
+        'users': (get_user_model().objects.all(), USER_COLUMNS),
+        'submissions': (WorkSubmission.objects.all(), SUBMISSION_COLUMNS),
+    }
@@ -1,14 +1,74 @@
 from django import forms
-from .models import WorkSubmission, MentorFeedback
+from .cohorts import MAX_WORKERS
+from .models import LearningMaterial, WorkSubmission, MentorFeedback, MentorProfile, SkillCategory, UserSkillAccess
 
 
-class WorkSubmissionForm(forms.ModelForm):
+class InspectedUploadsMixin:
+    """Report files rejected by InspectingUploadHandler as field errors"""
+    upload_rejections = {}
+
+    @classmethod
+    def for_request(cls, request):
+        """This form, also reporting the uploads the handler stopped in ``request``"""
+        # Reading FILES parses the body, which is when the handler records rejections
+        request.FILES
+        rejections = getattr(request, 'upload_rejections', None)
+        if not rejections:
+            return cls
+        return type(cls.__name__, (cls,), {'upload_rejections': rejections})
+
+    def clean(self):
+        cleaned_data = super().clean()
+        rejections = dict(self.upload_rejections)
+        for name, upload in self.files.items():
+            if getattr(upload, 'rejection', None):
+                rejections[name] = upload.rejection
+        for name, rejection in rejections.items():
+            if name in self.fields:
+                # Replaces "This field is required." when the file never arrived
+                self.errors.pop(name, None)
+                self.add_error(name, rejection)
+        return cleaned_data
+
+
+class WorkSubmissionForm(InspectedUploadsMixin, forms.ModelForm):
     class Meta:
         model = WorkSubmission
         fields = ['title', 'description', 'file']
 
 
+class LearningMaterialAdminForm(InspectedUploadsMixin, forms.ModelForm):
+    class Meta:
+        model = LearningMaterial
+        fields = '__all__'
+
+
 class MentorFeedbackForm(forms.ModelForm):
     class Meta:
         model = MentorFeedback
         fields = ['rating', 'feedback', 'recommendation']
+
+
+class MentorProfileForm(forms.ModelForm):
+    class Meta:
+        model = MentorProfile
+        fields = ['categories', 'is_available']
+        widgets = {'categories': forms.CheckboxSelectMultiple}
+        labels = {'categories': 'Skills I review', 'is_available': 'Available for new submissions'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['categories'].queryset = SkillCategory.objects.order_by('name')
+
+
+class CohortImportForm(forms.Form):
+    cohort = forms.FileField(help_text='CSV with username and email columns (see materials/cohorts.py)')
+    categories = forms.ModelMultipleChoiceField(
+        queryset=SkillCategory.objects.order_by('name'), required=False,
+        help_text='Granted to every learner in the file',
+    )
+    tier = forms.ChoiceField(choices=UserSkillAccess.ACCESS_LEVEL, initial='enterprise')
+    workers = forms.IntegerField(
+        min_value=1, max_value=MAX_WORKERS, required=False,
+        help_text=f'Processes used to hash supplied passwords, at most {MAX_WORKERS}',
+    )
@@ -0,0 +1,272 @@
+"""
+Bulk import of learning materials from a manifest (see ``import_materials``).
+
+A manifest is a CSV file with a header row, or a JSON list of objects, with
+these keys:
+
+    category     SkillCategory slug
+    title        lesson title; (category, title) identifies a lesson on re-import
+    description  optional
+    type         'video' or 'pdf'
+    tier         'basic', 'enterprise' or 'premium'
+    order        optional integer, default 0
+    file         PDF path, relative to the manifest (pdf lessons)
+    youtube_url  full YouTube URL (video lessons)
+
+Every row is validated before anything is written or copied, including each
+PDF's type (from its magic bytes) and size. PDFs are then hashed and
+copied on a thread pool and stored under a content-addressed name, so
+importing the same file twice reuses the stored copy instead of creating
+``name_AbC123x.pdf`` duplicates. Rows are written with bulk_create and
+bulk_update, one transaction per category.
+"""
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.utils.text import slugify
+
+from .catalogue import record_changes
+from .models import LearningMaterial, SkillCategory
+from .upload_handlers import SNIFF_BYTES, FileInspector, inspect_file, upload_limits
+from .youtube import parse_youtube_url
+
+MATERIAL_TYPES = {value for value, _ in LearningMaterial.MATERIAL_TYPE}
+ACCESS_LEVELS = {value for value, _ in LearningMaterial.ACCESS_LEVEL}
+# Keys whose values must be strings (JSON manifests can hold anything)
+TEXT_KEYS = ['category', 'title', 'description', 'type', 'tier', 'file', 'youtube_url']
+UPDATE_FIELDS = [
+    'description', 'material_type', 'youtube_url', 'youtube_id', 'youtube_start', 'pdf_file',
+    'pdf_sha256', 'pdf_content_type', 'pdf_size', 'access_level', 'order',
+]
+
+
+class ManifestError(Exception):
+    """The manifest has problems; ``errors`` lists every one of them"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} problem(s) in manifest')
+        self.errors = errors
+
+
+@dataclass
+class ManifestRow:
+    line: int
+    category: SkillCategory
+    title: str
+    description: str
+    material_type: str
+    access_level: str
+    order: int
+    youtube_url: str = None
+    source: Path = None
+    pdf: dict = field(default_factory=dict)
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    files_copied: int = 0
+    files_reused: int = 0
+
+
+def read_manifest(path):
+    """Return the manifest's rows as dicts, numbered from 1"""
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+        if not isinstance(rows, list):
+            raise ManifestError(['JSON manifest must be a list of objects'])
+        return list(enumerate(rows, start=1))
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        # Line 1 is the header
+        return list(enumerate(csv.DictReader(f), start=2))
+
+
+def pdf_rejection(source):
+    """Why ``source`` may not be stored as a lesson PDF, or None; reads only its first bytes"""
+    inspector = FileInspector(upload_limits('pdf_file'))
+    with open(source, 'rb') as f:
+        inspector.feed(f.read(SNIFF_BYTES))
+    return inspector.finish().check_size(source.stat().st_size).rejection
+
+
+def validate_manifest(raw_rows, base_dir):
+    """Check every row up front; returns ManifestRows or raises ManifestError"""
+    categories = {c.slug: c for c in SkillCategory.objects.all()}
+    validate_url = URLValidator()
+    errors, rows, seen, rejections = [], [], {}, {}
+
+    for line, raw in raw_rows:
+        def error(message):
+            errors.append(f'row {line}: {message}')
+
+        if not isinstance(raw, dict):
+            error('expected an object')
+            continue
+        raw = {key.strip().lower(): (value.strip() if isinstance(value, str) else value)
+               for key, value in raw.items() if key}
+        not_text = [key for key in TEXT_KEYS if raw.get(key) is not None and not isinstance(raw[key], str)]
+        if not_text:
+            error(f'{", ".join(not_text)} must be text')
+            continue
+
+        category = categories.get(raw.get('category') or '')
+        if category is None:
+            error(f"unknown category {raw.get('category')!r}")
+        title = raw.get('title') or ''
+        if not title:
+            error('title is required')
+        elif len(title) > LearningMaterial._meta.get_field('title').max_length:
+            error('title is too long')
+        material_type = raw.get('type') or ''
+        if material_type not in MATERIAL_TYPES:
+            error(f'type must be one of {", ".join(sorted(MATERIAL_TYPES))}')
+        access_level = raw.get('tier') or ''
+        if access_level not in ACCESS_LEVELS:
+            error(f'tier must be one of {", ".join(sorted(ACCESS_LEVELS))}')
+        try:
+            order = int(raw.get('order') or 0)
+        except (TypeError, ValueError):
+            error('order must be a whole number')
+            order = 0
+
+        youtube_url = raw.get('youtube_url') or None
+        source = None
+        if material_type == 'video':
+            try:
+                validate_url(youtube_url or '')
+            except ValidationError:
+                error('video lessons need a valid youtube_url')
+        elif material_type == 'pdf':
+            if not raw.get('file'):
+                error('pdf lessons need a file')
+            else:
+                source = (Path(base_dir) / raw['file']).resolve()
+                if not source.is_file():
+                    error(f"file not found: {raw['file']}")
+                else:
+                    if source not in rejections:
+                        rejections[source] = pdf_rejection(source)
+                    if rejections[source]:
+                        error(f"{raw['file']}: {rejections[source]}")
+
+        if category and title:
+            key = (category.pk, title)
+            if key in seen:
+                error(f'duplicates row {seen[key]} ({category.slug} / {title})')
+            seen.setdefault(key, line)
+
+        rows.append(ManifestRow(
+            line=line, category=category, title=title, description=raw.get('description') or '',
+            material_type=material_type, access_level=access_level, order=order,
+            youtube_url=youtube_url, source=source,
+        ))
+
+    if errors:
+        raise ManifestError(errors)
+    return rows
+
+
+def store_pdf(source):
+    """Hash a PDF and copy it into storage unless an identical copy is already there.
+
+    Returns ``(metadata, copied)``. Runs on the import thread pool.
+    """
+    with open(source, 'rb') as f:
+        upload = File(f, name=source.name)
+        inspection = inspect_file(upload, upload_limits('pdf_file'))
+        if inspection.rejection:
+            raise ManifestError([f'{source}: {inspection.rejection}'])
+        name = f'materials/pdfs/{slugify(source.stem) or "lesson"}-{inspection.sha256[:12]}.pdf'
+        copied = not default_storage.exists(name)
+        if copied:
+            name = default_storage.save(name, upload)
+    metadata = {
+        'pdf_file': name, 'pdf_sha256': inspection.sha256,
+        'pdf_content_type': inspection.content_type, 'pdf_size': inspection.size,
+    }
+    return metadata, copied
+
+
+def store_files(rows, workers):
+    """Copy and hash every row's PDF in parallel; returns (copied, reused)"""
+    sources = sorted({row.source for row in rows if row.source})
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import') as pool:
+        stored = dict(zip(sources, pool.map(store_pdf, sources)))
+    for row in rows:
+        if row.source:
+            row.pdf = stored[row.source][0]
+    copied = sum(1 for _, was_copied in stored.values() if was_copied)
+    return copied, len(sources) - copied
+
+
+def current_values(material):
+    values = {name: getattr(material, name) for name in UPDATE_FIELDS}
+    values['pdf_file'] = material.pdf_file.name or None
+    return values
+
+
+def import_rows(rows, result):
+    """Insert new lessons and update existing ones, one transaction per category"""
+    by_category = {}
+    for row in rows:
+        by_category.setdefault(row.category, []).append(row)
+
+    for category, category_rows in by_category.items():
+        with transaction.atomic():
+            existing = {
+                m.title: m for m in LearningMaterial.objects.select_for_update().filter(
+                    category=category, title__in=[row.title for row in category_rows]
+                )
+            }
+            to_create, to_update = [], []
+            for row in category_rows:
+                youtube_url = row.youtube_url if row.material_type == 'video' else None
+                # bulk writes skip LearningMaterial.save(), which normally parses the URL
+                youtube_id, youtube_start = parse_youtube_url(youtube_url)
+                values = {
+                    'description': row.description, 'material_type': row.material_type,
+                    'youtube_url': youtube_url, 'youtube_id': youtube_id or '', 'youtube_start': youtube_start,
+                    'access_level': row.access_level, 'order': row.order,
+                    'pdf_file': None, 'pdf_sha256': '', 'pdf_content_type': '', 'pdf_size': None,
+                    **row.pdf,
+                }
+                material = existing.get(row.title)
+                if material is None:
+                    to_create.append(LearningMaterial(category=category, title=row.title, **values))
+                    continue
+                if values != current_values(material):
+                    for name, value in values.items():
+                        setattr(material, name, value)
+                    to_update.append(material)
+            LearningMaterial.objects.bulk_create(to_create, batch_size=500)
+            LearningMaterial.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=500)
+            # Bulk writes send no signals
+            record_changes('material', [m.pk for m in to_create + to_update])
+        result.created += len(to_create)
+        result.updated += len(to_update)
+        result.unchanged += len(category_rows) - len(to_create) - len(to_update)
+
+
+def import_manifest(path, base_dir=None, workers=8, dry_run=False):
+    """Validate, store files for and import a manifest; returns an ImportResult"""
+    path = Path(path)
+    rows = validate_manifest(read_manifest(path), base_dir or path.parent)
+    result = ImportResult(rows=len(rows))
+    if dry_run:
+        return result
+    result.files_copied, result.files_reused = store_files(rows, workers)
+    import_rows(rows, result)
+    return result
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from materials import recommendations
+
+
+class Command(BaseCommand):
+    help = ('Recompute the lessons suggested alongside each lesson from learners\' history '
+            '(see materials/recommendations.py); run nightly')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbours', type=int, default=None,
+                            help='Lessons to keep per lesson (default: RECOMMENDATION_NEIGHBOURS)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = recommendations.build(options['neighbours'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {count} recommendation(s) in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from materials import query_plans
+
+# The audit renders pages, so keep it away from the shared cache
+AUDIT_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind the hot pages against seeded data and fail on any full table scan'
+
+    def handle(self, *args, **options):
+        # Seed a freshly migrated throwaway database, never the live one
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=AUDIT_CACHES):
+                problems, checked = query_plans.audit()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for problem in problems:
+            self.stderr.write(str(problem))
+        if problems:
+            raise CommandError(f'{len(problems)} full table scan(s) in {checked} queries.')
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} queries: no full table scans.'))
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from materials.exports import datasets
+from users.exports import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream payments, users or submissions to a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(datasets()))
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout, CSV only)')
+        parser.add_argument('--chunk-size', type=int, help='Rows read per query (default: EXPORT_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        queryset, columns = datasets()[options['dataset']]
+        fmt = options['format']
+        if not options['output'] and fmt != 'csv':
+            raise CommandError('--output is required for XLSX exports')
+        chunks = iter_export(
+            queryset, columns, fmt, sheet_name=options['dataset'].title(), chunk_size=options['chunk_size'],
+        )
+        if not options['output']:
+            stream = getattr(self.stdout, 'buffer', None) or sys.stdout.buffer
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+            return
+        size = 0
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {size} bytes to {options["output"]}.'))
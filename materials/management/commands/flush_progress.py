@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from materials.progress import flush
+
+
+class Command(BaseCommand):
+    help = 'Write spooled learning-progress events (PROGRESS_SPOOL_DIR) to the database'
+
+    def handle(self, *args, **options):
+        count = flush()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} progress event(s).'))
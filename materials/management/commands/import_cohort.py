@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from materials.cohorts import CohortError, import_cohort
+from users.exports import iter_set_password_links
+
+
+class Command(BaseCommand):
+    help = 'Create a cohort of learners from a CSV and grant their entitlements (see materials/cohorts.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cohort', help='Path to the cohort CSV')
+        parser.add_argument(
+            '--grant', action='append', default=[], metavar='SLUG:TIER',
+            help='Grant every learner this tier in this category; repeatable',
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Processes used to hash supplied passwords')
+        parser.add_argument('--links', help='Write set-password links for the new learners to this CSV')
+        parser.add_argument('--base-url', help='Site address the set-password links point at, e.g. https://example.com')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing')
+
+    def handle(self, *args, **options):
+        if options['links'] and not options['base_url']:
+            raise CommandError('--links needs --base-url')
+        started = time.monotonic()
+        try:
+            result = import_cohort(
+                options['cohort'], grants=options['grant'], workers=options['workers'], dry_run=options['dry_run'],
+            )
+        except CohortError as exc:
+            raise CommandError(str(exc))
+        except ValueError as exc:
+            raise CommandError(f'--grant: {exc}')
+
+        for line, reason in result.skipped:
+            self.stderr.write(f'row {line}: skipped, {reason}')
+        for line, reason in result.duplicates:
+            self.stderr.write(f'row {line}: duplicate, {reason}')
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Cohort OK: {result.created} to create, {result.existing} existing, '
+                f'{len(result.skipped)} skipped, {len(result.duplicates)} duplicate(s).'
+            ))
+            return
+
+        if options['links'] and result.created_users:
+            with open(options['links'], 'wb') as output:
+                for chunk in iter_set_password_links(result.created_users, options['base_url']):
+                    output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.rows} row(s) in {time.monotonic() - started:.1f}s: '
+            f'{result.created} learner(s) created, {result.existing} existing, '
+            f'{result.granted} entitlement(s) granted, {result.upgraded} upgraded, {result.unchanged} unchanged, '
+            f'{len(result.skipped)} skipped, {len(result.duplicates)} duplicate(s).'
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from materials.importer import ManifestError, import_manifest
+
+
+class Command(BaseCommand):
+    help = 'Import learning materials from a CSV or JSON manifest (see materials/importer.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='Path to a .csv or .json manifest')
+        parser.add_argument(
+            '--base-dir', default=None,
+            help='Directory that file paths are relative to (default: the manifest\'s directory)',
+        )
+        parser.add_argument('--workers', type=int, default=8, help='Threads used to hash and copy PDFs')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the manifest without importing')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            result = import_manifest(
+                options['manifest'], base_dir=options['base_dir'],
+                workers=options['workers'], dry_run=options['dry_run'],
+            )
+        except OSError as exc:
+            raise CommandError(f'Cannot read manifest: {exc}')
+        except ManifestError as exc:
+            for error in exc.errors:
+                self.stderr.write(error)
+            raise CommandError(f'{exc}; nothing was imported.')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Manifest OK: {result.rows} row(s).'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.rows} row(s) in {time.monotonic() - started:.1f}s: '
+            f'{result.created} created, {result.updated} updated, {result.unchanged} unchanged, '
+            f'{result.files_copied} file(s) copied, {result.files_reused} reused.'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from materials.duplicates import merge_duplicates, preview
+
+
+class Command(BaseCommand):
+    help = ('Merge skill categories whose names differ only in case or surrounding spaces, '
+            'moving their lessons, entitlements, payments and submissions to the oldest (see materials/duplicates.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be merged without writing')
+
+    def handle(self, *args, **options):
+        results = preview() if options['dry_run'] else merge_duplicates()
+        if not results:
+            self.stdout.write(self.style.SUCCESS('No duplicate categories.'))
+            return
+        verb = 'Would merge' if options['dry_run'] else 'Merged'
+        for result in results:
+            merged = ', '.join(f'#{pk} {name!r}' for pk, name in result.duplicates)
+            self.stdout.write(
+                f'{verb} {merged} into #{result.survivor.pk} {result.survivor.name!r}: '
+                f'{result.materials} lesson(s), {result.access_moved} entitlement(s) moved '
+                f'({result.access_dropped} superseded by a higher tier), '
+                f'{result.payments} payment(s), {result.submissions} submission(s).'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {sum(len(r.duplicates) for r in results)} duplicate(s) into {len(results)} categor'
+            f'{"y" if len(results) == 1 else "ies"}.'
+        ))
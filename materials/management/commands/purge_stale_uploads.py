@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from materials.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete unfinished chunked uploads (and their temp files) past CHUNKED_UPLOAD_EXPIRY'
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} stale upload(s).'))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from materials import assignment, notifications
+
+
+class Command(BaseCommand):
+    help = ('Hand pending submissions held by offline mentors, or by nobody, to available mentors '
+            '(see materials/assignment.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offline', nargs='+', default=[], metavar='USERNAME',
+                            help='Take these mentors offline first')
+
+    def handle(self, *args, **options):
+        usernames = options['offline']
+        offline = dict(get_user_model().objects.filter(username__in=usernames).values_list('username', 'pk'))
+        missing = sorted(set(usernames) - set(offline))
+        if missing:
+            raise CommandError(f'No such user(s): {", ".join(missing)}')
+        with transaction.atomic():
+            handed = assignment.rebalance(list(offline.values()))
+            for mentor_id, submission_ids in handed.items():
+                notifications.reviews_handed_over(mentor_id, len(submission_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned {sum(len(pks) for pks in handed.values())} submission(s) to {len(handed)} mentor(s).'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from materials.completion import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute every learner\'s category progress rollup from the progress event log'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} progress row(s).'))
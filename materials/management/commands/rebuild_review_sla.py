@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from materials import sla
+
+
+class Command(BaseCommand):
+    help = ('Recompute the time-to-first-review sketches from all mentor feedback '
+            '(see materials/sla.py); reviews are otherwise counted as they are saved')
+
+    def handle(self, *args, **options):
+        counted = sla.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Counted {counted} review(s).'))
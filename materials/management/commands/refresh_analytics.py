@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from materials import analytics
+
+
+class Command(BaseCommand):
+    help = 'Roll up payments added since the last refresh into the revenue analytics tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every day from scratch')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = analytics.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup row(s).'))
+        else:
+            count = analytics.refresh()
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {count} day(s).'))
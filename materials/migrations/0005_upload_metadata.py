@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0004_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='pdf_content_type',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='pdf_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksubmission',
+            name='content_type',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='worksubmission',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksubmission',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+    ]
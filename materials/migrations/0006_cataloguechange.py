@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    """Give every existing object a change row so a first sync returns it"""
+    CatalogueChange = apps.get_model('materials', 'CatalogueChange')
+    SkillCategory = apps.get_model('materials', 'SkillCategory')
+    LearningMaterial = apps.get_model('materials', 'LearningMaterial')
+    UserSkillAccess = apps.get_model('materials', 'UserSkillAccess')
+
+    changes = [CatalogueChange(kind='category', object_id=pk) for pk in SkillCategory.objects.values_list('pk', flat=True)]
+    changes += [CatalogueChange(kind='material', object_id=pk) for pk in LearningMaterial.objects.values_list('pk', flat=True)]
+    changes += [
+        CatalogueChange(kind='access', object_id=pk, user_id=user_id)
+        for pk, user_id in UserSkillAccess.objects.values_list('pk', 'user_id')
+    ]
+    CatalogueChange.objects.bulk_create(changes, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0005_upload_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('category', 'Skill category'), ('material', 'Learning material'), ('access', 'User skill access')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='catalogue_change_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:06
+
+from django.db import migrations, models
+
+from materials.youtube import parse_youtube_url
+
+
+def parse_existing_urls(apps, schema_editor):
+    LearningMaterial = apps.get_model('materials', 'LearningMaterial')
+    materials = list(LearningMaterial.objects.exclude(youtube_url__isnull=True).exclude(youtube_url=''))
+    for material in materials:
+        video_id, material.youtube_start = parse_youtube_url(material.youtube_url)
+        material.youtube_id = video_id or ''
+    LearningMaterial.objects.bulk_update(materials, ['youtube_id', 'youtube_start'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0006_cataloguechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='youtube_id',
+            field=models.CharField(blank=True, editable=False, max_length=11),
+        ),
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='youtube_start',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(parse_existing_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0007_learningmaterial_youtube_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('view', 'Viewed'), ('download', 'Downloaded'), ('complete', 'Completed')], max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('material', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='progress_events', to='materials.learningmaterial')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='progress_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'material', 'event'], name='progress_user_material_idx'), models.Index(fields=['material', 'event', 'occurred_at'], name='progress_material_event_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0008_progressevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='learner_progress', to='materials.skillcategory')),
+                ('next_material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='materials.learningmaterial')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='category_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'category progress',
+                'constraints': [models.UniqueConstraint(fields=('user', 'category'), name='unique_category_progress')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0009_categoryprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('access_level', models.CharField(max_length=20)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('new_entitlements', models.PositiveIntegerField(default=0)),
+                ('upgrades', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'category', 'access_level'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='revenuerollup',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='materials.skillcategory'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'category', 'access_level'), name='unique_revenue_rollup'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:19
+
+import users.functions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0010_revenue_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(users.functions.NoCase('mpesa_code'), name='payment_mpesa_code_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(users.functions.NoCase('phone_number'), name='payment_phone_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(fields=['submitted_at'], name='submission_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(users.functions.NoCase('title'), name='submission_title_ci_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0011_admin_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learningmaterial',
+            index=models.Index(fields=['category', 'order'], name='material_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('is_verified', True)), fields=['user', '-created_at'], name='payment_user_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['mpesa_code'], name='payment_mpesa_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(fields=['user', '-submitted_at'], name='submission_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(condition=models.Q(('is_reviewed', False)), fields=['-submitted_at'], name='submission_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(condition=models.Q(('is_reviewed', True)), fields=['-submitted_at'], name='submission_reviewed_idx'),
+        ),
+        migrations.AlterField(
+            model_name='learningmaterial',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='materials', to='materials.skillcategory'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='worksubmission',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='work_submissions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
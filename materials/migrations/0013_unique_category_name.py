@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:43
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+
+def refuse_duplicates(apps, schema_editor):
+    # Merging needs the app's signals and rollups, so it is a command, not a data migration
+    SkillCategory = apps.get_model('materials', 'SkillCategory')
+    duplicates = list(
+        SkillCategory.objects.annotate(key=Lower(Trim('name'))).values('key')
+        .annotate(n=Count('id')).filter(n__gt=1).values_list('key', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            f'Duplicate skill categories ({", ".join(duplicates)}). '
+            'Run "python manage.py merge_duplicate_categories" and migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(refuse_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skillcategory',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('name')), name='unique_category_name', violation_error_message='A skill category with this name already exists.'),
+        ),
+    ]
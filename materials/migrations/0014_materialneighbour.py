@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0013_unique_category_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('material', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='materials.learningmaterial')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='materials.learningmaterial')),
+            ],
+            options={
+                'ordering': ['material', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('material', 'rank'), name='unique_material_neighbour_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0014_materialneighbour'),
+        ('users', '0003_admin_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorProfile',
+            fields=[
+                ('mentor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mentor_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('is_available', models.BooleanField(default=True, help_text='Offline mentors are given no new work')),
+                ('open_reviews', models.PositiveIntegerField(default=0, editable=False)),
+                ('turnaround', models.FloatField(blank=True, editable=False, null=True)),
+                ('reviews_done', models.PositiveIntegerField(default=0, editable=False)),
+                ('load', models.FloatField(default=0, editable=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='worksubmission',
+            name='assigned_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksubmission',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_submissions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='worksubmission',
+            index=models.Index(condition=models.Q(('is_reviewed', False)), fields=['assigned_to', '-submitted_at'], name='submission_assigned_idx'),
+        ),
+        migrations.AddField(
+            model_name='mentorprofile',
+            name='categories',
+            field=models.ManyToManyField(blank=True, help_text='Skills this mentor reviews', related_name='mentors', to='materials.skillcategory'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorprofile',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['load'], name='mentor_available_load_idx'),
+        ),
+    ]
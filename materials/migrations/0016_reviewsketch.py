@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0015_mentor_assignment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All submissions'), ('category', 'Category'), ('mentor', 'Mentor')], max_length=10)),
+                ('key', models.PositiveBigIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('buckets', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='unique_review_sketch')],
+            },
+        ),
+    ]
@@ -1,6 +1,14 @@
+import uuid
+from pathlib import Path
+
 from django.db import models
+from django.db.models.functions import Lower, Trim
 from django.conf import settings
 from django.contrib.auth.models import User
+from users.functions import NoCase
+
+from .upload_handlers import describe_file
+from . import youtube
 
 class SkillCategory(models.Model):
     """Digital Marketing, Graphic Design, etc."""
@@ -11,6 +19,13 @@ class SkillCategory(models.Model):
     
     class Meta:
         verbose_name_plural = "Skill Categories"
+        constraints = [
+            # Same normalization as materials.duplicates, which merges any that predate it
+            models.UniqueConstraint(
+                Lower(Trim('name')), name='unique_category_name',
+                violation_error_message='A skill category with this name already exists.',
+            ),
+        ]
     
     def __str__(self):
         return self.name
@@ -28,21 +43,48 @@ class LearningMaterial(models.Model):
         ('premium', 'Premium - KSh 200'),
     ]
     
-    category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE, related_name='materials')
+    # Indexed by material_category_order_idx
+    category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE, related_name='materials', db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField()
     material_type = models.CharField(max_length=10, choices=MATERIAL_TYPE)
     youtube_url = models.URLField(blank=True, null=True)
+    youtube_id = models.CharField(max_length=11, blank=True, editable=False)  # parsed from youtube_url on save
+    youtube_start = models.PositiveIntegerField(null=True, blank=True, editable=False)  # seconds
     pdf_file = models.FileField(upload_to='materials/pdfs/', blank=True, null=True)
+    pdf_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    pdf_content_type = models.CharField(max_length=100, blank=True, editable=False)
+    pdf_size = models.BigIntegerField(null=True, blank=True, editable=False)
     access_level = models.CharField(max_length=20, choices=ACCESS_LEVEL)
     order = models.IntegerField(default=0)  # For ordering lessons
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['category', 'order']
+        indexes = [
+            # A category's lessons in order (category page, packs, progress)
+            models.Index(fields=['category', 'order'], name='material_category_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.category.name} - {self.title}"
+    
+    def save(self, *args, **kwargs):
+        video_id, start = youtube.parse_youtube_url(self.youtube_url)
+        self.youtube_id, self.youtube_start = video_id or '', start
+        if self.pdf_file and not self.pdf_file._committed:
+            self.pdf_sha256, self.pdf_content_type, self.pdf_size = describe_file(self.pdf_file.file)
+        super().save(*args, **kwargs)
+    
+    def get_youtube_embed_url(self, privacy_enhanced=False):
+        """Iframe player URL for the video, or None if youtube_url is not a YouTube video"""
+        if not self.youtube_id:
+            return None
+        return youtube.embed_url(self.youtube_id, self.youtube_start, privacy_enhanced)
+    
+    @property
+    def youtube_poster_url(self):
+        return youtube.POSTER_URL.format(self.youtube_id) if self.youtube_id else None
 
 class UserSkillAccess(models.Model):
     """Track which access level each user has for each skill"""
@@ -66,19 +108,79 @@ class UserSkillAccess(models.Model):
 
 class WorkSubmission(models.Model):
     """Learner work submissions for feedback"""
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='work_submissions')
+    # Indexed by submission_user_idx
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='work_submissions', db_index=False,
+    )
     category = models.ForeignKey(SkillCategory, on_delete=models.SET_NULL, null=True, blank=True)
     title = models.CharField(max_length=200)
     description = models.TextField()
     file = models.FileField(upload_to='work_submissions/')
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    content_type = models.CharField(max_length=100, blank=True, editable=False)
+    file_size = models.BigIntegerField(null=True, blank=True, editable=False)
     submitted_at = models.DateTimeField(auto_now_add=True)
     is_reviewed = models.BooleanField(default=False)
+    # The mentor materials.assignment gave this to; any reviewer may still review it
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='assigned_submissions',
+    )
+    assigned_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['submitted_at'], name='submission_submitted_idx'),
+            # A learner's submissions, newest first
+            models.Index(fields=['user', '-submitted_at'], name='submission_user_idx'),
+            # Mentor dashboard queues, newest first. Partial, because a boolean filter
+            # compiles to "NOT is_reviewed", which a composite index cannot seek on
+            models.Index(fields=['-submitted_at'], condition=models.Q(is_reviewed=False),
+                         name='submission_pending_idx'),
+            models.Index(fields=['-submitted_at'], condition=models.Q(is_reviewed=True),
+                         name='submission_reviewed_idx'),
+            # A mentor's own queue on the dashboard
+            models.Index(fields=['assigned_to', '-submitted_at'], condition=models.Q(is_reviewed=False),
+                         name='submission_assigned_idx'),
+            # Case-insensitive prefix search in the admin
+            models.Index(NoCase('title'), name='submission_title_ci_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
+    
+    def save(self, *args, **kwargs):
+        # Uploads are described once, from the bytes already in hand
+        if self.file and not self.file._committed:
+            self.sha256, self.content_type, self.file_size = describe_file(self.file.file)
+        super().save(*args, **kwargs)
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload that becomes a WorkSubmission once complete"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    category = models.ForeignKey(SkillCategory, on_delete=models.SET_NULL, null=True, blank=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)  # bytes safely written so far
+    writer_until = models.DateTimeField(null=True, blank=True)  # set while a chunk is being written
+    submission = models.OneToOneField(WorkSubmission, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.total_size}) - {self.user.username}"
+    
+    @property
+    def temp_path(self):
+        return Path(settings.CHUNKED_UPLOAD_DIR) / f'{self.id}.part'
+    
+    @property
+    def is_complete(self):
+        return self.offset == self.total_size
 
 class MentorFeedback(models.Model):
     """Feedback from mentors on submissions"""
@@ -100,7 +202,8 @@ class MentorFeedback(models.Model):
 
 class Payment(models.Model):
     """M-Pesa payment records"""
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='payments')
+    # Indexed by payment_user_created_idx
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='payments', db_index=False)
     category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE)
     access_level = models.CharField(max_length=20)  # 'enterprise' or 'premium'
     amount = models.DecimalField(max_digits=6, decimal_places=2)
@@ -111,6 +214,204 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Revenue rollups are recomputed a day's range at a time
+            models.Index(fields=['created_at'], name='payment_created_idx'),
+            # Payment history, newest first
+            models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+            # Dashboard "recent payments": only verified rows are indexed
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_verified=True),
+                         name='payment_user_verified_idx'),
+            # Reused-code check in verify_payment (exact match; the NOCASE index below serves search)
+            models.Index(fields=['mpesa_code'], name='payment_mpesa_code_idx'),
+            # Case-insensitive prefix search in the admin
+            models.Index(NoCase('mpesa_code'), name='payment_mpesa_code_ci_idx'),
+            models.Index(NoCase('phone_number'), name='payment_phone_ci_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.category.name} - KSh {self.amount}"
+
+
+class CatalogueChange(models.Model):
+    """Change log behind delta sync: the latest change to each catalogue object.
+
+    ``seq`` only ever grows, so a client that remembers the highest seq it
+    has seen can ask for everything after it. Deletes leave a row with
+    ``deleted`` set (a tombstone). Entitlement rows carry the owning user.
+    """
+    KIND_CHOICES = [
+        ('category', 'Skill category'),
+        ('material', 'Learning material'),
+        ('access', 'User skill access'),
+    ]
+    
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # No constraint: tombstones may outlive the user they belonged to
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+                             null=True, blank=True, related_name='+')
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'object_id'], name='catalogue_change_object_idx')]
+    
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.object_id}{' (deleted)' if self.deleted else ''}"
+
+
+class ProgressEvent(models.Model):
+    """Append-only log of learners viewing, downloading and completing lessons.
+
+    Rows arrive in batches from materials.progress, never one per request,
+    and are never updated; ``occurred_at`` is when the learner acted, not
+    when the batch was written.
+    """
+    EVENT_CHOICES = [
+        ('view', 'Viewed'),
+        ('download', 'Downloaded'),
+        ('complete', 'Completed'),
+    ]
+    
+    # The composite indexes below lead with these columns, so no separate FK indexes
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False,
+                             related_name='progress_events')
+    material = models.ForeignKey(LearningMaterial, on_delete=models.CASCADE, db_index=False,
+                                 related_name='progress_events')
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    occurred_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'material', 'event'], name='progress_user_material_idx'),
+            models.Index(fields=['material', 'event', 'occurred_at'], name='progress_material_event_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.event} {self.material_id} at {self.occurred_at:%Y-%m-%d %H:%M}"
+
+
+class CategoryProgress(models.Model):
+    """A learner's progress through one category, rolled up from ProgressEvent.
+
+    Maintained batch by batch by materials.completion; ``rebuild_progress``
+    recomputes it from the event log.
+    """
+    # The unique constraint's index leads with user, so no separate FK index
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False,
+                             related_name='category_progress')
+    category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE, related_name='learner_progress')
+    completed_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField()
+    # First lesson, in category order, the learner has not completed
+    next_material = models.ForeignKey(LearningMaterial, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='+')
+    
+    class Meta:
+        verbose_name_plural = 'category progress'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='unique_category_progress'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} in {self.category_id}: {self.completed_count} completed"
+
+
+class RevenueRollup(models.Model):
+    """Verified payments per day, category and tier, rolled up by materials.analytics"""
+    day = models.DateField()
+    category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE, related_name='+')
+    access_level = models.CharField(max_length=20)
+    payments = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # A learner's first paid tier in the category
+    new_entitlements = models.PositiveIntegerField(default=0)
+    # Premium bought on top of enterprise
+    upgrades = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-day', 'category', 'access_level']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category', 'access_level'], name='unique_revenue_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.category_id} {self.access_level}: KSh {self.revenue}"
+
+
+class RollupWatermark(models.Model):
+    """How far an incrementally refreshed rollup has read its source table"""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+
+
+class MaterialNeighbour(models.Model):
+    """A lesson whose learners also took ``material``, ranked by materials.recommendations"""
+    # The unique constraint's index leads with material, so no separate FK index
+    material = models.ForeignKey(LearningMaterial, on_delete=models.CASCADE, db_index=False,
+                                 related_name='neighbours')
+    neighbour = models.ForeignKey(LearningMaterial, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()  # 1 is the closest
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['material', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['material', 'rank'], name='unique_material_neighbour_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.material_id} -> {self.neighbour_id} (#{self.rank})"
+
+
+class MentorProfile(models.Model):
+    """The skills a mentor reviews and their current load, used by materials.assignment"""
+    mentor = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='mentor_profile')
+    categories = models.ManyToManyField(SkillCategory, blank=True, related_name='mentors',
+                                        help_text='Skills this mentor reviews')
+    is_available = models.BooleanField(default=True, help_text='Offline mentors are given no new work')
+    # Maintained by materials.assignment, never by forms
+    open_reviews = models.PositiveIntegerField(default=0, editable=False)
+    turnaround = models.FloatField(null=True, blank=True, editable=False)  # hours; moving average, None until a review
+    reviews_done = models.PositiveIntegerField(default=0, editable=False)
+    load = models.FloatField(default=0, editable=False)  # expected hours before new work would be reviewed
+    
+    class Meta:
+        indexes = [
+            # The least loaded available mentor, by one index seek
+            models.Index(fields=['load'], condition=models.Q(is_available=True), name='mentor_available_load_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.mentor_id} ({self.open_reviews} open)"
+
+
+class ReviewSketch(models.Model):
+    """Time-to-first-review distribution for all work, one category or one mentor (materials/sla.py)"""
+    SCOPE_CHOICES = [
+        ('all', 'All submissions'),
+        ('category', 'Category'),
+        ('mentor', 'Mentor'),
+    ]
+    
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    key = models.PositiveBigIntegerField(default=0)  # category or mentor id; 0 for 'all'
+    count = models.PositiveIntegerField(default=0)
+    total = models.FloatField(default=0)  # seconds, for the mean
+    buckets = models.JSONField(default=dict)  # {bucket index: submissions}
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_review_sketch'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.category.name} - KSh {self.amount}"
\ No newline at end of file
+        return f"{self.scope} {self.key}: {self.count} review(s)"
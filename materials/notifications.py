@@ -0,0 +1,85 @@
+"""
+Emails to learners and mentors. Each is written to the outbox
+(taskqueue/mail.py) in the same transaction as the change it reports:
+
+* a new submission: the mentor it was assigned to (materials/assignment.py),
+  or every mentor when nobody was available, combined into a digest when
+  several arrive close together (from the notify_mentors_of_submission task,
+  which looks the mentors up off the request path);
+* reviews handed over by ``rebalance_reviews``: each mentor given work;
+* mentor feedback saved, on the review page or in the admin: the learner,
+  also as a digest;
+* a payment verified: the learner, at once. A checkout payment is confirmed
+  by the verify_payment task; one an admin marks as verified is caught by
+  the Payment save receivers (connected in MaterialsConfig.ready).
+"""
+from django.contrib.auth import get_user_model
+
+from taskqueue.mail import queue_email
+from users.roles import reviewers
+
+
+def submission_received(submission):
+    """Tell the assigned mentor, or every mentor, that ``submission`` is waiting for review"""
+    if submission.assigned_to_id:
+        mentors = get_user_model().objects.filter(pk=submission.assigned_to_id)
+    else:
+        mentors = get_user_model().objects.filter(reviewers())
+    recipients = mentors.exclude(email='').values_list('email', flat=True)
+    category = submission.category.name if submission.category else 'General'
+    queue_email(
+        f'New submission to review: {submission.title}',
+        f'{submission.user.username} submitted "{submission.title}" ({category}) for review.',
+        recipients, digest=True,
+    )
+
+
+def reviews_handed_over(mentor_id, count):
+    """Tell a mentor that ``count`` submissions were moved to their queue"""
+    email = get_user_model().objects.filter(pk=mentor_id).values_list('email', flat=True).first()
+    if email:
+        queue_email(
+            f'{count} submission(s) added to your review queue',
+            f'{count} submission(s) from mentors who went offline, or that were waiting for a mentor, '
+            'are now assigned to you. See your mentor dashboard.',
+            [email], digest=True,
+        )
+
+
+def payment_verified(payment):
+    """Send the learner a receipt for ``payment``"""
+    queue_email(
+        f'Payment received: {payment.category.name}',
+        f'We have received KSh {payment.amount} (M-Pesa code {payment.mpesa_code}) '
+        f'for {payment.access_level.title()} access to {payment.category.name}. Happy learning!',
+        [payment.user.email],
+    )
+
+
+def feedback_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for MentorFeedback: email the learner the review"""
+    if raw:
+        return
+    submission = instance.submission
+    if created:
+        subject = f'Your work "{submission.title}" has been reviewed'
+    else:
+        subject = f'The review of your work "{submission.title}" was updated'
+    queue_email(
+        subject,
+        f'Rating: {instance.get_rating_display()}\n\n{instance.feedback}\n\n{instance.recommendation}'.strip(),
+        [submission.user.email], digest=True,
+    )
+
+
+def payment_changing(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for Payment: note whether it was verified before this save"""
+    if raw or instance._state.adding:
+        return
+    instance._was_verified = sender.objects.filter(pk=instance.pk).values_list('is_verified', flat=True).first()
+
+
+def payment_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for Payment: a receipt when an existing payment becomes verified"""
+    if not raw and not created and instance.is_verified and getattr(instance, '_was_verified', None) is False:
+        payment_verified(instance)
@@ -0,0 +1,176 @@
+"""
+Offline course packs: a ZIP of every PDF a tier unlocks in a category, plus
+an ``index.json`` describing all of the category's lessons at that tier.
+
+A pack is the same for everyone on a tier, so it is built once per
+(category, tier, catalogue version) and kept in storage under a name with a
+random part. It is never linked to: course_pack, which works out the
+learner's tier, streams it back. Until that artifact exists, the first
+learners get the ZIP streamed straight from the source PDFs (no temp files,
+constant memory) while a background task stores the shared copy.
+"""
+import json
+import secrets
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+
+from .catalogue import catalogue_version
+from .models import LearningMaterial
+
+# Tiers a learner's access level unlocks
+TIER_INCLUDES = {
+    'basic': ['basic'],
+    'enterprise': ['basic', 'enterprise'],
+    'premium': ['basic', 'enterprise', 'premium'],
+}
+BUILD_LOCK_TIMEOUT = 15 * 60
+
+
+def pack_key(category_id, tier, version):
+    return f'pack:{category_id}:{tier}:{version}'
+
+
+def pack_name(category_id, tier, version):
+    # The version is public (/api/v1/), so it alone must not locate a paid pack
+    return f'packs/{category_id}/{tier}-{version}-{secrets.token_hex(16)}.zip'
+
+
+def pack_filename(category, tier):
+    return f'{category.slug or category.pk}-{tier}-pack.zip'
+
+
+def pack_materials(category_id, tier):
+    """The lessons in a tier's pack, in lesson order"""
+    return LearningMaterial.objects.filter(
+        category_id=category_id, access_level__in=TIER_INCLUDES[tier]
+    ).select_related('category').order_by('order', 'id')
+
+
+def pack_index(category, tier, version, materials):
+    """Build index.json and the (archive name, storage name, size) of each PDF"""
+    lessons, files = [], []
+    for position, material in enumerate(materials, start=1):
+        lesson = {
+            'id': material.id, 'title': material.title, 'description': material.description,
+            'type': material.material_type, 'tier': material.access_level, 'order': material.order,
+        }
+        if material.youtube_url:
+            lesson['youtube_url'] = material.youtube_url
+        if material.pdf_file:
+            lesson['file'] = f'pdfs/{position:03d}-{slugify(material.title)[:60] or "lesson"}.pdf'
+            lesson['sha256'] = material.pdf_sha256
+            files.append((lesson['file'], material.pdf_file.name, material.pdf_size or 0))
+        lessons.append(lesson)
+    index = {
+        'category': {'id': category.id, 'slug': category.slug, 'name': category.name},
+        'tier': tier, 'version': version, 'lessons': lessons,
+    }
+    return index, files
+
+
+class _ChunkSink:
+    """Write-only stream that zipfile writes into and the generator drains"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def iter_pack(index, files):
+    """Yield a ZIP archive of ``files`` plus index.json, a chunk at a time.
+
+    PDFs are already compressed, so entries are stored, not deflated; the
+    archive is written with data descriptors, which needs no seeking.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        archive.writestr('index.json', json.dumps(index, indent=1, ensure_ascii=False))
+        yield from sink.drain()
+        for arcname, name, size in files:
+            info = zipfile.ZipInfo(arcname)
+            info.file_size = size
+            with default_storage.open(name, 'rb') as source, archive.open(info, 'w') as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+async def aiter_pack(index, files):
+    """iter_pack for async responses; file reads run off the event loop"""
+    iterator = iter_pack(index, files)
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    while True:
+        chunk = await next_chunk(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def aiter_stored(name):
+    """Yield a stored pack a chunk at a time; file reads run off the event loop"""
+    source = await sync_to_async(default_storage.open, thread_sensitive=False)(name, 'rb')
+    read = sync_to_async(source.read, thread_sensitive=False)
+    try:
+        while chunk := await read(File.DEFAULT_CHUNK_SIZE):
+            yield chunk
+    finally:
+        await sync_to_async(source.close, thread_sensitive=False)()
+
+
+class _IteratorFile(File):
+    """Lets storage.save() consume a generator without buffering it"""
+
+    def __init__(self, iterator, name):
+        super().__init__(None, name=name)
+        self.iterator = iterator
+
+    def chunks(self, chunk_size=None):
+        return self.iterator
+
+
+def build_pack(category_id, tier):
+    """Store the pack for the current catalogue version; returns its storage name"""
+    version = catalogue_version()
+    key = pack_key(category_id, tier, version)
+    name = cache.get(key)
+    if name is None or not default_storage.exists(name):
+        materials = list(pack_materials(category_id, tier))
+        if not materials:
+            return None
+        index, files = pack_index(materials[0].category, tier, version, materials)
+        name = pack_name(category_id, tier, version)
+        name = default_storage.save(name, _IteratorFile(iter_pack(index, files), name))
+    # Only advertise the artifact once it is completely written
+    cache.set(key, name, None)
+    purge_old_packs(category_id, tier, keep=name)
+    return name
+
+
+def purge_old_packs(category_id, tier, keep):
+    """Delete this tier's packs from earlier catalogue versions"""
+    directory = f'packs/{category_id}'
+    try:
+        _, filenames = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        name = f'{directory}/{filename}'
+        if filename.startswith(f'{tier}-') and name != keep:
+            default_storage.delete(name)
@@ -0,0 +1,194 @@
+"""
+Learning-progress event log.
+
+Views, downloads and completions are appended to a per-process buffer, which
+costs no query, and written to ProgressEvent in one ``bulk_create`` once
+PROGRESS_BATCH_SIZE events are waiting or the oldest has waited
+PROGRESS_FLUSH_INTERVAL seconds. The check runs when a request finishes,
+in Django's sync thread, so async views never touch the database for it.
+
+A server worker that is recycled or shut down flushes at exit (the hook is
+installed by the WSGI/ASGI entry points, so test runs and management
+commands never write leftovers from their own process). If the database
+cannot take a batch (locked, or the process is going away), the batch is
+spooled to a file in PROGRESS_SPOOL_DIR instead, and the next flush in any
+worker loads it (``flush_progress`` does the same from the command line).
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+VIEW, DOWNLOAD, COMPLETE = 'view', 'download', 'complete'
+
+_lock = threading.Lock()
+_buffer = []
+_oldest = None  # monotonic time the oldest buffered event was added
+_exit_hook_installed = False
+# A claim this old belongs to a worker that died mid-flush
+STALE_CLAIM_AGE = 60 * 60
+
+
+def record(user, material_id, event):
+    """Buffer one event for ``user``; anonymous users are not tracked"""
+    record_many(user, [material_id], event)
+
+
+def record_many(user, material_ids, event):
+    global _oldest
+    if not user.is_authenticated:
+        return
+    now = timezone.now()
+    with _lock:
+        if not _buffer:
+            _oldest = time.monotonic()
+        _buffer.extend((user.pk, material_id, event, now) for material_id in material_ids)
+
+
+def flush_at_exit():
+    """Flush whatever is still buffered when this process exits"""
+    global _exit_hook_installed
+    if not _exit_hook_installed:
+        atexit.register(flush)
+        _exit_hook_installed = True
+
+
+def discard():
+    """Drop this process's buffered events without writing them"""
+    global _oldest
+    with _lock:
+        _buffer.clear()
+        _oldest = None
+
+
+def pending():
+    """Number of events buffered in this process"""
+    return len(_buffer)
+
+
+def flush_due():
+    with _lock:
+        return bool(_buffer) and (
+            len(_buffer) >= settings.PROGRESS_BATCH_SIZE
+            or time.monotonic() - _oldest >= settings.PROGRESS_FLUSH_INTERVAL
+        )
+
+
+def flush_if_due(**kwargs):
+    """request_finished receiver"""
+    if flush_due():
+        flush()
+
+
+def flush():
+    """Write this process's buffer and any spooled batches; returns rows written"""
+    global _oldest
+    with _lock:
+        events = list(_buffer)
+        _buffer.clear()
+        _oldest = None
+    claimed = _claim_spool()
+    for path in claimed:
+        events.extend(_read_spool(path))
+    if not events:
+        return 0
+    try:
+        written = write_events(events)
+    except DatabaseError:
+        logger.warning('Could not write %d progress events; spooling them', len(events), exc_info=True)
+        spool(events)
+        written = 0
+    for path in claimed:
+        path.unlink(missing_ok=True)
+    return written
+
+
+def write_events(events):
+    """bulk_create ``events`` and update the completion rollup.
+
+    Events whose user or lesson has since been deleted are dropped.
+    """
+    from .completion import apply_events
+    from .models import LearningMaterial, ProgressEvent
+
+    user_ids = set(get_user_model().objects.filter(
+        pk__in={user_id for user_id, *_ in events}
+    ).values_list('pk', flat=True))
+    categories = dict(LearningMaterial.objects.filter(
+        pk__in={material_id for _, material_id, *_ in events}
+    ).values_list('pk', 'category_id'))
+    events = [
+        (user_id, material_id, event, occurred_at)
+        for user_id, material_id, event, occurred_at in events
+        if user_id in user_ids and material_id in categories
+    ]
+    with transaction.atomic():
+        ProgressEvent.objects.bulk_create([
+            ProgressEvent(user_id=user_id, material_id=material_id, event=event, occurred_at=occurred_at)
+            for user_id, material_id, event, occurred_at in events
+        ], batch_size=500)
+        apply_events(events, categories)
+    return len(events)
+
+
+def _spool_dir():
+    return Path(settings.PROGRESS_SPOOL_DIR)
+
+
+def spool(events):
+    """Write ``events`` to a new spool file for a later flush to pick up"""
+    directory = _spool_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{os.getpid()}-{uuid.uuid4().hex}.jsonl'
+    partial = path.with_suffix('.partial')
+    with open(partial, 'w', encoding='utf-8') as f:
+        for user_id, material_id, event, occurred_at in events:
+            f.write(json.dumps([user_id, material_id, event, occurred_at.isoformat()]) + '\n')
+    # Readers only look at complete files
+    os.replace(partial, path)
+    return path
+
+
+def _claim_spool():
+    """Rename spool files to this process, so no other worker loads them too"""
+    directory = _spool_dir()
+    if not directory.is_dir():
+        return []
+    stale = time.time() - STALE_CLAIM_AGE
+    claimed = []
+    for path in sorted(directory.glob('*.jsonl')) + sorted(directory.glob('*.claimed-*')):
+        try:
+            if '.claimed-' in path.suffix and path.stat().st_mtime >= stale:
+                continue
+        except FileNotFoundError:
+            continue
+        target = path.with_suffix(f'.claimed-{os.getpid()}-{uuid.uuid4().hex[:8]}')
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue  # another worker got there first
+        os.utime(target)
+        claimed.append(target)
+    return claimed
+
+
+def _read_spool(path):
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                user_id, material_id, event, occurred_at = json.loads(line)
+                events.append((user_id, material_id, event, datetime.fromisoformat(occurred_at)))
+    return events
@@ -0,0 +1,152 @@
+"""
+Query-plan audit for the pages learners and mentors hit most (see
+``check_query_plans``).
+
+``audit()`` seeds a little of everything, renders each page in ``pages()``
+as the right kind of user, and runs ``EXPLAIN QUERY PLAN`` on every SELECT
+the page issued. A step that reads a whole table is reported: ``SCAN <table>``
+with no index, or a walk of an entire index (``SCAN <table> USING INDEX``)
+in a statement with no LIMIT to stop it early. Walking a partial index is
+fine, since it only holds the rows asked for. Tables in SMALL_TABLES stay at
+a few dozen rows and are read in full on purpose.
+
+The seeded tables are tiny, so ``ANALYZE`` is deliberately not run: without
+statistics SQLite plans as if every table were large, which is the case the
+audit is about.
+"""
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import progress
+from .models import (
+    CatalogueChange, LearningMaterial, MentorFeedback, Payment, SkillCategory, UserSkillAccess, WorkSubmission,
+)
+
+# Read in full by design: the catalogue's category list and Django's own lookups
+SMALL_TABLES = {'materials_skillcategory', 'django_content_type'}
+
+_SCAN_RE = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?$')
+_LIMIT_RE = re.compile(r'\bLIMIT \d+\s*$')
+_ALIAS_RE = re.compile(r'"(\w+)" (U\d+|T\d+|V\d+)\b')
+
+
+@dataclass
+class Problem:
+    page: str
+    table: str
+    sql: str
+    plan: str
+
+    def __str__(self):
+        return f'{self.page}: full scan of {self.table}\n    {self.sql}\n    plan: {self.plan}'
+
+
+def seed():
+    """Create enough related rows for every page in ``pages()`` to render; returns them by role"""
+    User = get_user_model()
+    student = User.objects.create_user(username='plan-student', password='x', user_type='student')
+    mentor = User.objects.create_user(username='plan-mentor', password='x', user_type='mentor')
+    others = User.objects.bulk_create([User(username=f'plan-learner{i}') for i in range(20)])
+    categories = [
+        SkillCategory.objects.create(name=f'Plan Skill {i}', slug=f'plan-skill-{i}', description='d')
+        for i in range(3)
+    ]
+    LearningMaterial.objects.bulk_create([
+        LearningMaterial(
+            category=category, title=f'Lesson {n}', description='d', material_type='video',
+            youtube_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ', youtube_id='dQw4w9WgXcQ',
+            access_level=level, order=n,
+        )
+        for category in categories for n, level in enumerate(['basic', 'enterprise', 'premium'] * 3)
+    ])
+    for user in [student, *others]:
+        for category in categories[:2]:
+            UserSkillAccess.objects.create(user=user, category=category, access_level='premium')
+            Payment.objects.create(
+                user=user, category=category, access_level='premium', amount=Decimal('200.00'),
+                mpesa_code=f'PLAN{user.pk:04d}{category.pk:04d}', phone_number='0712345678', is_verified=True,
+            )
+            WorkSubmission.objects.create(
+                user=user, category=category, title='Portfolio', description='d',
+                file='work_submissions/plan.txt',
+            )
+    reviewed = WorkSubmission.objects.filter(user=student).first()
+    MentorFeedback.objects.create(submission=reviewed, mentor=mentor, feedback='Good', rating='good')
+    WorkSubmission.objects.filter(pk=reviewed.pk).update(is_reviewed=True)
+    return {'student': student, 'mentor': mentor, 'category': categories[0], 'submission': reviewed}
+
+
+def pages(seeded):
+    """(label, user, url) for every audited page"""
+    student, mentor, category = seeded['student'], seeded['mentor'], seeded['category']
+    material = LearningMaterial.objects.filter(category=category).order_by('order').first()
+    sync_from = CatalogueChange.objects.order_by('-seq').values_list('seq', flat=True)[5]
+    return [
+        ('my materials', student, reverse('materials:my_materials')),
+        ('category detail', student, reverse('materials:category_detail', args=[category.pk])),
+        ('material detail', student, reverse('materials:material_detail', args=[category.pk, material.pk])),
+        ('payment history', student, reverse('materials:payment_history')),
+        ('account payment history', student, reverse('payment_history')),
+        ('profile', student, reverse('profile')),
+        ('my submissions', student, reverse('materials:my_submissions')),
+        ('submission detail', student, reverse('materials:submission_detail', args=[seeded['submission'].pk])),
+        ('my learning', student, reverse('materials:my_learning')),
+        ('mentor dashboard', mentor, reverse('materials:mentor_dashboard')),
+        ('api categories', student, reverse('materials:api_categories')),
+        ('api materials', student, reverse('materials:api_materials') + f'?category={category.pk}'),
+        ('api access', student, reverse('materials:api_access')),
+        ('api sync', student, reverse('materials:api_sync') + f'?since={sync_from}'),
+    ]
+
+
+def partial_indexes():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+        return {name for name, in cursor.fetchall()}
+
+
+def full_scans(sql, partial=frozenset()):
+    """(table, plan) for each step of ``sql``'s plan that reads a whole table"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        steps = [row[-1] for row in cursor.fetchall()]
+    aliases = {alias: table for table, alias in _ALIAS_RE.findall(sql)}
+    plan = ' | '.join(steps)
+    scans = []
+    for step in steps:
+        match = _SCAN_RE.match(step)
+        if not match:
+            continue
+        table, index = aliases.get(match.group(1), match.group(1)), match.group(2)
+        if table in SMALL_TABLES or index in partial or (index and _LIMIT_RE.search(sql)):
+            continue
+        scans.append((table, plan))
+    return scans
+
+
+def audit(seeded=None):
+    """Render every page and EXPLAIN its queries; returns (Problems, number of queries checked)"""
+    seeded = seeded or seed()
+    client = Client()
+    partial = partial_indexes()
+    problems, checked = [], 0
+    for label, user, url in pages(seeded):
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{label} ({url}) returned {response.status_code}')
+        for query in ctx.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            checked += 1
+            problems.extend(Problem(label, table, query['sql'], plan) for table, plan in full_scans(query['sql'], partial))
+    progress.discard()
+    return problems, checked
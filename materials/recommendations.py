@@ -0,0 +1,184 @@
+"""
+"Learners also took" recommendations for the lesson page.
+
+``build()`` runs nightly (the ``build_recommendations`` command or task) and
+stores the closest RECOMMENDATION_NEIGHBOURS lessons to every lesson in
+MaterialNeighbour, replacing the previous build in one transaction. Two
+signals are blended:
+
+* lesson co-occurrence: a sparse learner x lesson matrix from the progress
+  log, weighted by the learner's strongest event on the lesson (complete 3,
+  download 2, view 1). Lesson similarity is the cosine between columns;
+* category affinity: the cosine between categories over the learners who
+  hold an entitlement in, or have submitted work to, each. It ranks lessons
+  nobody has co-viewed yet, and lets paths across categories (design, then
+  marketing) show up. Each lesson is scored against the lessons of its own
+  category and of its RELATED_CATEGORIES closest categories, at
+  CATEGORY_WEIGHT, plus any lesson it was actually co-viewed with.
+
+Both matrices are kept as dicts of sparse rows. Dot products are summed per
+learner over the pairs of lessons that learner touched, so the work grows
+with the interactions rather than with lessons squared. The progress log is
+read in keyset batches, as the exports do, so the nightly read never holds
+SQLite's shared lock for long.
+
+The lesson page reads the stored neighbours in rank order with one indexed
+query, keeping only lessons the viewer's tier in their category unlocks.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from users.exports import iter_batches
+from .models import LearningMaterial, MaterialNeighbour, ProgressEvent, UserSkillAccess, WorkSubmission
+from .progress import COMPLETE, DOWNLOAD, VIEW
+
+EVENT_WEIGHTS = {VIEW: 1.0, DOWNLOAD: 2.0, COMPLETE: 3.0}
+# Share of the score that comes from the two lessons' categories
+CATEGORY_WEIGHT = 0.2
+RELATED_CATEGORIES = 3
+# Bounds the pairs one very active learner adds; their strongest lessons are kept
+MAX_LESSONS_PER_LEARNER = 200
+READ_BATCH = 5000
+
+
+def learner_lessons():
+    """{user id: {material id: weight}} from the progress log"""
+    lessons = defaultdict(dict)
+    columns = [('User', 'user_id'), ('Material', 'material_id'), ('Event', 'event')]
+    for rows in iter_batches(ProgressEvent.objects.all(), columns, READ_BATCH):
+        for user_id, material_id, event in rows:
+            weight = EVENT_WEIGHTS.get(event, 0.0)
+            if weight > lessons[user_id].get(material_id, 0.0):
+                lessons[user_id][material_id] = weight
+    return lessons
+
+
+def learner_categories():
+    """{user id: {category id}} from entitlements and submitted work"""
+    categories = defaultdict(set)
+    for user_id, category_id in UserSkillAccess.objects.values_list('user_id', 'category_id').iterator():
+        categories[user_id].add(category_id)
+    for user_id, category_id in (
+        WorkSubmission.objects.exclude(category=None).values_list('user_id', 'category_id').distinct().iterator()
+    ):
+        categories[user_id].add(category_id)
+    return categories
+
+
+def cosine(rows):
+    """Cosine similarity between the columns of a sparse matrix given as {row: {column: weight}}.
+
+    Returns {column: {other column: similarity}}, with only the pairs that
+    share a row.
+    """
+    dots = defaultdict(lambda: defaultdict(float))
+    norms = defaultdict(float)
+    for row in rows.values():
+        items = list(row.items())
+        for i, (a, weight_a) in enumerate(items):
+            norms[a] += weight_a * weight_a
+            for b, weight_b in items[i + 1:]:
+                dots[a][b] += weight_a * weight_b
+                dots[b][a] += weight_a * weight_b
+    return {
+        a: {b: dot / math.sqrt(norms[a] * norms[b]) for b, dot in others.items()}
+        for a, others in dots.items()
+    }
+
+
+def _strongest(row, limit):
+    if len(row) <= limit:
+        return row
+    return dict(sorted(row.items(), key=lambda item: -item[1])[:limit])
+
+
+def neighbours(lessons, categories, k):
+    """{material id: [(neighbour id, score), ...]} best first, at most ``k`` each.
+
+    ``lessons`` maps learner to {material: weight}, ``categories`` learner to
+    a set of category ids.
+    """
+    catalogue = list(LearningMaterial.objects.order_by('category_id', 'order', 'id').values_list('id', 'category_id'))
+    category_of = dict(catalogue)
+    in_category = defaultdict(list)
+    for material_id, category_id in catalogue:
+        in_category[category_id].append(material_id)
+
+    lesson_sim = cosine({
+        user_id: _strongest({m: w for m, w in row.items() if m in category_of}, MAX_LESSONS_PER_LEARNER)
+        for user_id, row in lessons.items()
+    })
+    category_sim = cosine({user_id: dict.fromkeys(row, 1.0) for user_id, row in categories.items()})
+    related = {
+        category_id: [c for c, _ in sorted(category_sim.get(category_id, {}).items(), key=lambda item: -item[1])
+                      [:RELATED_CATEGORIES]]
+        for category_id in in_category
+    }
+    position = {material_id: n for n, (material_id, _) in enumerate(catalogue)}
+
+    result = {}
+    for material_id, category_id in catalogue:
+        co_viewed = lesson_sim.get(material_id, {})
+        affinity = {**category_sim.get(category_id, {}), category_id: 1.0}
+        candidates = set(co_viewed)
+        for other_category in [category_id, *related[category_id]]:
+            candidates.update(in_category[other_category])
+        candidates.discard(material_id)
+        scores = {
+            other: co_viewed.get(other, 0.0) + CATEGORY_WEIGHT * affinity.get(category_of[other], 0.0)
+            for other in candidates
+        }
+        here = position[material_id]
+        # Ties go to the lessons that follow this one in its category, then to catalogue order
+        ranked = sorted(scores, key=lambda other: (
+            -scores[other], not (category_of[other] == category_id and position[other] > here), position[other],
+        ))
+        result[material_id] = [(other, scores[other]) for other in ranked[:k]]
+    return result
+
+
+def build(k=None):
+    """Recompute and store every lesson's neighbours; returns the number of rows written"""
+    k = k or settings.RECOMMENDATION_NEIGHBOURS
+    ranked = neighbours(learner_lessons(), learner_categories(), k)
+    rows = [
+        MaterialNeighbour(material_id=material_id, neighbour_id=other, rank=rank, score=score)
+        for material_id, others in ranked.items()
+        for rank, (other, score) in enumerate(others, start=1)
+    ]
+    with transaction.atomic():
+        MaterialNeighbour.objects.all().delete()
+        MaterialNeighbour.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def unlocked_by(user, prefix=''):
+    """Filter for lessons (at ``prefix``) that ``user``'s tier in their category unlocks"""
+    access = UserSkillAccess.objects.filter(user=user, category_id=OuterRef(f'{prefix}category_id'))
+    return Q(**{f'{prefix}access_level': 'basic'}) | Q(Exists(
+        access.filter(Q(access_level='premium') | Q(access_level=OuterRef(f'{prefix}access_level')))
+    ))
+
+
+async def arelated_materials(user, material, limit=3):
+    """Up to ``limit`` lessons to suggest after ``material`` that ``user`` can open.
+
+    The stored neighbours, closest first; before the first build, or when
+    the viewer's tier hides them all, the next lessons in the category.
+    """
+    related = [
+        row.neighbour async for row in MaterialNeighbour.objects.filter(
+            unlocked_by(user, prefix='neighbour__'), material=material,
+        ).select_related('neighbour__category').order_by('rank')[:limit]
+    ]
+    if not related:
+        related = [
+            other async for other in LearningMaterial.objects.filter(
+                unlocked_by(user), category_id=material.category_id,
+            ).exclude(pk=material.pk).select_related('category').order_by('order')[:limit]
+        ]
+    return related
@@ -0,0 +1,15 @@
+from django.shortcuts import render
+
+from users.roles import aget_roles
+
+
+async def arender(request, template_name, context=None):
+    """Render a template from an async view.
+
+    Templates read ``user`` and ``roles`` through context processors. Both
+    could run synchronous queries mid-render, so they are resolved here
+    first. All querysets in ``context`` must already be evaluated.
+    """
+    request.user = await request.auser()
+    await aget_roles(request)
+    return render(request, template_name, context)
@@ -0,0 +1,259 @@
+"""
+Review turnaround: how long learners wait for their first feedback.
+
+Each wait (MentorFeedback.created_at minus WorkSubmission.submitted_at) is
+added, when the feedback is first saved, to up to three ReviewSketch rows:
+all work, the submission's category and the reviewing mentor
+(``review_saved``, connected in MaterialsConfig.ready). Editing feedback
+later does not count again.
+
+A sketch is a log-bucketed histogram in the style of DDSketch: bucket ``i``
+holds waits in (GAMMA^(i-1), GAMMA^i] seconds. Any quantile read back is
+within RELATIVE_ACCURACY of the true wait, a few hundred buckets cover a
+second to a year, and two sketches merge by adding their counts. Reads (the
+mentor dashboard and /metrics) load the stored sketches and never look at
+submissions.
+
+A sketch row is updated read-modify-write. The first statement is an UPDATE
+of its counters, which takes SQLite's write lock (or the row lock elsewhere)
+before the buckets are read, so concurrent reviews apply one after another.
+
+When duplicate categories are merged, ``merge_keys()`` folds their category
+sketches into the survivor's, in the merge's transaction.
+
+``rebuild()`` (``rebuild_review_sla``) recomputes every sketch from history
+in keyset batches, for reviews that predate the sketches or after feedback
+is deleted.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from users.exports import iter_batches
+from .models import MentorFeedback, ReviewSketch, SkillCategory
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC = 'tujiimarishe_review_wait_seconds'
+
+
+class Sketch:
+    """Mergeable histogram of waits in seconds, stored as {bucket index: count}"""
+
+    def __init__(self, buckets=None, count=0, total=0.0):
+        self.buckets = {int(index): n for index, n in (buckets or {}).items()}
+        self.count = count
+        self.total = total
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.buckets, row.count, row.total)
+
+    @staticmethod
+    def bucket(seconds):
+        # Waits under a second share bucket 0
+        return math.ceil(math.log(max(seconds, 1.0)) / LOG_GAMMA)
+
+    def add(self, seconds):
+        index = self.bucket(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q):
+        """The wait in seconds at quantile ``q`` (0 to 1), or None if nothing was added"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # The point of the bucket within RELATIVE_ACCURACY of both its ends
+                return 2 * GAMMA ** index / (GAMMA + 1)
+
+    def as_json(self):
+        return {str(index): n for index, n in self.buckets.items()}
+
+
+def wait(submitted_at, reviewed_at):
+    return max((reviewed_at - submitted_at).total_seconds(), 0.0)
+
+
+def scopes(category_id, mentor_id):
+    """The (scope, key) of every sketch one review counts towards"""
+    keys = [('all', 0), ('mentor', mentor_id)]
+    if category_id:
+        keys.append(('category', category_id))
+    return keys
+
+
+def add(scope, key, seconds):
+    """Count one wait in the stored sketch for (``scope``, ``key``)"""
+    sketch = ReviewSketch.objects.filter(scope=scope, key=key)
+    with transaction.atomic():
+        if not sketch.update(count=F('count') + 1, total=F('total') + seconds):
+            new = Sketch()
+            new.add(seconds)
+            try:
+                with transaction.atomic():
+                    ReviewSketch.objects.create(scope=scope, key=key, count=1, total=seconds, buckets=new.as_json())
+                return
+            except IntegrityError:
+                # Another review created it first
+                sketch.update(count=F('count') + 1, total=F('total') + seconds)
+        buckets = sketch.values_list('buckets', flat=True).get()
+        index = str(Sketch.bucket(seconds))
+        buckets[index] = buckets.get(index, 0) + 1
+        sketch.update(buckets=buckets)
+
+
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for MentorFeedback: count the learner's wait for a first review"""
+    if raw or not created:
+        return
+    submission = instance.submission
+    seconds = wait(submission.submitted_at, instance.created_at)
+    for scope, key in scopes(submission.category_id, instance.mentor_id):
+        add(scope, key, seconds)
+
+
+def merge_keys(scope, key, merged_keys):
+    """Fold the sketches of ``merged_keys`` into the one for (``scope``, ``key``) and delete them"""
+    rows = list(ReviewSketch.objects.select_for_update().filter(scope=scope, key__in=[key, *merged_keys]))
+    if not any(row.key != key for row in rows):
+        return
+    sketch = Sketch()
+    for row in rows:
+        sketch.merge(Sketch.from_row(row))
+    ReviewSketch.objects.filter(scope=scope, key__in=merged_keys).delete()
+    ReviewSketch.objects.update_or_create(scope=scope, key=key, defaults={
+        'count': sketch.count, 'total': sketch.total, 'buckets': sketch.as_json(),
+    })
+
+
+def rebuild():
+    """Recompute every sketch from the stored feedback; returns the number of reviews counted"""
+    sketches = defaultdict(Sketch)
+    counted = 0
+    columns = [
+        ('Category', 'submission__category_id'), ('Mentor', 'mentor_id'),
+        ('Submitted', 'submission__submitted_at'), ('Reviewed', 'created_at'),
+    ]
+    for rows in iter_batches(MentorFeedback.objects.all(), columns):
+        for category_id, mentor_id, submitted_at, reviewed_at in rows:
+            seconds = wait(submitted_at, reviewed_at)
+            for key in scopes(category_id, mentor_id):
+                sketches[key].add(seconds)
+            counted += 1
+    with transaction.atomic():
+        ReviewSketch.objects.all().delete()
+        ReviewSketch.objects.bulk_create([
+            ReviewSketch(scope=scope, key=key, count=s.count, total=s.total, buckets=s.as_json())
+            for (scope, key), s in sketches.items()
+        ])
+    return counted
+
+
+def humanize(seconds):
+    if seconds is None:
+        return '—'
+    minutes = round(seconds / 60)
+    if minutes < 1:
+        return f'{round(seconds)}s'
+    if minutes < 60:
+        return f'{minutes}m'
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f'{hours}h {minutes}m'
+    days, hours = divmod(hours, 24)
+    return f'{days}d {hours}h'
+
+
+@dataclass
+class Turnaround:
+    """A sketch with its label, as shown on the mentor dashboard"""
+    label: str
+    sketch: Sketch
+
+    @property
+    def p50(self):
+        return humanize(self.sketch.quantile(0.5))
+
+    @property
+    def p90(self):
+        return humanize(self.sketch.quantile(0.9))
+
+    @property
+    def p99(self):
+        return humanize(self.sketch.quantile(0.99))
+
+
+def dashboard(user):
+    """{'overall', 'mine', 'categories'} Turnarounds for the mentor dashboard, from the stored sketches"""
+    rows = ReviewSketch.objects.filter(Q(scope__in=['all', 'category']) | Q(scope='mentor', key=user.pk))
+    sketches = {(row.scope, row.key): Sketch.from_row(row) for row in rows}
+    names = dict(SkillCategory.objects.filter(
+        pk__in=[key for scope, key in sketches if scope == 'category'],
+    ).values_list('pk', 'name'))
+    return {
+        'overall': Turnaround('All submissions', sketches.get(('all', 0), Sketch())),
+        'mine': Turnaround('Your reviews', sketches[('mentor', user.pk)]) if ('mentor', user.pk) in sketches else None,
+        'categories': sorted(
+            (Turnaround(names[key], sketch) for (scope, key), sketch in sketches.items()
+             if scope == 'category' and key in names),
+            key=lambda turnaround: turnaround.label,
+        ),
+    }
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + '}'
+    return f'{name} {value:g}' if isinstance(value, int) else f'{name} {value:.3f}'
+
+
+def metrics_text():
+    """Every sketch as a Prometheus summary, in the text exposition format"""
+    rows = list(ReviewSketch.objects.order_by('scope', 'key'))
+    categories = dict(SkillCategory.objects.filter(
+        pk__in=[row.key for row in rows if row.scope == 'category'],
+    ).values_list('pk', 'name'))
+    mentors = dict(get_user_model().objects.filter(
+        pk__in=[row.key for row in rows if row.scope == 'mentor'],
+    ).values_list('pk', 'username'))
+    lines = [
+        f'# HELP {METRIC} Time from a work submission to its first mentor feedback.',
+        f'# TYPE {METRIC} summary',
+    ]
+    for row in rows:
+        if not row.count:
+            continue
+        if row.scope == 'category':
+            labels = {'category': categories.get(row.key, row.key)}
+        elif row.scope == 'mentor':
+            labels = {'mentor': mentors.get(row.key, row.key)}
+        else:
+            labels = {}
+        sketch = Sketch.from_row(row)
+        for q in QUANTILES:
+            lines.append(_sample(METRIC, {**labels, 'quantile': q}, sketch.quantile(q)))
+        lines.append(_sample(f'{METRIC}_sum', labels, sketch.total))
+        lines.append(_sample(f'{METRIC}_count', labels, sketch.count))
+    return '\n'.join(lines) + '\n'
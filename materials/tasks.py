@@ -0,0 +1,84 @@
+"""
+Background tasks for the materials app, run by ``python manage.py run_workers``.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from taskqueue.registry import task
+from . import analytics, assignment, notifications, packs, recommendations
+from .models import Payment, UserSkillAccess, WorkSubmission
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def notify_mentors_of_submission(submission_id):
+    """Assign new work to a mentor and email them, or every mentor if nobody is available"""
+    submission = WorkSubmission.objects.select_related('user', 'category').get(pk=submission_id)
+    assignment.assign(submission)
+    notifications.submission_received(submission)
+
+
+@task()
+def rebalance_reviews(offline=()):
+    """Take mentors offline and hand their open reviews, and any unassigned work, to available mentors"""
+    with transaction.atomic():
+        for mentor_id, submission_ids in assignment.rebalance(offline).items():
+            notifications.reviews_handed_over(mentor_id, len(submission_ids))
+
+
+@task(max_attempts=8)
+def verify_payment(payment_id):
+    """Re-check an M-Pesa payment off the request path.
+
+    The checkout simulation accepts any well-formed code. Until the Daraja
+    API is wired in, flag codes an earlier payment already used and take
+    back the access checkout granted for them; a payment that passes gets
+    its receipt.
+    """
+    payment = Payment.objects.select_related('user', 'category').get(pk=payment_id)
+    if not payment.is_verified:
+        return
+    # Only earlier payments count, or the first use of a code is flagged along with its copies
+    reused = Payment.objects.filter(mpesa_code=payment.mpesa_code, pk__lt=payment.pk).exists()
+    if reused:
+        with transaction.atomic():
+            Payment.objects.filter(pk=payment.pk).update(is_verified=False)
+            revoke_access(payment)
+        logger.warning('Payment %s uses an M-Pesa code that was already used; marked unverified', payment.pk)
+        # The day may already be rolled up
+        analytics.refresh_days([timezone.localdate(payment.created_at)])
+    else:
+        notifications.payment_verified(payment)
+
+
+def revoke_access(payment):
+    """Lower the access ``payment`` bought to the best the learner's other verified payments cover"""
+    ranks = [level for level, _ in UserSkillAccess.ACCESS_LEVEL]
+    paid = Payment.objects.filter(
+        user_id=payment.user_id, category_id=payment.category_id, is_verified=True,
+    ).exclude(pk=payment.pk).values_list('access_level', flat=True)
+    level = max(paid, key=ranks.index, default='basic')
+    if ranks.index(level) >= ranks.index(payment.access_level):
+        return
+    access = UserSkillAccess.objects.filter(
+        user_id=payment.user_id, category_id=payment.category_id, access_level=payment.access_level,
+    ).first()
+    if access:
+        # Saved rather than updated, so the catalogue change log reaches the learner's devices
+        access.access_level = level
+        access.save(update_fields=['access_level'])
+
+
+@task()
+def build_course_pack(category_id, tier):
+    """Store the shared offline pack for a category and tier"""
+    packs.build_pack(category_id, tier)
+
+
+@task(queue='cpu')
+def build_recommendations():
+    """Recompute every lesson's "learners also took" neighbours"""
+    recommendations.build()
@@ -0,0 +1,131 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import MentorFeedback, Payment, SkillCategory, UserSkillAccess, WorkSubmission
+from .testing import QueryCountMixin
+
+User = get_user_model()
+
+TEMP_MEDIA = tempfile.mkdtemp()
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class LargeTableAdminTests(QueryCountMixin, TestCase):
+    """Test the admin changelists for payments, entitlements, submissions and feedback"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        self.client.force_login(self.admin)
+
+    def seed_payments(self, n):
+        for i in range(n):
+            user = User.objects.create_user(username=f'payer{i}')
+            category = SkillCategory.objects.create(name=f'Skill {i}', slug=f'skill-{i}')
+            Payment.objects.create(
+                user=user, category=category, access_level='enterprise', amount=Decimal('100.00'),
+                mpesa_code=f'QA{i:08d}', phone_number=f'07{i:08d}', is_verified=True,
+            )
+            UserSkillAccess.objects.create(user=user, category=category, access_level='enterprise')
+            submission = WorkSubmission(user=user, category=category, title=f'Work {i}', description='d')
+            submission.file.save(f'work{i}.txt', ContentFile(b'work'), save=False)
+            submission.save()
+            MentorFeedback.objects.create(submission=submission, mentor=self.admin, feedback='ok', rating='good')
+
+    def test_changelists_join_related_rows(self):
+        """Test no changelist runs a query per row"""
+        for model in ('payment', 'userskillaccess', 'worksubmission', 'mentorfeedback'):
+            with self.subTest(model=model):
+                self.assertConstantQueries(reverse(f'admin:materials_{model}_changelist'), self.seed_payments)
+
+    def test_unfiltered_changelist_does_not_count(self):
+        """Test the unfiltered payment list estimates its size instead of COUNT(*)"""
+        self.seed_payments(3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:materials_payment_changelist'))
+        counts = [q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql'] and 'materials_payment' in q['sql']]
+        self.assertEqual(counts, [])
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    @override_settings(ADMIN_COUNT_LIMIT=2)
+    def test_filtered_count_is_capped(self):
+        """Test a filtered list stops counting at ADMIN_COUNT_LIMIT"""
+        self.seed_payments(3)
+        response = self.client.get(reverse('admin:materials_payment_changelist'), {'is_verified__exact': '1'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_search_by_prefix(self):
+        """Test payments are found by code, phone or payer username prefix"""
+        self.seed_payments(12)
+        url = reverse('admin:materials_payment_changelist')
+        for term, expected in [('qa00000011', ['QA00000011']), ('payer1', ['QA00000001', 'QA00000010', 'QA00000011']),
+                               ('0700000002', ['QA00000002'])]:
+            with self.subTest(term=term):
+                response = self.client.get(url, {'q': term})
+                codes = sorted(payment.mpesa_code for payment in response.context['cl'].result_list)
+                self.assertEqual(codes, expected)
+
+    def test_search_uses_indexes(self):
+        """Test a payment search is answered from indexes, not a table scan"""
+        model_admin = admin.site._registry[Payment]
+        queryset, _ = model_admin.get_search_results(None, Payment.objects.all(), 'QA0001')
+        plan = query_plan(queryset)
+        self.assertNotIn('SCAN materials_payment', plan)
+        self.assertNotIn('SCAN users_user', plan)
+        self.assertIn('payment_mpesa_code_ci_idx', plan)
+
+    def test_change_form_uses_autocomplete(self):
+        """Test the payment form does not render every user as an option"""
+        self.seed_payments(3)
+        payment = Payment.objects.get(mpesa_code='QA00000000')
+        response = self.client.get(reverse('admin:materials_payment_change', args=[payment.pk]))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'payer0 (Student)')
+        self.assertNotContains(response, 'payer2 (Student)')
+
+    def test_export_filtered_payments(self):
+        """Test the export action streams the payments matched by the changelist filter"""
+        self.seed_payments(3)
+        Payment.objects.filter(mpesa_code='QA00000001').update(is_verified=False)
+        response = self.client.post(reverse('admin:materials_payment_changelist') + '?is_verified__exact=1', {
+            'action': 'export_csv', 'select_across': '1', '_selected_action': ['0'], 'index': '0',
+        })
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual([(row[2], row[4], row[7]) for row in rows[1:]], [
+            ('payer0', 'Skill 0', 'QA00000000'), ('payer2', 'Skill 2', 'QA00000002'),
+        ])
+
+    def test_export_data_command(self):
+        """Test export_data writes an XLSX workbook of submissions"""
+        self.seed_payments(2)
+        output = os.path.join(TEMP_MEDIA, 'submissions.xlsx')
+        call_command('export_data', 'submissions', '--format', 'xlsx', '--output', output, stdout=io.StringIO())
+        with zipfile.ZipFile(output) as archive:
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('SHA-256', sheet)
+        self.assertIn('Work 1', sheet)
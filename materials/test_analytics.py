@@ -0,0 +1,133 @@
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, tasks
+from .models import Payment, RevenueRollup, RollupWatermark, SkillCategory
+
+User = get_user_model()
+
+
+class RevenueRollupTests(TestCase):
+    """Test the daily revenue and enrolment rollups"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123!')
+        self.bob = User.objects.create_user(username='bob', password='testpass123!')
+        self.category = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        self.day1 = timezone.localdate() - timedelta(days=2)
+        self.day2 = self.day1 + timedelta(days=1)
+
+    def pay(self, user, level, day, code=None, hour=12):
+        payment = Payment.objects.create(
+            user=user, category=self.category, access_level=level,
+            amount={'enterprise': 100, 'premium': 200}[level],
+            mpesa_code=code or f'{user.username}{level}{day:%d}'.upper(), phone_number='0712345678',
+            is_verified=True,
+        )
+        created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour))
+        Payment.objects.filter(pk=payment.pk).update(created_at=created_at)
+        return payment
+
+    def rollups(self):
+        return {
+            (row.day, row.access_level): (row.payments, row.revenue, row.new_entitlements, row.upgrades)
+            for row in RevenueRollup.objects.all()
+        }
+
+    def test_rollup_counts_new_entitlements_and_upgrades(self):
+        """Test a premium payment on top of enterprise counts as an upgrade, not a new entitlement"""
+        self.pay(self.alice, 'enterprise', self.day1)
+        self.pay(self.bob, 'premium', self.day1)
+        self.pay(self.alice, 'premium', self.day2)
+        analytics.refresh()
+
+        self.assertEqual(self.rollups(), {
+            (self.day1, 'enterprise'): (1, Decimal('100'), 1, 0),
+            (self.day1, 'premium'): (1, Decimal('200'), 1, 0),
+            (self.day2, 'premium'): (1, Decimal('200'), 0, 1),
+        })
+
+    def test_refresh_is_incremental(self):
+        """Test only days with payments past the high-water mark are recomputed"""
+        self.pay(self.alice, 'enterprise', self.day1)
+        self.assertEqual(analytics.refresh(), 1)
+        day1_row = RevenueRollup.objects.get(day=self.day1)
+
+        payment = self.pay(self.bob, 'premium', self.day2)
+        self.assertEqual(analytics.refresh(), 1)
+        self.assertEqual(RevenueRollup.objects.get(day=self.day1).pk, day1_row.pk)
+        self.assertEqual(RollupWatermark.objects.get(name=analytics.PAYMENTS_MARK).value, payment.pk)
+        self.assertEqual(analytics.refresh(), 0)
+
+    def test_revoked_payment_leaves_rollup(self):
+        """Test verify_payment re-rolls a day whose payment it marks unverified"""
+        self.pay(self.alice, 'enterprise', self.day1, code='QWE1234567')
+        analytics.refresh()
+        duplicate = self.pay(self.bob, 'enterprise', self.day1, code='QWE1234567', hour=13)
+        analytics.refresh()
+        self.assertEqual(self.rollups()[self.day1, 'enterprise'][0], 2)
+
+        with self.assertLogs('materials.tasks', 'WARNING'):
+            tasks.verify_payment(duplicate.pk)
+        self.assertEqual(self.rollups()[self.day1, 'enterprise'], (1, Decimal('100'), 1, 0))
+
+    def test_edited_payment_rerolls_its_day(self):
+        """Test a payment verified or re-priced after its day was rolled up is counted again"""
+        payment = self.pay(self.alice, 'enterprise', self.day1)
+        Payment.objects.filter(pk=payment.pk).update(is_verified=False)
+        analytics.refresh()
+        self.assertEqual(self.rollups(), {})
+
+        payment.refresh_from_db()
+        payment.is_verified = True
+        payment.save()
+        self.assertEqual(self.rollups(), {(self.day1, 'enterprise'): (1, Decimal('100'), 1, 0)})
+
+        payment.amount = Decimal('150')
+        payment.save()
+        self.assertEqual(self.rollups(), {(self.day1, 'enterprise'): (1, Decimal('150'), 1, 0)})
+
+        payment.delete()
+        self.assertEqual(self.rollups(), {})
+
+    def test_rebuild_matches_incremental(self):
+        """Test refresh_analytics --rebuild recomputes the same rows"""
+        self.pay(self.alice, 'enterprise', self.day1)
+        analytics.refresh()
+        self.pay(self.alice, 'premium', self.day2)
+        self.pay(self.bob, 'enterprise', self.day2)
+        analytics.refresh()
+        incremental = self.rollups()
+
+        RevenueRollup.objects.all().delete()
+        call_command('refresh_analytics', '--rebuild', stdout=io.StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_dashboard(self):
+        """Test the admin dashboard charts the rollups, which only a POST refreshes"""
+        admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        self.pay(self.alice, 'enterprise', self.day1)
+        self.pay(self.alice, 'premium', self.day2)
+        self.client.force_login(admin)
+        url = reverse('admin:materials_revenuerollup_changelist')
+
+        self.client.get(url, {'period': '30'})
+        self.assertFalse(RevenueRollup.objects.exists())
+        refresh = reverse('admin:materials_revenuerollup_refresh')
+        self.assertEqual(self.client.get(refresh).status_code, 405)
+        response = self.client.post(refresh, {'next': f'{url}?period=30'})
+        self.assertRedirects(response, f'{url}?period=30')
+
+        response = self.client.get(url, {'period': '30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, refresh)
+        self.assertContains(response, 'KSh 300.00')
+        self.assertEqual([day['day'] for day in response.context['daily']], [self.day1, self.day2])
+        self.assertEqual(response.context['totals']['upgrades'], 1)
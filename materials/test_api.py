@@ -0,0 +1,104 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import LearningMaterial, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+
+class CatalogueApiTests(TestCase):
+    """Test the catalogue JSON API used by the mobile client"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        self.marketing = SkillCategory.objects.create(
+            name='Digital Marketing', slug='digital-marketing', icon='fa-bullhorn', description='Marketing'
+        )
+        for category in (self.design, self.marketing):
+            for i in range(3):
+                LearningMaterial.objects.create(
+                    category=category, title=f'{category.slug} {i}', description='d',
+                    material_type='video', youtube_url='https://youtu.be/x', access_level='basic', order=i,
+                )
+
+    def get_json(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(response.content)
+
+    def test_cursor_pagination_walks_every_material_once(self):
+        """Test following next cursors returns each material in order"""
+        seen, url = [], reverse('materials:api_materials') + '?limit=2'
+        while url:
+            _, data = self.get_json(url)
+            seen += [item['id'] for item in data['items']]
+            url = data['next'] and reverse('materials:api_materials') + f'?limit=2&cursor={data["next"]}'
+        expected = list(LearningMaterial.objects.order_by('category_id', 'order', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_field_selection(self):
+        """Test ?fields= limits the keys returned"""
+        _, data = self.get_json(reverse('materials:api_materials') + '?fields=id,title')
+        self.assertEqual(set(data['items'][0]), {'id', 'title'})
+        response = self.client.get(reverse('materials:api_materials') + '?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_video_links_not_exposed(self):
+        """Test the public catalogue cannot be asked for lesson video links"""
+        for field in ('youtube_url', 'youtube_id'):
+            response = self.client.get(reverse('materials:api_materials') + f'?fields=id,{field}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_etag_revalidation_skips_queries(self):
+        """Test an unchanged catalogue answers If-None-Match with a bare 304"""
+        url = reverse('materials:api_categories')
+        response, _ = self.get_json(url)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_catalogue_change_invalidates_etag(self):
+        """Test saving a material changes every catalogue ETag"""
+        url = reverse('materials:api_materials')
+        etag = self.client.get(url)['ETag']
+        material = LearningMaterial.objects.first()
+        material.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            material.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_has_its_own_etag(self):
+        """Test gzipped bodies decode to the same JSON under a different strong ETag"""
+        url = reverse('materials:api_categories')
+        plain, data = self.get_json(url)
+        zipped = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(zipped.content)), data)
+        self.assertNotEqual(zipped['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', zipped['Vary'])
+
+    def test_access_requires_login_and_lists_tiers(self):
+        """Test the caller's tiers come from UserSkillAccess"""
+        self.assertEqual(self.client.get(reverse('materials:api_access')).status_code, 401)
+
+        user = User.objects.create_user(username='learner', password='testpass123!')
+        UserSkillAccess.objects.create(user=user, category=self.design, access_level='premium')
+        self.client.force_login(user)
+        _, data = self.get_json(reverse('materials:api_access'))
+        self.assertEqual(data, {'default': 'basic', 'tiers': {str(self.design.id): 'premium'}})
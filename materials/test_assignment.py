@@ -0,0 +1,231 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from taskqueue.models import OutboxEmail, Task
+from . import assignment, tasks
+from .models import MentorFeedback, MentorProfile, SkillCategory, WorkSubmission
+
+User = get_user_model()
+
+
+@override_settings(MENTOR_DEFAULT_TURNAROUND=48)
+class AssignmentTests(TestCase):
+    """Test new work goes to the mentor who should review it soonest"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        self.marketing = SkillCategory.objects.create(name='Digital Marketing', slug='digital-marketing')
+        self.learner = User.objects.create_user(username='learner', email='l@example.com')
+        self.designer = self.mentor('designer', self.design)
+        self.marketer = self.mentor('marketer', self.marketing)
+
+    def mentor(self, username, *categories):
+        user = User.objects.create_user(username=username, email=f'{username}@example.com', user_type='mentor')
+        assignment.profile_for(user).categories.set(categories)
+        return user
+
+    def submit(self, category, user=None):
+        submission = WorkSubmission.objects.create(
+            user=user or self.learner, category=category, title='Poster', description='d',
+            file='work_submissions/p.png',
+        )
+        assignment.assign(submission)
+        return submission
+
+    def profile(self, user):
+        return MentorProfile.objects.get(pk=user.pk)
+
+    def test_specialist_is_preferred(self):
+        """Test work goes to a mentor who covers its category, and their load grows"""
+        submission = self.submit(self.design)
+        self.assertEqual(submission.assigned_to_id, self.designer.pk)
+        profile = self.profile(self.designer)
+        self.assertEqual((profile.open_reviews, profile.load), (1, 96))
+
+    def test_least_loaded_specialist(self):
+        """Test work is spread across the mentors of a category"""
+        second = self.mentor('illustrator', self.design)
+        assigned = [self.submit(self.design).assigned_to_id for _ in range(4)]
+        self.assertEqual(sorted(assigned), sorted([self.designer.pk, second.pk] * 2))
+
+    def test_off_topic_only_when_specialists_are_swamped(self):
+        """Test a mentor outside the category is chosen once the specialist's wait is over the penalty"""
+        assigned = [self.submit(self.design).assigned_to_id for _ in range(4)]
+        self.assertEqual(assigned, [self.designer.pk] * 3 + [self.marketer.pk])
+
+    def test_uncategorised_and_own_work(self):
+        """Test work with no category goes to the least loaded mentor, never its author"""
+        self.submit(self.design)
+        self.assertEqual(self.submit(None).assigned_to_id, self.marketer.pk)
+        self.assertEqual(self.submit(self.marketing, user=self.marketer).assigned_to_id, self.designer.pk)
+
+    def test_offline_mentor_gets_nothing(self):
+        """Test an unavailable mentor is skipped, and with nobody available work stays unassigned"""
+        MentorProfile.objects.filter(pk=self.designer.pk).update(is_available=False)
+        self.assertEqual(self.submit(self.design).assigned_to_id, self.marketer.pk)
+        MentorProfile.objects.update(is_available=False)
+        self.assertIsNone(self.submit(self.design).assigned_to_id)
+
+    def test_only_active_reviewers_get_work(self):
+        """Test a demoted or deactivated mentor is skipped, a mentors-group member or staff is not"""
+        User.objects.filter(pk=self.designer.pk).update(user_type='student')
+        self.assertEqual(self.submit(self.design).assigned_to_id, self.marketer.pk)
+        self.designer.groups.add(Group.objects.create(name='mentors'))
+        self.assertEqual(self.submit(self.design).assigned_to_id, self.designer.pk)
+        User.objects.filter(pk=self.designer.pk).update(is_active=False)
+        User.objects.filter(pk=self.marketer.pk).update(user_type='student', is_staff=True)
+        self.assertEqual(self.submit(self.design).assigned_to_id, self.marketer.pk)
+
+    def test_review_closes_assignment(self):
+        """Test feedback frees the assigned mentor and feeds the reviewer's turnaround"""
+        submission = self.submit(self.design)
+        WorkSubmission.objects.filter(pk=submission.pk).update(assigned_at=timezone.now() - timedelta(hours=10))
+        submission.refresh_from_db()
+        MentorFeedback.objects.create(submission=submission, mentor=self.designer, feedback='Nice', rating='good')
+
+        profile = self.profile(self.designer)
+        self.assertEqual((profile.open_reviews, profile.reviews_done), (0, 1))
+        self.assertAlmostEqual(profile.turnaround, 10, places=2)
+        self.assertAlmostEqual(profile.load, 10, places=2)
+
+    def test_notifies_assigned_mentor(self):
+        """Test only the assigned mentor is emailed about new work"""
+        submission = WorkSubmission.objects.create(
+            user=self.learner, category=self.marketing, title='Ad', description='d', file='work_submissions/a.png',
+        )
+        tasks.notify_mentors_of_submission(submission.pk)
+        self.assertEqual(list(OutboxEmail.objects.values_list('to', flat=True)), ['marketer@example.com'])
+
+
+@override_settings(MENTOR_DEFAULT_TURNAROUND=48)
+class RebalanceTests(TestCase):
+    """Test handing work on when mentors go offline"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        self.learner = User.objects.create_user(username='learner')
+        self.mentors = []
+        for name in ('ann', 'ben', 'cat'):
+            user = User.objects.create_user(username=name, email=f'{name}@example.com', user_type='mentor')
+            assignment.profile_for(user).categories.add(self.design)
+            self.mentors.append(user)
+
+    def submit(self, n, category=None):
+        return [
+            WorkSubmission.objects.create(
+                user=self.learner, category=category or self.design, title=f'Work {i}', description='d',
+                file=f'work_submissions/w{i}.png',
+            )
+            for i in range(n)
+        ]
+
+    def test_offline_mentor_work_is_spread(self):
+        """Test the command takes a mentor offline and spreads their open reviews over the others"""
+        ann, ben, cat = self.mentors
+        work = self.submit(4)
+        WorkSubmission.objects.filter(pk__in=[w.pk for w in work]).update(assigned_to=ann)
+
+        out = io.StringIO()
+        call_command('rebalance_reviews', '--offline', 'ann', stdout=out)
+
+        self.assertIn('Assigned 4 submission(s) to 2 mentor(s)', out.getvalue())
+        held = dict(MentorProfile.objects.values_list('mentor__username', 'open_reviews'))
+        self.assertEqual(held, {'ann': 0, 'ben': 2, 'cat': 2})
+        self.assertFalse(MentorProfile.objects.get(pk=ann.pk).is_available)
+        self.assertEqual(sorted(OutboxEmail.objects.values_list('to', flat=True)), ['ben@example.com', 'cat@example.com'])
+
+    def test_unassigned_backlog_is_handed_out(self):
+        """Test work that arrived while nobody was available is assigned"""
+        self.submit(3)
+        handed = assignment.rebalance()
+        self.assertEqual(sorted(len(pks) for pks in handed.values()), [1, 1, 1])
+        self.assertFalse(WorkSubmission.objects.filter(assigned_to=None).exists())
+
+    def test_demoted_mentor_work_is_handed_on(self):
+        """Test rebalancing takes work back from a mentor who lost the role while available"""
+        ann, ben, cat = self.mentors
+        work = self.submit(2)
+        WorkSubmission.objects.filter(pk__in=[w.pk for w in work]).update(assigned_to=ann)
+        User.objects.filter(pk=ann.pk).update(user_type='student')
+
+        handed = assignment.rebalance()
+
+        self.assertEqual(sorted(handed), [ben.pk, cat.pk])
+        self.assertFalse(WorkSubmission.objects.filter(assigned_to=ann).exists())
+
+    def test_nobody_available(self):
+        """Test work held by an offline mentor is released when nobody can take it"""
+        work = self.submit(2)
+        WorkSubmission.objects.filter(pk__in=[w.pk for w in work]).update(assigned_to=self.mentors[0])
+        assignment.rebalance([m.pk for m in self.mentors])
+        self.assertEqual(WorkSubmission.objects.filter(assigned_to=None).count(), 2)
+        self.assertEqual(MentorProfile.objects.filter(open_reviews=0).count(), 3)
+
+    def test_balancer_agrees_with_assign(self):
+        """Test the bulk heaps choose the same mentors as one-at-a-time assignment"""
+        other = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        MentorProfile.objects.filter(pk=self.mentors[2].pk).update(turnaround=12)
+        assignment.profile_for(self.mentors[2]).categories.set([other])
+        assignment.recount()
+        rng = random.Random(7)
+        work = [self.submit(1, rng.choice([self.design, other]))[0] for _ in range(12)]
+
+        bulk = {pk: mentor_id for mentor_id, pks in assignment.rebalance().items() for pk in pks}
+        WorkSubmission.objects.update(assigned_to=None, assigned_at=None)
+        assignment.recount()
+        one_at_a_time = {}
+        for submission in sorted(work, key=lambda w: w.submitted_at):
+            submission.refresh_from_db()
+            one_at_a_time[submission.pk] = assignment.assign(submission)
+        self.assertEqual(bulk, one_at_a_time)
+
+
+class MentorPagesTests(TestCase):
+    """Test the dashboard queue and the preferences page"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        self.mentor = User.objects.create_user(username='mentor', password='testpass123!', user_type='mentor')
+        self.learner = User.objects.create_user(username='learner')
+        self.client.force_login(self.mentor)
+
+    def test_dashboard_lists_assigned_work(self):
+        """Test a mentor joins the rota on their first visit and sees their own queue"""
+        response = self.client.get(reverse('materials:mentor_dashboard'))
+        self.assertTrue(MentorProfile.objects.filter(pk=self.mentor.pk, is_available=True).exists())
+        self.assertNotContains(response, 'Assigned to You')
+
+        WorkSubmission.objects.create(
+            user=self.learner, category=self.design, title='Poster', description='d',
+            file='work_submissions/p.png', assigned_to=self.mentor,
+        )
+        response = self.client.get(reverse('materials:mentor_dashboard'))
+        self.assertContains(response, 'Assigned to You')
+        self.assertEqual([s.title for s in response.context['my_submissions']], ['Poster'])
+        self.assertEqual(response.context['pending_count'], 0)
+
+    def test_going_offline_queues_rebalance(self):
+        """Test saving preferences keeps the load counters and hands work on when going offline"""
+        assignment.profile_for(self.mentor)
+        MentorProfile.objects.filter(pk=self.mentor.pk).update(open_reviews=2)
+        response = self.client.post(reverse('materials:mentor_profile'), {'categories': [self.design.pk]})
+        self.assertRedirects(response, reverse('materials:mentor_dashboard'))
+
+        profile = MentorProfile.objects.get(pk=self.mentor.pk)
+        self.assertEqual((profile.is_available, profile.open_reviews), (False, 2))
+        self.assertEqual(list(profile.categories.all()), [self.design])
+        task = Task.objects.get(name='materials.tasks.rebalance_reviews')
+        self.assertEqual(task.args, [[self.mentor.pk]])
+
+    def test_learners_are_turned_away(self):
+        self.client.force_login(self.learner)
+        self.assertRedirects(self.client.get(reverse('materials:mentor_profile')), reverse('home'),
+                             fetch_redirect_response=False)
@@ -0,0 +1,70 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from . import views
+from .models import SkillCategory, LearningMaterial, UserSkillAccess
+
+User = get_user_model()
+
+
+class AsyncReadViewTests(TestCase):
+    """Test the read-heavy views render under an event loop"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.user.groups.add(Group.objects.create(name='mentors'))
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        self.material = LearningMaterial.objects.create(
+            category=self.category, title='Colour Theory', description='Colours',
+            material_type='pdf', access_level='basic', order=1
+        )
+        self.premium = LearningMaterial.objects.create(
+            category=self.category, title='Brand Kits', description='Brands',
+            material_type='pdf', access_level='premium', order=2
+        )
+        UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='enterprise')
+
+    def test_views_are_coroutines(self):
+        """Test the read path is implemented with async views"""
+        for view in (views.material_list, views.category_detail, views.material_detail,
+                     views.payment_history, views.my_submissions, views.my_learning):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_async_views_render(self):
+        """Test each async view renders without synchronous ORM access"""
+        await self.async_client.aforce_login(self.user)
+        urls = [
+            reverse('materials:my_materials'),
+            reverse('materials:category_detail', args=[self.category.id]),
+            reverse('materials:material_detail', args=[self.category.id, self.material.id]),
+            reverse('materials:payment_history'),
+            reverse('materials:my_submissions'),
+            reverse('materials:my_learning'),
+        ]
+        for url in urls:
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+    async def test_locked_material_redirects_to_checkout(self):
+        """Test a tier-locked material still redirects to checkout"""
+        await self.async_client.aforce_login(self.user)
+        url = reverse('materials:material_detail', args=[self.category.id, self.premium.id])
+        response = await self.async_client.get(url)
+        self.assertRedirects(
+            response, reverse('materials:checkout', args=[self.category.id, 'premium']),
+            fetch_redirect_response=False
+        )
+
+    async def test_async_login(self):
+        """Test logging in through the pooled password hasher"""
+        response = await self.async_client.post(reverse('login'), {'username': 'learner', 'password': 'testpass123!'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+        response = await self.async_client.post(reverse('login'), {'username': 'learner', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['form'].is_valid())
@@ -0,0 +1,144 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from . import cohorts
+from .models import CatalogueChange, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+HEADER = 'username,email,first_name,last_name,phone_number,password,categories\n'
+
+
+def cohort_file(text):
+    return io.BytesIO((HEADER + text).encode())
+
+
+class CohortImportTests(TestCase):
+    """Test onboarding a cohort of learners from a CSV"""
+
+    def setUp(self):
+        self.web = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        self.design = SkillCategory.objects.create(name='Design', slug='design')
+
+    def test_creates_learners_and_grants(self):
+        """Test every row becomes a student with the cohort's grants and its own extras"""
+        result = cohorts.import_cohort(cohort_file(
+            'amina,amina@example.com,Amina,Otieno,0712345678,s3cret-pass,\n'
+            'brian,brian@example.com,Brian,,,,design:premium\n'
+        ), grants=['web-development:enterprise'], workers=1)
+
+        self.assertEqual((result.created, result.granted, result.skipped), (2, 3, []))
+        amina = User.objects.get(username='amina')
+        self.assertTrue(amina.check_password('s3cret-pass'))
+        self.assertEqual((amina.user_type, amina.phone_number), ('student', '0712345678'))
+        self.assertFalse(User.objects.get(username='brian').has_usable_password())
+        self.assertEqual(
+            set(UserSkillAccess.objects.values_list('user__username', 'category__slug', 'access_level')),
+            {('amina', 'web-development', 'enterprise'), ('brian', 'web-development', 'enterprise'),
+             ('brian', 'design', 'premium')},
+        )
+        # Bulk writes still reach the delta-sync log
+        self.assertEqual(CatalogueChange.objects.filter(kind='access').count(), 3)
+
+    def test_reports_skipped_and_duplicate_rows(self):
+        """Test bad rows are reported by line and the rest are imported"""
+        User.objects.create_user(username='taken', email='someone@example.com')
+        result = cohorts.import_cohort(cohort_file(
+            'amina,amina@example.com,,,,,\n'
+            ',nousername@example.com,,,,,\n'
+            'bad name!,bad@example.com,,,,,\n'
+            'carol,not-an-email,,,,,\n'
+            'dan,dan@example.com,,,,,cooking:premium\n'
+            'AMINA,other@example.com,,,,,\n'
+            'amina2,Amina@Example.com,,,,,\n'
+            'taken,new@example.com,,,,,\n'
+        ), workers=1)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.skipped], [3, 4, 5, 6, 9])
+        self.assertIn("unknown category 'cooking'", dict(result.skipped)[6])
+        self.assertIn('belongs to another account', dict(result.skipped)[9])
+        self.assertEqual(result.duplicates, [(7, 'username repeats line 2'), (8, 'email repeats line 2')])
+
+    def test_existing_learner_is_upgraded_never_downgraded(self):
+        """Test a registered email gets the grants without a second account or a lower tier"""
+        existing = User.objects.create_user(username='amina', email='amina@example.com')
+        UserSkillAccess.objects.create(user=existing, category=self.web, access_level='basic')
+        UserSkillAccess.objects.create(user=existing, category=self.design, access_level='premium')
+
+        result = cohorts.import_cohort(
+            cohort_file('amina_k,AMINA@example.com,,,,,\n'), grants=['web-development:enterprise', 'design:enterprise'],
+        )
+        self.assertEqual((result.created, result.existing, result.upgraded, result.unchanged), (0, 1, 1, 1))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(
+            dict(UserSkillAccess.objects.values_list('category__slug', 'access_level')),
+            {'web-development': 'enterprise', 'design': 'premium'},
+        )
+
+    def test_passwords_hashed_in_process_pool(self):
+        """Test supplied passwords hashed by worker processes still verify"""
+        rows = ''.join(f'learner{i},learner{i}@example.com,,,,pass-{i},\n' for i in range(4))
+        cohorts.import_cohort(cohort_file(rows + 'nopass,nopass@example.com,,,,,\n'), workers=2)
+        for i in range(4):
+            self.assertTrue(User.objects.get(username=f'learner{i}').check_password(f'pass-{i}'))
+        self.assertFalse(User.objects.get(username='nopass').has_usable_password())
+
+    def test_command_writes_set_password_links(self):
+        """Test import_cohort reports the import and writes a link per learner without a password"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path, links = os.path.join(directory, 'cohort.csv'), os.path.join(directory, 'links.csv')
+        with open(path, 'w') as f:
+            f.write(HEADER + 'amina,amina@example.com,,,,,\nbrian,brian@example.com,,,,pw-123456,\nbrian,x@example.com,,,,,\n')
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_cohort', path, '--grant', 'design:premium', '--links', links,
+                     '--base-url', 'https://hub.example.com', stdout=out, stderr=err)
+        self.assertIn('2 learner(s) created', out.getvalue())
+        self.assertIn('row 4: duplicate', err.getvalue())
+        with open(links, encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual([row[0] for row in rows[1:]], ['amina'])
+        self.assertTrue(rows[1][2].startswith('https://hub.example.com/users/password-reset-confirm/'))
+
+    def test_admin_import_page(self):
+        """Test staff upload a cohort from the entitlements admin"""
+        admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        self.client.force_login(admin)
+        url = reverse('admin:materials_import_cohort')
+        self.assertContains(self.client.get(reverse('admin:materials_userskillaccess_changelist')), url)
+
+        upload = SimpleUploadedFile('cohort.csv', (HEADER + 'amina,amina@example.com,,,,,\n').encode(), 'text/csv')
+        response = self.client.post(url, {'cohort': upload, 'categories': [self.web.pk], 'tier': 'premium'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertEqual(UserSkillAccess.objects.get(user__username='amina').access_level, 'premium')
+
+        links = self.client.post(response.context['links_url'], {
+            'action': 'export_set_password_links', 'select_across': '1', '_selected_action': ['0'], 'index': '0',
+        })
+        rows = list(csv.reader(io.StringIO(b''.join(links.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual([row[0] for row in rows[1:]], ['amina'])
+
+    def test_admin_caps_workers(self):
+        """Test the import page cannot start more hashing processes than there are CPUs"""
+        admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('cohort.csv', (HEADER + 'amina,amina@example.com,,,,pw-123456,\n').encode())
+        response = self.client.post(reverse('admin:materials_import_cohort'), {
+            'cohort': upload, 'tier': 'premium', 'workers': cohorts.MAX_WORKERS + 1,
+        })
+        self.assertFormError(
+            response.context['form'], 'workers', f'Ensure this value is less than or equal to {cohorts.MAX_WORKERS}.'
+        )
+        self.assertFalse(User.objects.filter(username='amina').exists())
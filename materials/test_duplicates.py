@@ -0,0 +1,185 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from . import analytics, completion, sla
+from .duplicates import duplicate_groups
+from .models import (
+    CatalogueChange, CategoryProgress, LearningMaterial, MentorProfile, Payment, ProgressEvent, ReviewSketch,
+    RevenueRollup, SkillCategory, UserSkillAccess, WorkSubmission,
+)
+
+User = get_user_model()
+
+
+class MergeDuplicateCategoriesTests(TestCase):
+    """Test merging categories that differ only in case and spacing"""
+
+    def setUp(self):
+        # Categories made before the constraint existed; the test transaction restores it
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX unique_category_name')
+        self.keep = SkillCategory.objects.create(name='Computer Literacy', slug='computer-literacy')
+        self.lower = SkillCategory.objects.create(name=' computer literacy', slug='computer-literacy-2')
+        self.upper = SkillCategory.objects.create(name='COMPUTER LITERACY ', slug='computer-literacy-3')
+        self.other = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        self.users = [User.objects.create_user(username=f'learner{i}') for i in range(3)]
+
+    def material(self, category, title):
+        return LearningMaterial.objects.create(
+            category=category, title=title, description='d', material_type='pdf', access_level='basic',
+        )
+
+    def test_groups_by_normalized_name(self):
+        """Test only the names that collide are grouped, oldest first"""
+        self.assertEqual(duplicate_groups(), [[self.keep.pk, self.lower.pk, self.upper.pk]])
+
+    def test_merge_moves_related_rows(self):
+        """Test lessons, payments and submissions move to the oldest category instead of being deleted"""
+        lesson = self.material(self.lower, 'Typing')
+        payment = Payment.objects.create(
+            user=self.users[0], category=self.upper, access_level='premium', amount=Decimal('200.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678', is_verified=True,
+        )
+        submission = WorkSubmission.objects.create(
+            user=self.users[0], category=self.lower, title='Essay', description='d', file='work_submissions/e.txt',
+        )
+        analytics.refresh_days([timezone.localdate(payment.created_at)])
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        self.assertEqual(list(SkillCategory.objects.order_by('pk')), [self.keep, self.other])
+        for obj in (lesson, payment, submission):
+            obj.refresh_from_db()
+            self.assertEqual(obj.category_id, self.keep.pk)
+        self.assertEqual(
+            list(RevenueRollup.objects.values_list('category_id', 'payments')), [(self.keep.pk, 1)],
+        )
+        tombstones = CatalogueChange.objects.filter(kind='category', deleted=True).values_list('object_id', flat=True)
+        self.assertEqual(sorted(tombstones), [self.lower.pk, self.upper.pk])
+        self.assertTrue(CatalogueChange.objects.filter(kind='material', object_id=lesson.pk, deleted=False).exists())
+
+    def test_entitlement_conflicts_keep_highest_tier(self):
+        """Test a learner with access through several duplicates keeps one row at the best tier"""
+        first, second, third = self.users
+        UserSkillAccess.objects.create(user=first, category=self.keep, access_level='basic')
+        UserSkillAccess.objects.create(user=first, category=self.upper, access_level='premium')
+        UserSkillAccess.objects.create(user=second, category=self.lower, access_level='enterprise')
+        UserSkillAccess.objects.create(user=third, category=self.lower, access_level='enterprise')
+        UserSkillAccess.objects.create(user=third, category=self.upper, access_level='enterprise')
+        dropped = set(UserSkillAccess.objects.filter(user=first, category=self.keep).values_list('pk', flat=True))
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(UserSkillAccess.objects.values_list('user__username', 'category_id', 'access_level')),
+            [('learner0', self.keep.pk, 'premium'), ('learner1', self.keep.pk, 'enterprise'),
+             ('learner2', self.keep.pk, 'enterprise')],
+        )
+        tombstones = set(CatalogueChange.objects.filter(kind='access', deleted=True).values_list('object_id', flat=True))
+        self.assertTrue(dropped <= tombstones)
+        self.assertEqual(CatalogueChange.objects.filter(kind='access', deleted=False).count(), 3)
+
+    def test_progress_is_recomputed(self):
+        """Test completions in a duplicate count towards the surviving category"""
+        self.material(self.keep, 'Mouse')
+        typing = self.material(self.lower, 'Typing')
+        ProgressEvent.objects.create(user=self.users[0], material=typing, event='complete', occurred_at=timezone.now())
+        completion.rebuild()
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        row = CategoryProgress.objects.get()
+        self.assertEqual((row.category_id, row.completed_count), (self.keep.pk, 1))
+
+    def test_mentor_categories_move(self):
+        """Test mentors who review a duplicate review the survivor afterwards, without duplicate links"""
+        profiles = []
+        for username, categories in [('ann', [self.lower]), ('ben', [self.keep, self.upper]),
+                                     ('cat', [self.lower, self.upper, self.other])]:
+            mentor = User.objects.create_user(username=username, user_type='mentor')
+            profile = MentorProfile.objects.create(mentor=mentor)
+            profile.categories.set(categories)
+            profiles.append(profile)
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        coverage = {profile.mentor.username: set(profile.categories.all()) for profile in profiles}
+        self.assertEqual(coverage, {'ann': {self.keep}, 'ben': {self.keep}, 'cat': {self.keep, self.other}})
+
+    def test_review_sketches_merge(self):
+        """Test the duplicates' turnaround sketches are folded into the survivor's"""
+        waits = {self.keep: [3600], self.lower: [60, 7200], self.upper: [86400]}
+        for category, seconds in waits.items():
+            for wait in seconds:
+                sla.add('category', category.pk, wait)
+        expected = sla.Sketch()
+        for wait in sum(waits.values(), []):
+            expected.add(wait)
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        self.assertEqual(list(ReviewSketch.objects.values_list('key', flat=True)), [self.keep.pk])
+        merged = sla.Sketch.from_row(ReviewSketch.objects.get())
+        self.assertEqual((merged.buckets, merged.count), (expected.buckets, expected.count))
+        self.assertAlmostEqual(merged.total, expected.total)
+
+    def test_dry_run_writes_nothing(self):
+        """Test --dry-run reports the merge and leaves every row in place"""
+        self.material(self.upper, 'Typing')
+        out = io.StringIO()
+        call_command('merge_duplicate_categories', '--dry-run', stdout=out)
+        self.assertIn('Would merge 2 duplicate(s) into 1 category', out.getvalue())
+        self.assertEqual(SkillCategory.objects.count(), 4)
+        self.assertTrue(LearningMaterial.objects.filter(category=self.upper).exists())
+
+
+class UniqueCategoryNameTests(TestCase):
+    """Test new duplicate categories are refused"""
+
+    def test_constraint(self):
+        """Test a name differing only in case or spaces is rejected"""
+        SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        duplicate = SkillCategory(name=' graphic design ', slug='graphic-design-2', icon='x', description='d')
+        with self.assertRaisesMessage(ValidationError, 'A skill category with this name already exists.'):
+            duplicate.full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            duplicate.save()
+
+
+class MergeBeforeConstraintTests(TransactionTestCase):
+    """Test the merge works on a database stopped by migration 0013, as its error tells operators to do"""
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate([('materials', '0012_hot_query_indexes')])
+        self.apps = self.executor.loader.project_state([('materials', '0012_hot_query_indexes')]).apps
+
+    def tearDown(self):
+        # Leave no duplicates behind, or 0013 refuses to migrate forward
+        self.apps.get_model('materials', 'SkillCategory').objects.all().delete()
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_merge_at_0012(self):
+        """Test merging only touches tables that exist before 0013, then migrating succeeds"""
+        Category = self.apps.get_model('materials', 'SkillCategory')
+        Material = self.apps.get_model('materials', 'LearningMaterial')
+        keep = Category.objects.create(name='Web Development', slug='web-development')
+        duplicate = Category.objects.create(name='web development ', slug='web-development-2')
+        Material.objects.create(category=duplicate, title='HTML', description='d', material_type='pdf',
+                                access_level='basic')
+
+        call_command('merge_duplicate_categories', stdout=io.StringIO())
+
+        self.assertEqual(list(Category.objects.values_list('pk', flat=True)), [keep.pk])
+        self.assertEqual(Material.objects.get().category_id, keep.pk)
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
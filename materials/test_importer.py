@@ -0,0 +1,113 @@
+import csv
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from .models import LearningMaterial, SkillCategory
+
+TEMP_ROOT = Path(tempfile.mkdtemp())
+FIELDS = ['category', 'title', 'description', 'type', 'tier', 'order', 'file', 'youtube_url']
+
+
+@override_settings(MEDIA_ROOT=TEMP_ROOT / 'media')
+class ImportMaterialsTests(TestCase):
+    """Test the import_materials management command"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp(dir=TEMP_ROOT))
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        (self.dir / 'intro.pdf').write_bytes(b'%PDF-1.4 intro')
+        self.rows = [
+            {'category': 'graphic-design', 'title': 'Intro', 'description': 'Start here', 'type': 'pdf',
+             'tier': 'basic', 'order': '1', 'file': 'intro.pdf', 'youtube_url': ''},
+            {'category': 'graphic-design', 'title': 'Colour', 'description': '', 'type': 'video',
+             'tier': 'premium', 'order': '2', 'file': '', 'youtube_url': 'https://youtu.be/dQw4w9WgXcQ'},
+        ]
+
+    def write_csv(self, rows):
+        path = self.dir / 'manifest.csv'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_materials', str(path), *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_creates_lessons_with_file_metadata(self):
+        """Test a CSV manifest creates lessons and stores hashed PDFs"""
+        self.run_import(self.write_csv(self.rows))
+
+        pdf = LearningMaterial.objects.get(title='Intro')
+        self.assertEqual((pdf.access_level, pdf.order, pdf.pdf_content_type), ('basic', 1, 'application/pdf'))
+        self.assertTrue(pdf.pdf_file.name.startswith('materials/pdfs/intro-'))
+        self.assertEqual(pdf.pdf_size, 14)
+        video = LearningMaterial.objects.get(title='Colour')
+        self.assertEqual((video.material_type, video.youtube_url), ('video', 'https://youtu.be/dQw4w9WgXcQ'))
+
+    def test_reimport_updates_without_duplicating(self):
+        """Test re-importing upserts rows and reuses stored files"""
+        path = self.write_csv(self.rows)
+        self.run_import(path)
+        first_name = LearningMaterial.objects.get(title='Intro').pdf_file.name
+
+        self.rows[0]['tier'] = 'enterprise'
+        out = self.run_import(self.write_csv(self.rows))
+
+        self.assertIn('0 created, 1 updated, 1 unchanged, 0 file(s) copied, 1 reused', out)
+        self.assertEqual(LearningMaterial.objects.count(), 2)
+        intro = LearningMaterial.objects.get(title='Intro')
+        self.assertEqual((intro.access_level, intro.pdf_file.name), ('enterprise', first_name))
+
+    def test_json_manifest(self):
+        """Test JSON manifests are accepted"""
+        path = self.dir / 'manifest.json'
+        path.write_text(json.dumps(self.rows))
+        self.run_import(path)
+        self.assertEqual(LearningMaterial.objects.count(), 2)
+
+    def test_invalid_manifest_imports_nothing(self):
+        """Test every row is validated before anything is written"""
+        self.rows.append({'category': 'nope', 'title': '', 'type': 'pdf', 'tier': 'gold', 'file': 'missing.pdf'})
+        with self.assertRaises(CommandError):
+            self.run_import(self.write_csv(self.rows))
+        self.assertFalse(LearningMaterial.objects.exists())
+
+    def test_bad_files_are_rejected_before_copying(self):
+        """Test a file that is not a PDF, or a non-text value, fails validation with nothing stored"""
+        (self.dir / 'fake.pdf').write_bytes(b'MZ\x90\x00 not a pdf at all')
+        self.rows.append({'category': 'graphic-design', 'title': 'Fake', 'type': 'pdf', 'tier': 'basic',
+                          'file': 'fake.pdf'})
+        json_path = self.dir / 'manifest.json'
+        json_path.write_text(json.dumps(self.rows[:1] + [{**self.rows[-1], 'file': ['intro.pdf']}]))
+
+        with self.settings(MEDIA_ROOT=self.dir / 'media'):
+            for path, message in [(self.write_csv(self.rows), 'row 4: fake.pdf: This file type is not allowed.'),
+                                  (json_path, 'row 2: file must be text')]:
+                err = StringIO()
+                with self.assertRaises(CommandError):
+                    call_command('import_materials', str(path), stdout=StringIO(), stderr=err)
+                self.assertEqual(err.getvalue().strip(), message)
+        self.assertFalse((self.dir / 'media').exists())
+        self.assertFalse(LearningMaterial.objects.exists())
+
+    def test_dry_run_writes_nothing(self):
+        """Test --dry-run only validates"""
+        out = self.run_import(self.write_csv(self.rows), '--dry-run')
+        self.assertIn('Manifest OK: 2 row(s)', out)
+        self.assertFalse(LearningMaterial.objects.exists())
@@ -0,0 +1,96 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from taskqueue.models import Task
+from . import packs
+from .catalogue import catalogue_version
+from .models import LearningMaterial, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+TEMP_MEDIA = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'packs-tests'},
+})
+class CoursePackTests(TestCase):
+    """Test offline course pack downloads"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        for order, tier in enumerate(['basic', 'enterprise', 'premium'], start=1):
+            material = LearningMaterial(
+                category=self.category, title=f'{tier.title()} Notes', description='d',
+                material_type='pdf', access_level=tier, order=order,
+            )
+            material.pdf_file.save(f'{tier}.pdf', ContentFile(b'%PDF-1.4 ' + tier.encode() * 1000), save=False)
+            material.save()
+        UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='enterprise')
+        self.url = reverse('materials:course_pack', args=[self.category.id])
+
+    async def download(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        if response.status_code != 200:
+            return response, None
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        return response, zipfile.ZipFile(io.BytesIO(body))
+
+    async def test_streamed_pack_contains_entitled_pdfs(self):
+        """Test the ZIP holds the tier's PDFs and an index, and queues one shared build"""
+        response, archive = await self.download()
+
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIsNone(archive.testzip())
+        index = json.loads(archive.read('index.json'))
+        self.assertEqual(index['tier'], 'enterprise')
+        self.assertEqual([lesson['title'] for lesson in index['lessons']], ['Basic Notes', 'Enterprise Notes'])
+        pdf = archive.read(index['lessons'][1]['file'])
+        self.assertEqual(pdf, b'%PDF-1.4 ' + b'enterprise' * 1000)
+
+        await self.download()
+        self.assertEqual(await Task.objects.filter(name='materials.tasks.build_course_pack').acount(), 1)
+
+    async def test_built_pack_is_shared(self):
+        """Test once the pack is stored, learners are served it without learning where it is kept"""
+        name = await sync_to_async(packs.build_pack)(self.category.id, 'enterprise')
+        self.assertEqual(await sync_to_async(packs.build_pack)(self.category.id, 'enterprise'), name)
+        response, archive = await self.download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(name, response.get('Location', ''))
+        with packs.default_storage.open(name) as stored:
+            self.assertEqual(archive.namelist(), zipfile.ZipFile(stored).namelist())
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertEqual(await Task.objects.acount(), 0)
+
+    def test_catalogue_change_retires_pack(self):
+        """Test a new catalogue version builds a new pack and removes the old one"""
+        old = packs.build_pack(self.category.id, 'premium')
+        with self.captureOnCommitCallbacks(execute=True):
+            LearningMaterial.objects.filter(access_level='basic').get().save()
+        new = packs.build_pack(self.category.id, 'premium')
+
+        self.assertNotEqual(old, new)
+        self.assertIn(catalogue_version(), new)
+        self.assertFalse(packs.default_storage.exists(old))
@@ -0,0 +1,220 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import progress
+from .models import CategoryProgress, LearningMaterial, ProgressEvent, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+TEMP_MEDIA = tempfile.mkdtemp()
+# Keep flushes away from the real spool directory
+TEMP_SPOOL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, PROGRESS_SPOOL_DIR=TEMP_SPOOL,
+                   PROGRESS_BATCH_SIZE=3, PROGRESS_FLUSH_INTERVAL=3600)
+class ProgressEventTests(TestCase):
+    """Test buffered learning-progress events"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        shutil.rmtree(TEMP_SPOOL, ignore_errors=True)
+
+    def setUp(self):
+        progress.discard()
+
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        self.material = LearningMaterial(
+            category=self.category, title='HTML Basics', material_type='pdf', access_level='basic',
+        )
+        self.material.pdf_file.save('html.pdf', ContentFile(b'%PDF-1.4 html'), save=False)
+        self.material.save()
+        self.premium = LearningMaterial.objects.create(
+            category=self.category, title='Deploying', material_type='video', access_level='premium',
+            youtube_url='https://youtu.be/dQw4w9WgXcQ',
+        )
+        self.client.force_login(self.user)
+
+    def detail_url(self, material):
+        return reverse('materials:material_detail', args=[self.category.id, material.id])
+
+    def test_views_are_buffered_not_written(self):
+        """Test a page view costs no write until the batch is due"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.detail_url(self.material))
+        self.assertFalse([q for q in ctx.captured_queries if 'progressevent' in q['sql'].lower()])
+        self.assertEqual(progress.pending(), 1)
+        self.assertFalse(ProgressEvent.objects.exists())
+
+    def test_batch_written_at_size_threshold(self):
+        """Test the request that fills the batch writes it in one insert"""
+        self.client.get(self.detail_url(self.material))
+        self.client.get(self.detail_url(self.material))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.detail_url(self.material))
+
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "materials_progressevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(progress.pending(), 0)
+        self.assertEqual(ProgressEvent.objects.filter(user=self.user, material=self.material, event='view').count(), 3)
+
+    def test_batch_written_after_interval(self):
+        """Test an old event is written even if the batch is small"""
+        self.client.get(self.detail_url(self.material))
+        with override_settings(PROGRESS_FLUSH_INTERVAL=0):
+            self.client.get(reverse('materials:my_materials'))
+        self.assertEqual(ProgressEvent.objects.count(), 1)
+
+    def test_download_and_complete(self):
+        """Test downloads redirect to the file and completions are recorded"""
+        response = self.client.get(reverse('materials:material_download', args=[self.category.id, self.material.id]))
+        self.assertRedirects(response, self.material.pdf_file.url, fetch_redirect_response=False)
+        response = self.client.post(reverse('materials:material_complete', args=[self.category.id, self.material.id]))
+        self.assertRedirects(response, self.detail_url(self.material), fetch_redirect_response=False)
+        progress.flush()
+
+        self.assertEqual(
+            sorted(ProgressEvent.objects.values_list('event', flat=True)), ['complete', 'download']
+        )
+
+    def test_locked_material_not_recorded(self):
+        """Test learners without the tier are sent to checkout and nothing is logged"""
+        for url in (self.detail_url(self.premium),
+                    reverse('materials:material_complete', args=[self.category.id, self.premium.id])):
+            response = self.client.post(url) if url.endswith('complete/') else self.client.get(url)
+            self.assertRedirects(
+                response, reverse('materials:checkout', args=[self.category.id, 'premium']),
+                fetch_redirect_response=False,
+            )
+        self.assertEqual(progress.pending(), 0)
+
+        UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='premium')
+        self.client.get(self.detail_url(self.premium))
+        self.assertEqual(progress.pending(), 1)
+
+    def test_failed_write_is_spooled_and_recovered(self):
+        """Test a batch the database refuses survives in the spool until the next flush"""
+        progress.record(self.user, self.material.id, progress.VIEW)
+        progress.record(self.user, self.material.id, progress.COMPLETE)
+        with mock.patch.object(progress, 'write_events', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('materials.progress', 'WARNING'):
+            self.assertEqual(progress.flush(), 0)
+
+        self.assertEqual(progress.pending(), 0)
+        self.assertEqual(len(list(Path(TEMP_SPOOL).glob('*.jsonl'))), 1)
+        self.assertFalse(ProgressEvent.objects.exists())
+
+        call_command('flush_progress', stdout=mock.Mock())
+        self.assertEqual(ProgressEvent.objects.count(), 2)
+        self.assertEqual(list(Path(TEMP_SPOOL).iterdir()), [])
+
+    def test_events_for_deleted_rows_are_dropped(self):
+        """Test a lesson deleted before the flush does not break the batch"""
+        progress.record(self.user, self.material.id, progress.VIEW)
+        progress.record(self.user, self.premium.id, progress.VIEW)
+        self.premium.delete()
+
+        self.assertEqual(progress.flush(), 1)
+        self.assertEqual(list(ProgressEvent.objects.values_list('material_id', flat=True)), [self.material.id])
+
+
+@override_settings(PROGRESS_SPOOL_DIR=TEMP_SPOOL)
+class CompletionRollupTests(TestCase):
+    """Test the per-category completion rollup"""
+
+    def setUp(self):
+        progress.discard()
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        self.lessons = [
+            LearningMaterial.objects.create(
+                category=self.category, title=f'Lesson {n}', material_type='video', access_level='basic',
+                order=n, youtube_url='https://youtu.be/dQw4w9WgXcQ',
+            )
+            for n in (1, 2, 3)
+        ]
+
+    def rollup(self):
+        return CategoryProgress.objects.get(user=self.user, category=self.category)
+
+    def test_first_view_starts_rollup(self):
+        """Test viewing a lesson creates a row pointing at the first lesson"""
+        progress.record(self.user, self.lessons[1].id, progress.VIEW)
+        progress.flush()
+
+        row = self.rollup()
+        self.assertEqual(row.completed_count, 0)
+        self.assertEqual(row.next_material, self.lessons[0])
+
+    def test_completions_accumulate_across_batches(self):
+        """Test repeated completions count once and the next lesson advances"""
+        progress.record(self.user, self.lessons[0].id, progress.COMPLETE)
+        progress.record(self.user, self.lessons[0].id, progress.COMPLETE)
+        progress.flush()
+        self.assertEqual((self.rollup().completed_count, self.rollup().next_material), (1, self.lessons[1]))
+
+        progress.record(self.user, self.lessons[1].id, progress.COMPLETE)
+        progress.record(self.user, self.lessons[2].id, progress.VIEW)
+        progress.flush()
+        row = self.rollup()
+        self.assertEqual((row.completed_count, row.next_material), (2, self.lessons[2]))
+        self.assertEqual(row.last_activity_at, ProgressEvent.objects.latest('occurred_at').occurred_at)
+
+        progress.record(self.user, self.lessons[2].id, progress.COMPLETE)
+        progress.flush()
+        self.assertEqual((self.rollup().completed_count, self.rollup().next_material), (3, None))
+
+    def test_view_only_batch_does_not_recount(self):
+        """Test a batch without completions only touches last activity"""
+        progress.record(self.user, self.lessons[0].id, progress.COMPLETE)
+        progress.flush()
+        progress.record(self.user, self.lessons[0].id, progress.VIEW)
+        with CaptureQueriesContext(connection) as ctx:
+            progress.flush()
+        self.assertFalse([q for q in ctx.captured_queries if '"event" = \'complete\'' in q['sql']])
+        self.assertEqual(self.rollup().completed_count, 1)
+
+    def test_rebuild_matches_incremental(self):
+        """Test rebuild_progress recomputes the same rows from the event log"""
+        other = SkillCategory.objects.create(name='Design', slug='design')
+        design = LearningMaterial.objects.create(
+            category=other, title='Colour', material_type='video', access_level='basic',
+            youtube_url='https://youtu.be/dQw4w9WgXcQ',
+        )
+        for material, event in [(self.lessons[0], progress.COMPLETE), (self.lessons[2], progress.COMPLETE),
+                                (design, progress.VIEW)]:
+            progress.record(self.user, material.id, event)
+        progress.flush()
+        fields = ('user_id', 'category_id', 'completed_count', 'next_material_id', 'last_activity_at')
+        incremental = sorted(CategoryProgress.objects.values_list(*fields))
+
+        CategoryProgress.objects.update(completed_count=0, next_material=None)
+        call_command('rebuild_progress', stdout=mock.Mock())
+        self.assertEqual(sorted(CategoryProgress.objects.values_list(*fields)), incremental)
+
+    def test_my_learning_shows_progress(self):
+        """Test the dashboard reads progress from the rollup"""
+        UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='enterprise')
+        progress.record(self.user, self.lessons[0].id, progress.COMPLETE)
+        progress.flush()
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('materials:my_learning'))
+        rollup_queries = [q for q in ctx.captured_queries if 'materials_categoryprogress' in q['sql']]
+        self.assertEqual(len(rollup_queries), 1)
+        self.assertContains(response, 'Completed 1 of 3 lessons')
+        self.assertContains(response, reverse('materials:material_detail', args=[self.category.id, self.lessons[1].id]))
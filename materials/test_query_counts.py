@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import SkillCategory, LearningMaterial, UserSkillAccess, Payment, WorkSubmission, MentorFeedback
+from .testing import QueryCountMixin
+
+User = get_user_model()
+
+
+class MaterialsViewQueryCountTests(QueryCountMixin, TestCase):
+    """Every view in materials.views runs the same number of queries at 1, 10 and 100 rows"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.mentor = User.objects.create_user(username='mentor', password='testpass123!', is_staff=True)
+        self.category = SkillCategory.objects.create(
+            name='Digital Marketing', slug='digital-marketing', icon='fa-chart-line', description='Marketing'
+        )
+        self.material = LearningMaterial.objects.create(
+            category=self.category, title='Intro', description='Intro lesson',
+            material_type='video', youtube_url='https://youtu.be/dQw4w9WgXcQ', access_level='basic', order=0
+        )
+        self.submission = WorkSubmission.objects.create(
+            user=self.user, category=self.category, title='Poster', description='My poster',
+            file='work_submissions/poster.png'
+        )
+        self.client.force_login(self.user)
+
+    def seed_categories(self, n):
+        for i in range(n):
+            category = SkillCategory.objects.create(
+                name=f'Skill {i}', slug=f'skill-{i}', icon='fa-book', description='Skill'
+            )
+            LearningMaterial.objects.create(
+                category=category, title=f'Lesson {i}', description='Lesson',
+                material_type='pdf', access_level='basic', order=i
+            )
+            UserSkillAccess.objects.create(user=self.user, category=category, access_level='enterprise')
+
+    def seed_materials(self, n):
+        for i in range(n):
+            LearningMaterial.objects.create(
+                category=self.category, title=f'Lesson {i}', description='Lesson',
+                material_type='pdf', access_level=('basic', 'enterprise', 'premium')[i % 3], order=i + 1
+            )
+
+    def seed_payments(self, n):
+        categories = [
+            SkillCategory.objects.create(name=f'Paid {i}', slug=f'paid-{i}', icon='fa-book', description='Paid')
+            for i in range(n)
+        ]
+        for i, category in enumerate(categories):
+            Payment.objects.create(
+                user=self.user, category=category, access_level='premium', amount=Decimal('200.00'),
+                mpesa_code=f'QA{i:08d}', phone_number='0712345678', is_verified=True
+            )
+            UserSkillAccess.objects.create(user=self.user, category=category, access_level='premium')
+
+    def seed_submissions(self, n, reviewed=False):
+        for i in range(n):
+            submission = WorkSubmission.objects.create(
+                user=self.user, category=self.category, title=f'Work {i}', description='Work',
+                file=f'work_submissions/work_{i}.png', is_reviewed=reviewed
+            )
+            if reviewed:
+                MentorFeedback.objects.create(
+                    submission=submission, mentor=self.mentor, feedback='Nice', rating='good'
+                )
+
+    def seed_mentor_queue(self, n):
+        self.seed_submissions(n)
+        self.seed_submissions(n, reviewed=True)
+
+    def test_material_list(self):
+        self.assertConstantQueries(reverse('materials:my_materials'), self.seed_categories)
+
+    def test_category_detail(self):
+        url = reverse('materials:category_detail', args=[self.category.id])
+        self.assertConstantQueries(url, self.seed_materials)
+
+    def test_material_detail(self):
+        url = reverse('materials:material_detail', args=[self.category.id, self.material.id])
+        self.assertConstantQueries(url, self.seed_materials)
+
+    def test_checkout(self):
+        url = reverse('materials:checkout', args=[self.category.id, 'premium'])
+        self.assertConstantQueries(url, self.seed_payments)
+
+    def test_payment_success(self):
+        self.assertConstantQueries(reverse('materials:payment_success'), self.seed_payments)
+
+    def test_payment_history(self):
+        self.assertConstantQueries(reverse('materials:payment_history'), self.seed_payments)
+
+    def test_submit_work(self):
+        self.assertConstantQueries(reverse('materials:submit_work'), self.seed_submissions)
+
+    def test_my_submissions(self):
+        self.assertConstantQueries(reverse('materials:my_submissions'), self.seed_submissions)
+
+    def test_submission_detail(self):
+        MentorFeedback.objects.create(submission=self.submission, mentor=self.mentor, feedback='Good', rating='good')
+        url = reverse('materials:submission_detail', args=[self.submission.pk])
+        self.assertConstantQueries(url, self.seed_mentor_queue)
+
+    def test_review_submission(self):
+        self.client.force_login(self.mentor)
+        url = reverse('materials:review_submission', args=[self.submission.pk])
+        self.assertConstantQueries(url, self.seed_mentor_queue)
+
+    def test_mentor_dashboard(self):
+        self.client.force_login(self.mentor)
+        self.assertConstantQueries(reverse('materials:mentor_dashboard'), self.seed_mentor_queue)
+
+    def test_my_learning(self):
+        def seed(n):
+            self.seed_payments(n)
+            self.seed_submissions(n)
+        self.assertConstantQueries(reverse('materials:my_learning'), seed)
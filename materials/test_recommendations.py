@@ -0,0 +1,112 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import recommendations
+from .models import LearningMaterial, MaterialNeighbour, ProgressEvent, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    """Test "learners also took" neighbours built from the progress log"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        self.marketing = SkillCategory.objects.create(name='Digital Marketing', slug='digital-marketing')
+        self.colour = self.lesson(self.design, 'Colour Theory', 1)
+        self.layout = self.lesson(self.design, 'Layout', 2)
+        self.brands = self.lesson(self.design, 'Brand Kits', 3, access_level='premium')
+        self.ads = self.lesson(self.marketing, 'Social Ads', 1)
+        self.seo = self.lesson(self.marketing, 'SEO Basics', 2)
+        self.learners = [User.objects.create_user(username=f'learner{i}', password='testpass123!') for i in range(3)]
+
+    def lesson(self, category, title, order, access_level='basic'):
+        return LearningMaterial.objects.create(
+            category=category, title=title, description='d', material_type='pdf', access_level=access_level,
+            order=order,
+        )
+
+    def took(self, user, *lessons, event='complete'):
+        ProgressEvent.objects.bulk_create([
+            ProgressEvent(user=user, material=lesson, event=event, occurred_at=timezone.now()) for lesson in lessons
+        ])
+
+    def ranked(self, material):
+        return list(MaterialNeighbour.objects.filter(material=material).values_list('neighbour__title', flat=True))
+
+    def test_co_viewed_lessons_rank_first(self):
+        """Test lessons taken by the same learners outrank the rest of the category"""
+        for learner in self.learners:
+            self.took(learner, self.colour, self.ads)
+        self.took(self.learners[0], self.layout, event='view')
+
+        recommendations.build()
+
+        self.assertEqual(self.ranked(self.colour), ['Social Ads', 'Layout', 'Brand Kits'])
+
+    def test_related_categories(self):
+        """Test lessons from a category the same learners hold are suggested before anyone co-views them"""
+        for learner in self.learners:
+            UserSkillAccess.objects.create(user=learner, category=self.design, access_level='basic')
+            UserSkillAccess.objects.create(user=learner, category=self.marketing, access_level='basic')
+
+        recommendations.build()
+
+        self.assertEqual(self.ranked(self.colour), ['Layout', 'Brand Kits', 'Social Ads', 'SEO Basics'])
+
+    def test_category_order_without_history(self):
+        """Test a lesson nobody has taken yet is followed by the next lessons of its category"""
+        recommendations.build()
+        self.assertEqual(self.ranked(self.colour), ['Layout', 'Brand Kits'])
+        self.assertEqual(self.ranked(self.layout), ['Brand Kits', 'Colour Theory'])
+
+    def test_neighbour_limit(self):
+        """Test at most RECOMMENDATION_NEIGHBOURS lessons are stored, and a rebuild replaces them"""
+        for learner in self.learners:
+            self.took(learner, self.colour, self.layout, self.ads, self.seo)
+        with self.settings(RECOMMENDATION_NEIGHBOURS=2):
+            self.assertEqual(recommendations.build(), 10)
+        recommendations.build(k=1)
+        self.assertEqual(MaterialNeighbour.objects.count(), 5)
+
+    async def test_related_materials_respect_tier(self):
+        """Test premium neighbours are only suggested to learners whose tier unlocks them"""
+        learner = self.learners[0]
+        await MaterialNeighbour.objects.abulk_create([
+            MaterialNeighbour(material=self.colour, neighbour=self.brands, rank=1, score=0.9),
+            MaterialNeighbour(material=self.colour, neighbour=self.ads, rank=2, score=0.5),
+        ])
+        related = await recommendations.arelated_materials(learner, self.colour)
+        self.assertEqual([m.title for m in related], ['Social Ads'])
+
+        await UserSkillAccess.objects.acreate(user=learner, category=self.design, access_level='premium')
+        related = await recommendations.arelated_materials(learner, self.colour)
+        self.assertEqual([m.title for m in related], ['Brand Kits', 'Social Ads'])
+        self.assertEqual(related[1].category.name, 'Digital Marketing')
+
+    async def test_fallback_before_first_build(self):
+        """Test the next unlocked lessons of the category are suggested until neighbours are built"""
+        related = await recommendations.arelated_materials(self.learners[0], self.colour)
+        self.assertEqual([m.title for m in related], ['Layout'])
+
+    def test_lesson_page_lists_neighbours(self):
+        """Test the lesson page shows stored neighbours from other categories"""
+        MaterialNeighbour.objects.create(material=self.colour, neighbour=self.ads, rank=1, score=0.5)
+        self.client.force_login(self.learners[0])
+        url = reverse('materials:material_detail', args=[self.design.id, self.colour.id])
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, 'Learners Also Took')
+        self.assertContains(response, reverse('materials:material_detail', args=[self.marketing.id, self.ads.id]))
+        self.assertContains(response, 'in Digital Marketing')
+
+    def test_command(self):
+        """Test build_recommendations reports the rows stored"""
+        out = io.StringIO()
+        call_command('build_recommendations', '--neighbours', '1', stdout=out)
+        self.assertIn('Stored 5 recommendation(s)', out.getvalue())
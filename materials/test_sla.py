@@ -0,0 +1,137 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import sla
+from .models import MentorFeedback, ReviewSketch, SkillCategory, WorkSubmission
+
+User = get_user_model()
+
+
+class SketchTests(TestCase):
+    """Test the log-bucketed sketch against exact percentiles"""
+
+    def exact(self, values, q):
+        return sorted(values)[int(q * (len(values) - 1))]
+
+    def test_quantiles_within_accuracy(self):
+        """Test p50/p90/p99 are within RELATIVE_ACCURACY of the true waits"""
+        rng = random.Random(3)
+        values = [rng.lognormvariate(10, 1.5) for _ in range(5000)]
+        sketch = sla.Sketch()
+        for value in values:
+            sketch.add(value)
+        for q in sla.QUANTILES:
+            self.assertLessEqual(abs(sketch.quantile(q) - self.exact(values, q)) / self.exact(values, q),
+                                 sla.RELATIVE_ACCURACY, q)
+
+    def test_merge(self):
+        """Test merging two sketches gives the sketch of all their waits"""
+        first, second, both = sla.Sketch(), sla.Sketch(), sla.Sketch()
+        for n, value in enumerate(range(60, 600000, 997)):
+            (first if n % 2 else second).add(value)
+            both.add(value)
+        first.merge(sla.Sketch(second.as_json(), second.count, second.total))
+        self.assertEqual((first.buckets, first.count, first.total), (both.buckets, both.count, both.total))
+
+    def test_empty(self):
+        self.assertIsNone(sla.Sketch().quantile(0.5))
+        self.assertEqual(sla.humanize(None), '—')
+        self.assertEqual(sla.humanize(26 * 3600), '1d 2h')
+
+
+class ReviewTurnaroundTests(TestCase):
+    """Test waits are counted as reviews are saved, and read without scanning submissions"""
+
+    def setUp(self):
+        self.design = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design')
+        self.learner = User.objects.create_user(username='learner')
+        self.mentor = User.objects.create_user(username='mentor', password='testpass123!', user_type='mentor')
+        self.staff = User.objects.create_user(username='staff', password='testpass123!', is_staff=True)
+
+    def submission(self, hours_ago, category=None):
+        submission = WorkSubmission.objects.create(
+            user=self.learner, category=category or self.design, title='Poster', description='d',
+            file='work_submissions/p.png',
+        )
+        WorkSubmission.objects.filter(pk=submission.pk).update(submitted_at=timezone.now() - timedelta(hours=hours_ago))
+        submission.refresh_from_db()
+        return submission
+
+    def review(self, submission, mentor=None):
+        return MentorFeedback.objects.create(submission=submission, mentor=mentor or self.mentor, feedback='Nice',
+                                             rating='good')
+
+    def sketch(self, scope, key):
+        return sla.Sketch.from_row(ReviewSketch.objects.get(scope=scope, key=key))
+
+    def test_review_page_records_wait(self):
+        """Test saving a review counts the wait for all work, the category and the mentor, once"""
+        submission = self.submission(hours_ago=5)
+        self.client.force_login(self.mentor)
+        url = reverse('materials:review_submission', args=[submission.pk])
+        self.client.post(url, {'rating': 'good', 'feedback': 'Nice', 'recommendation': ''})
+        self.client.post(url, {'rating': 'excellent', 'feedback': 'Even better', 'recommendation': ''})
+
+        self.assertEqual(ReviewSketch.objects.count(), 3)
+        for scope, key in [('all', 0), ('category', self.design.pk), ('mentor', self.mentor.pk)]:
+            sketch = self.sketch(scope, key)
+            self.assertEqual(sketch.count, 1)
+            self.assertAlmostEqual(sketch.quantile(0.5) / 3600, 5, delta=5 * sla.RELATIVE_ACCURACY)
+
+    def test_rebuild_matches_incremental(self):
+        """Test rebuild_review_sla recomputes the same sketches the reviews built"""
+        other = SkillCategory.objects.create(name='Web Development', slug='web-development')
+        for hours in (1, 3, 8, 30, 72):
+            self.review(self.submission(hours, category=other if hours > 10 else None))
+        self.review(self.submission(2), mentor=self.staff)
+        before = {(row.scope, row.key): (row.count, row.buckets) for row in ReviewSketch.objects.all()}
+
+        out = io.StringIO()
+        call_command('rebuild_review_sla', stdout=out)
+
+        self.assertIn('Counted 6 review(s)', out.getvalue())
+        after = {(row.scope, row.key): (row.count, row.buckets) for row in ReviewSketch.objects.all()}
+        self.assertEqual(after, before)
+        self.assertEqual(after[('category', other.pk)][0], 2)
+
+    def test_dashboard_reads_sketches_only(self):
+        """Test the dashboard's turnaround costs two queries however many reviews there are"""
+        for hours in range(1, 21):
+            self.review(self.submission(hours))
+        with self.assertNumQueries(2):
+            turnaround = sla.dashboard(self.mentor)
+        self.assertEqual(turnaround['overall'].sketch.count, 20)
+        self.assertEqual([row.label for row in turnaround['categories']], ['Graphic Design'])
+        self.assertEqual(turnaround['mine'].sketch.count, 20)
+
+        self.client.force_login(self.mentor)
+        response = self.client.get(reverse('materials:mentor_dashboard'))
+        self.assertContains(response, 'Review Turnaround')
+        self.assertContains(response, turnaround['overall'].p90)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics(self):
+        """Test /metrics serves a Prometheus summary to staff and to the configured token only"""
+        self.review(self.submission(2))
+        url = reverse('materials:metrics')
+        self.assertEqual(url, '/metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE tujiimarishe_review_wait_seconds summary', body)
+        self.assertIn('tujiimarishe_review_wait_seconds_count 1\n', body)
+        self.assertIn('tujiimarishe_review_wait_seconds_count{category="Graphic Design"} 1\n', body)
+        self.assertIn('tujiimarishe_review_wait_seconds{mentor="mentor",quantile="0.99"}', body)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
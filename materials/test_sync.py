@@ -0,0 +1,99 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from . import api
+from .models import CatalogueChange, LearningMaterial, SkillCategory, UserSkillAccess
+
+User = get_user_model()
+
+
+class DeltaSyncTests(TestCase):
+    """Test change tracking and the /api/v1/sync/ endpoint"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        self.material = LearningMaterial.objects.create(
+            category=self.category, title='Intro', description='d', material_type='video',
+            youtube_url='https://youtu.be/x', access_level='basic', order=1,
+        )
+        self.client.force_login(self.user)
+
+    def sync(self, since=None):
+        url = reverse('materials:api_sync') + (f'?since={since}' if since is not None else '')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_full_snapshot_then_empty_delta(self):
+        """Test a first sync returns everything and a repeat returns nothing"""
+        data = self.sync()
+        self.assertEqual([c['slug'] for c in data['categories']['updated']], ['graphic-design'])
+        self.assertEqual([m['title'] for m in data['materials']['updated']], ['Intro'])
+
+        again = self.sync(data['cursor'])
+        self.assertEqual(again['cursor'], data['cursor'])
+        self.assertEqual(again['materials'], {'updated': [], 'deleted': []})
+
+    def test_updates_and_tombstones(self):
+        """Test edits and deletes after the cursor are returned as a delta"""
+        cursor = self.sync()['cursor']
+        self.material.title = 'Introduction'
+        self.material.save()
+        other = LearningMaterial.objects.create(
+            category=self.category, title='Gone', description='d', material_type='video',
+            youtube_url='https://youtu.be/y', access_level='basic', order=2,
+        )
+        other_id = other.pk
+        other.delete()
+
+        data = self.sync(cursor)
+        self.assertEqual([m['title'] for m in data['materials']['updated']], ['Introduction'])
+        self.assertEqual(data['materials']['deleted'], [other_id])
+        self.assertEqual(data['categories']['updated'], [])
+
+    def test_log_keeps_one_row_per_object(self):
+        """Test repeated edits replace the object's change row"""
+        for i in range(5):
+            self.material.order = i
+            self.material.save()
+        self.assertEqual(CatalogueChange.objects.filter(kind='material', object_id=self.material.pk).count(), 1)
+
+    def test_entitlements_are_private(self):
+        """Test users only see their own access changes"""
+        cursor = self.sync()['cursor']
+        other = User.objects.create_user(username='other', password='testpass123!')
+        UserSkillAccess.objects.create(user=other, category=self.category, access_level='premium')
+        mine = UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='enterprise')
+
+        data = self.sync(cursor)
+        self.assertEqual(data['access']['updated'], [{'id': mine.pk, 'category': self.category.pk, 'tier': 'enterprise'}])
+
+        mine_id = mine.pk
+        mine.delete()
+        self.assertEqual(self.sync(data['cursor'])['access']['deleted'], [mine_id])
+
+    def test_paged_sync(self):
+        """Test large deltas are split with more=true"""
+        for i in range(4):
+            LearningMaterial.objects.create(
+                category=self.category, title=f'Lesson {i}', description='d', material_type='video',
+                youtube_url='https://youtu.be/z', access_level='basic', order=i + 2,
+            )
+        titles, cursor, more = [], None, True
+        with mock.patch.object(api, 'SYNC_PAGE_SIZE', 3):
+            while more:
+                data = self.sync(cursor)
+                titles += [m['title'] for m in data['materials']['updated']]
+                cursor, more = data['cursor'], data['more']
+        self.assertEqual(sorted(titles), sorted(LearningMaterial.objects.values_list('title', flat=True)))
+
+    def test_bad_cursor(self):
+        """Test a malformed cursor is rejected"""
+        self.assertEqual(self.client.get(reverse('materials:api_sync') + '?since=abc').status_code, 400)
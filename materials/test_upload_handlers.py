@@ -0,0 +1,102 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import WorkSubmission
+from .upload_handlers import UNKNOWN_TYPE, InspectingUploadHandler, sniff_content_type
+
+User = get_user_model()
+
+TEMP_MEDIA = tempfile.mkdtemp()
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 2000
+
+
+class SniffContentTypeTests(SimpleTestCase):
+    """Test MIME detection from magic bytes"""
+
+    def test_known_signatures(self):
+        """Test common submission formats are recognised"""
+        self.assertEqual(sniff_content_type(b'%PDF-1.7\n'), 'application/pdf')
+        self.assertEqual(sniff_content_type(PNG[:16]), 'image/png')
+        self.assertEqual(sniff_content_type(b'\xff\xd8\xff\xe0\x00\x10JFIF'), 'image/jpeg')
+        self.assertEqual(sniff_content_type(b'RIFF\x00\x00\x00\x00WEBPVP8 '), 'image/webp')
+        self.assertEqual(sniff_content_type(b'\x00\x00\x00\x18ftypmp42'), 'video/mp4')
+
+    def test_unknown_bytes(self):
+        """Test anything else is reported as octet-stream"""
+        self.assertEqual(sniff_content_type(b'<?php echo 1; ?>'), UNKNOWN_TYPE)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class InspectingUploadHandlerTests(TestCase):
+    """Test uploads are hashed, sniffed and size-checked as they stream in"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.client.force_login(self.user)
+
+    def submit(self, name, content, content_type='application/octet-stream'):
+        return self.client.post(reverse('materials:submit_work'), {
+            'title': 'Poster', 'description': 'My poster',
+            'file': SimpleUploadedFile(name, content, content_type=content_type),
+        })
+
+    def test_accepted_upload_records_metadata(self):
+        """Test the hash, detected type and size are stored on the submission"""
+        response = self.submit('poster.png', PNG)
+        self.assertRedirects(response, reverse('materials:my_submissions'), fetch_redirect_response=False)
+
+        submission = WorkSubmission.objects.get()
+        self.assertEqual(submission.sha256, hashlib.sha256(PNG).hexdigest())
+        self.assertEqual(submission.content_type, 'image/png')
+        self.assertEqual(submission.file_size, len(PNG))
+
+    def test_disguised_file_rejected(self):
+        """Test the extension and browser Content-Type are not trusted"""
+        response = self.submit('poster.png', b'MZ\x90\x00' + b'\x00' * 100, content_type='image/png')
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'file', 'This file type is not allowed.')
+        self.assertFalse(WorkSubmission.objects.exists())
+
+    def test_rejection_stops_storing(self):
+        """Test the handler stops storing the upload at the first rejected chunk"""
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile('a.exe', b'MZ' + b'\x00' * 1000000)})
+        handler = InspectingUploadHandler(request)
+        handler.new_file('file', 'a.exe', 'application/octet-stream', 1000002)
+        with self.assertRaises(StopUpload) as caught:
+            handler.receive_data_chunk(b'MZ' + b'\x00' * 65534, 0)
+        self.assertFalse(caught.exception.connection_reset)
+        self.assertEqual(request.upload_rejections, {'file': 'This file type is not allowed.'})
+        handler.upload_interrupted()
+
+        request.upload_handlers = [InspectingUploadHandler(request)]
+        self.assertNotIn('file', request.FILES)
+        # The rest of the body was drained so the browser can read the response
+        self.assertEqual(request.META['wsgi.input'].read(), b'')
+
+    @override_settings(UPLOAD_TYPE_LIMITS={'file': {'image/png': 1024}})
+    def test_oversized_file_rejected(self):
+        """Test per-type size limits are enforced"""
+        response = self.submit('poster.png', PNG)
+        self.assertFormError(response.context['form'], 'file', 'Files of this type must be 1.0\xa0KB or smaller.')
+        self.assertFalse(WorkSubmission.objects.exists())
+
+    def test_direct_save_describes_file(self):
+        """Test files saved outside a request get the same metadata"""
+        submission = WorkSubmission.objects.create(
+            user=self.user, title='Notes', description='d',
+            file=SimpleUploadedFile('notes.pdf', b'%PDF-1.4 notes', content_type='application/pdf'),
+        )
+        self.assertEqual(submission.sha256, hashlib.sha256(b'%PDF-1.4 notes').hexdigest())
+        self.assertEqual((submission.content_type, submission.file_size), ('application/pdf', 14))
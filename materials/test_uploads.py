@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from taskqueue.models import Task
+from .models import SkillCategory, UploadSession, WorkSubmission
+
+User = get_user_model()
+
+TEMP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=Path(TEMP_ROOT) / 'media', CHUNKED_UPLOAD_DIR=Path(TEMP_ROOT) / 'chunks',
+                   CHUNKED_UPLOAD_MAX_CHUNK=1024)
+class ChunkedUploadTests(TestCase):
+    """Test the resumable upload protocol for work submissions"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        self.client.force_login(self.user)
+        self.data = b'%PDF-1.4\n' + bytes(range(256)) * 10  # three chunks
+
+    def start(self, size=None):
+        response = self.client.post(reverse('materials:upload_create'), {
+            'title': 'Poster', 'description': 'My poster', 'filename': 'poster.png',
+            'size': size or len(self.data), 'category_id': self.category.id,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def patch(self, url, offset, body):
+        return self.client.generic(
+            'PATCH', url, body, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_upload_in_chunks_and_complete(self):
+        """Test chunks append in order and completion creates the submission"""
+        session = self.start()
+        offset = 0
+        while offset < len(self.data):
+            response = self.patch(session['url'], offset, self.data[offset:offset + 1024])
+            self.assertEqual(response.status_code, 204)
+            offset = int(response['Upload-Offset'])
+
+        response = self.client.post(session['complete_url'])
+        self.assertEqual(response.status_code, 201)
+
+        submission = WorkSubmission.objects.get()
+        self.assertEqual((submission.user, submission.category), (self.user, self.category))
+        with submission.file.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(UploadSession.objects.get().temp_path.exists())
+        self.assertTrue(Task.objects.filter(name='materials.tasks.notify_mentors_of_submission').exists())
+
+        # Completing again is harmless
+        self.assertEqual(self.client.post(session['complete_url']).json()['submission_id'], submission.pk)
+        self.assertEqual(WorkSubmission.objects.count(), 1)
+
+    def test_resume_reports_offset(self):
+        """Test a client can ask where to resume after a dropped connection"""
+        session = self.start()
+        self.patch(session['url'], 0, self.data[:1024])
+
+        response = self.client.head(session['url'])
+        self.assertEqual(response['Upload-Offset'], '1024')
+        self.assertEqual(self.client.get(session['url']).json()['offset'], 1024)
+
+    def test_wrong_offset_conflicts(self):
+        """Test a chunk at a stale offset is refused with the current offset"""
+        session = self.start()
+        self.patch(session['url'], 0, self.data[:1024])
+
+        response = self.patch(session['url'], 0, self.data[:1024])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '1024')
+
+    def test_oversized_chunk_rejected(self):
+        """Test chunks above CHUNKED_UPLOAD_MAX_CHUNK are refused"""
+        session = self.start()
+        response = self.patch(session['url'], 0, self.data[:2048])
+        self.assertEqual(response.status_code, 413)
+
+    def test_incomplete_upload_cannot_finish(self):
+        """Test completion waits for every byte"""
+        session = self.start()
+        self.patch(session['url'], 0, self.data[:1024])
+        self.assertEqual(self.client.post(session['complete_url']).status_code, 409)
+        self.assertFalse(WorkSubmission.objects.exists())
+
+    def test_other_users_cannot_touch_upload(self):
+        """Test upload sessions are private to their owner"""
+        session = self.start()
+        User.objects.create_user(username='other', password='testpass123!')
+        self.client.login(username='other', password='testpass123!')
+        self.assertEqual(self.patch(session['url'], 0, self.data[:1024]).status_code, 404)
+
+    def test_disallowed_type_rejected_on_complete(self):
+        """Test a finished upload of a disallowed type is refused and discarded"""
+        self.data = b'#!/bin/sh\necho hi\n'
+        session = self.start()
+        self.patch(session['url'], 0, self.data)
+
+        self.assertEqual(self.client.post(session['complete_url']).status_code, 415)
+        self.assertFalse(WorkSubmission.objects.exists())
+        self.assertFalse(UploadSession.objects.exists())
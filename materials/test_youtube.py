@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .models import LearningMaterial, SkillCategory
+from .youtube import parse_timestamp, parse_youtube_url
+
+User = get_user_model()
+
+
+class ParseYoutubeUrlTests(SimpleTestCase):
+    """Test video IDs and start times are extracted from every URL form"""
+
+    def test_url_forms(self):
+        """Test watch, youtu.be, shorts, embed and live URLs"""
+        cases = {
+            'https://www.youtube.com/watch?v=dQw4w9WgXcQ': ('dQw4w9WgXcQ', None),
+            'https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=1m30s': ('dQw4w9WgXcQ', 90),
+            'https://youtu.be/dQw4w9WgXcQ?t=42': ('dQw4w9WgXcQ', 42),
+            'https://www.youtube.com/shorts/dQw4w9WgXcQ': ('dQw4w9WgXcQ', None),
+            'https://www.youtube.com/embed/dQw4w9WgXcQ?start=15': ('dQw4w9WgXcQ', 15),
+            'https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ': ('dQw4w9WgXcQ', None),
+            'https://www.youtube.com/live/dQw4w9WgXcQ': ('dQw4w9WgXcQ', None),
+            'https://youtube.com/watch?v=dQw4w9WgXcQ#t=1h2m3s': ('dQw4w9WgXcQ', 3723),
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(parse_youtube_url(url), expected)
+
+    def test_non_youtube_urls(self):
+        """Test other sites and malformed IDs are rejected"""
+        for url in ['https://vimeo.com/12345', 'https://www.youtube.com/watch?v=short', 'https://evil.com/embed/dQw4w9WgXcQ', '', None]:
+            with self.subTest(url=url):
+                self.assertEqual(parse_youtube_url(url), (None, None))
+
+    def test_timestamps(self):
+        """Test the timestamp formats YouTube emits"""
+        self.assertEqual(parse_timestamp('90'), 90)
+        self.assertEqual(parse_timestamp('2m'), 120)
+        self.assertIsNone(parse_timestamp('soon'))
+
+
+class VideoFacadeTests(TestCase):
+    """Test lesson pages defer the YouTube player until play is pressed"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+        self.material = LearningMaterial.objects.create(
+            category=self.category, title='Layout', description='d', material_type='video',
+            youtube_url='https://youtu.be/dQw4w9WgXcQ?t=30', access_level='basic', order=1,
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('materials:material_detail', args=[self.category.id, self.material.id])
+
+    def test_id_parsed_on_save(self):
+        """Test the canonical ID and start time are stored with the material"""
+        self.assertEqual((self.material.youtube_id, self.material.youtube_start), ('dQw4w9WgXcQ', 30))
+        self.assertEqual(self.material.get_youtube_embed_url(), 'https://www.youtube.com/embed/dQw4w9WgXcQ?start=30')
+
+        self.material.youtube_url = 'https://example.com/video'
+        self.material.save()
+        self.assertEqual(self.material.youtube_id, '')
+        self.assertIsNone(self.material.get_youtube_embed_url())
+
+    def test_page_renders_facade_not_iframe(self):
+        """Test the page ships a poster and a privacy-enhanced URL, but no player"""
+        html = self.client.get(self.url).content.decode()
+        self.assertNotIn('<iframe', html)
+        self.assertIn('data-embed-url="https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ?start=30"', html)
+        self.assertIn('https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg', html)
+
+    def test_lite_mode_skips_poster(self):
+        """Test Save-Data visitors get the play button without the poster image"""
+        html = self.client.get(self.url, HTTP_SAVE_DATA='on').content.decode()
+        self.assertIn('video-facade', html)
+        self.assertNotIn('i.ytimg.com', html)
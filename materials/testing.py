@@ -0,0 +1,73 @@
+"""
+Test helpers shared by the materials and users test modules.
+
+``QueryCountMixin.assertConstantQueries`` renders a view at several data
+sizes and fails if the number of SQL queries grows with the number of rows,
+printing the statements that were repeated so the N+1 is easy to find.
+"""
+import re
+from collections import Counter
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from . import progress
+
+# Row counts each view is rendered at
+QUERY_COUNT_SIZES = (1, 10, 100)
+
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r'IN \((?:\?, )*\?\)')
+
+
+def normalize_sql(sql):
+    """Strip literals from a statement so repeated queries group together"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+def repeated_sql_diff(small, large):
+    """Describe which normalized statements ran more often in ``large``"""
+    before = Counter(normalize_sql(q['sql']) for q in small)
+    after = Counter(normalize_sql(q['sql']) for q in large)
+    lines = []
+    for sql, count in after.most_common():
+        extra = count - before.get(sql, 0)
+        if extra > 0:
+            lines.append(f'  +{extra} (x{count}, was x{before.get(sql, 0)}): {sql}')
+    return '\n'.join(lines)
+
+
+class QueryCountMixin:
+    """Assert that a view's query count does not depend on the rows it shows"""
+
+    query_count_sizes = QUERY_COUNT_SIZES
+
+    def count_queries(self, url, seed, size, status=200):
+        """Seed ``size`` rows, render ``url`` and roll the data back"""
+        with transaction.atomic():
+            seed(size)
+            # Warm-up request so per-process caches (content types, etc.)
+            # do not show up as a difference between sizes.
+            self.client.get(url)
+            # A batch of progress events falling due mid-request is not the view's query
+            progress.discard()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            transaction.set_rollback(True)
+        self.assertEqual(response.status_code, status, f'{url} returned {response.status_code}')
+        return list(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, seed, status=200):
+        """Render ``url`` at 1, 10 and 100 rows and compare query counts; every response must be ``status``"""
+        runs = [(size, self.count_queries(url, seed, size, status)) for size in self.query_count_sizes]
+        smallest_size, smallest = runs[0]
+        for size, queries in runs[1:]:
+            if len(queries) != len(smallest):
+                self.fail(
+                    f'{url} ran {len(smallest)} queries with {smallest_size} row(s) '
+                    f'but {len(queries)} with {size} rows. Repeated SQL:\n'
+                    f'{repeated_sql_diff(smallest, queries)}'
+                )
@@ -0,0 +1,157 @@
+"""
+Single-pass inspection of uploaded files.
+
+InspectingUploadHandler streams each incoming chunk to a temp file on disk,
+and while the bytes are in hand it also:
+
+* updates a SHA-256 of the content,
+* detects the real type from the leading magic bytes (the browser's
+  Content-Type and the file extension are not trusted),
+* enforces the per-type size limits in UPLOAD_TYPE_LIMITS.
+
+A file of a disallowed type or over its limit stops the upload as soon as
+that is known: the handler raises StopUpload, so the rest of the request
+body is drained without being written or hashed, and the browser gets the
+re-rendered form rather than a reset connection. The reason is kept in
+``request.upload_rejections`` ({field name: message}), which forms built with
+``InspectedUploadsMixin.for_request()`` report as a field error. Accepted
+files carry ``sha256`` and ``detected_type`` attributes, which the models
+copy onto the row so nothing downstream has to read the file again.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+SNIFF_BYTES = 16
+UNKNOWN_TYPE = 'application/octet-stream'
+
+# (offset, magic bytes, MIME type); first match wins
+MAGIC_NUMBERS = [
+    (0, b'%PDF-', 'application/pdf'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+    (0, b'8BPS', 'image/vnd.adobe.photoshop'),
+    (0, b'PK\x03\x04', 'application/zip'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),  # legacy .doc/.ppt/.xls
+    (4, b'ftyp', 'video/mp4'),
+    (0, b'ID3', 'audio/mpeg'),
+]
+
+
+def sniff_content_type(head):
+    """Detect a MIME type from the first bytes of a file"""
+    for offset, magic, content_type in MAGIC_NUMBERS:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type
+    return UNKNOWN_TYPE
+
+
+def upload_limits(field_name):
+    """Allowed types and their size limits for a form field, or None for no policy"""
+    return getattr(settings, 'UPLOAD_TYPE_LIMITS', {}).get(field_name)
+
+
+class FileInspector:
+    """Hashes, sniffs and size-checks a file one chunk at a time"""
+
+    def __init__(self, limits=None):
+        self.limits = limits
+        self.hash = hashlib.sha256()
+        self.head = b''
+        self.size = 0
+        self.content_type = None
+        self.rejection = None
+
+    def feed(self, data):
+        """Inspect the next chunk; returns False once the file has been rejected"""
+        if self.rejection:
+            return False
+        if self.content_type is None:
+            self.head += data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.detect()
+        self.size += len(data)
+        self.check_size(self.size)
+        if self.rejection:
+            return False
+        self.hash.update(data)
+        return True
+
+    def detect(self):
+        self.content_type = sniff_content_type(self.head)
+        if self.limits is not None and self.content_type not in self.limits:
+            self.reject('This file type is not allowed.')
+
+    def check_size(self, size):
+        """Reject the file if ``size`` bytes is over the limit for its type"""
+        limit = self.limits.get(self.content_type) if self.limits else None
+        if limit is not None and size > limit:
+            self.reject(f'Files of this type must be {filesizeformat(limit)} or smaller.')
+        return self
+
+    def reject(self, message):
+        if not self.rejection:
+            self.rejection = message
+
+    def finish(self):
+        """Call after the last chunk; sniffs files shorter than SNIFF_BYTES"""
+        if self.content_type is None:
+            self.detect()
+        return self
+
+    @property
+    def sha256(self):
+        return '' if self.rejection else self.hash.hexdigest()
+
+
+def inspect_file(f, limits=None):
+    """Inspect a file object that did not come through InspectingUploadHandler"""
+    inspector = FileInspector(limits)
+    if hasattr(f, 'seek'):
+        f.seek(0)
+    for chunk in f.chunks() if hasattr(f, 'chunks') else iter(lambda: f.read(64 * 1024), b''):
+        if not inspector.feed(chunk):
+            break
+    if hasattr(f, 'seek'):
+        f.seek(0)
+    return inspector.finish()
+
+
+def describe_file(f):
+    """Return ``(sha256, content_type, size)`` for an upload, reusing the handler's work"""
+    if getattr(f, 'sha256', None):
+        return f.sha256, f.detected_type, f.size
+    inspector = inspect_file(f)
+    return inspector.sha256, inspector.content_type, inspector.size
+
+
+class InspectingUploadHandler(TemporaryFileUploadHandler):
+    """Streams uploads to disk while hashing, sniffing and size-checking them"""
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.inspector = FileInspector(upload_limits(field_name))
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.inspector.feed(raw_data):
+            if self.request is not None:
+                self.request.upload_rejections = {
+                    **getattr(self.request, 'upload_rejections', {}), self.field_name: self.inspector.rejection,
+                }
+            # Fields after this file in the body are lost. The rest is read and
+            # discarded so the response reaches the browser
+            raise StopUpload(connection_reset=False)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        self.inspector.finish()
+        upload.sha256 = self.inspector.sha256
+        upload.detected_type = self.inspector.content_type
+        upload.rejection = self.inspector.rejection
+        return upload
@@ -0,0 +1,153 @@
+"""
+Chunked, resumable uploads for work submissions (tus-style).
+
+    POST   /uploads/                    create a session (title, description, filename, size)
+    HEAD   /uploads/<id>/               current offset in the Upload-Offset header
+    PATCH  /uploads/<id>/               append a chunk; Upload-Offset must equal the current offset
+    POST   /uploads/<id>/complete/      turn the finished file into a WorkSubmission
+    DELETE /uploads/<id>/               abandon the upload
+
+Chunks are streamed from the request straight into a temp file in
+CHUNKED_UPLOAD_DIR, so memory per upload stays at one read buffer however
+large the file is. A conditional UPDATE on the session row lets only one
+request write at a given offset; nothing else is locked, so concurrent
+uploads do not wait on each other.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import UploadSession, WorkSubmission
+from .upload_handlers import inspect_file, upload_limits
+
+READ_BUFFER_SIZE = 64 * 1024
+WRITER_LEASE = timedelta(minutes=5)
+
+
+class UploadConflict(Exception):
+    """The client's offset is stale or another request is writing this upload"""
+
+
+class UploadRejected(Exception):
+    """The finished file is a disallowed type or over its size limit"""
+
+
+class UploadedTempFile(File):
+    """A finished temp file; storage moves it into place rather than copying"""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return str(self.path)
+
+
+def start_upload(user, category, title, description, filename, total_size):
+    """Create an upload session and its empty temp file"""
+    session = UploadSession.objects.create(
+        user=user, category=category, title=title, description=description,
+        filename=os.path.basename(filename), total_size=total_size,
+    )
+    session.temp_path.parent.mkdir(parents=True, exist_ok=True)
+    session.temp_path.touch()
+    return session
+
+
+def write_chunk(session, expected_offset, stream, length):
+    """Append ``length`` bytes from ``stream`` at ``expected_offset``; returns the new offset.
+
+    Raises UploadConflict if the offset is stale or another request holds the
+    writer claim. If the client drops mid-chunk, the bytes that did arrive are
+    kept and the client resumes from the returned offset.
+    """
+    now = timezone.now()
+    claimed = UploadSession.objects.filter(
+        Q(writer_until__isnull=True) | Q(writer_until__lt=now),
+        pk=session.pk, offset=expected_offset, submission__isnull=True,
+    ).update(writer_until=now + WRITER_LEASE)
+    if not claimed:
+        raise UploadConflict()
+
+    written = 0
+    try:
+        with open(session.temp_path, 'r+b') as f:
+            # Discard anything past the committed offset from an interrupted write
+            f.truncate(expected_offset)
+            f.seek(expected_offset)
+            while written < length:
+                chunk = stream.read(min(READ_BUFFER_SIZE, length - written))
+                if not chunk:
+                    break
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError:
+        pass  # connection dropped; keep what was written
+    finally:
+        UploadSession.objects.filter(pk=session.pk).update(
+            offset=expected_offset + written, writer_until=None, updated_at=timezone.now()
+        )
+    return expected_offset + written
+
+
+def finish_upload(session_id, user):
+    """Atomically turn a complete upload into a WorkSubmission.
+
+    Returns ``(submission, created)``; finishing twice returns the same submission.
+    Raises UploadRejected if the file fails the UPLOAD_TYPE_LIMITS policy.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id, user=user)
+        if session.submission_id:
+            return session.submission, False
+        if not session.is_complete or (session.writer_until and session.writer_until > timezone.now()):
+            raise UploadConflict()
+
+        submission = WorkSubmission(
+            user=session.user, category=session.category,
+            title=session.title, description=session.description,
+        )
+        upload = UploadedTempFile(session.temp_path, session.filename)
+        try:
+            # Chunks arrive across requests, so the finished file is read once here
+            inspection = inspect_file(upload, upload_limits('file'))
+            if inspection.rejection:
+                raise UploadRejected(inspection.rejection)
+            submission.sha256 = inspection.sha256
+            submission.content_type = inspection.content_type
+            submission.file_size = inspection.size
+            submission.file.save(session.filename, upload, save=False)
+        finally:
+            upload.close()
+        try:
+            submission.save()
+            session.submission = submission
+            session.save(update_fields=['submission', 'updated_at'])
+        except Exception:
+            submission.file.delete(save=False)
+            raise
+    return submission, True
+
+
+def abandon_upload(session):
+    """Delete an unfinished upload and its temp file"""
+    session.temp_path.unlink(missing_ok=True)
+    session.delete()
+
+
+def purge_stale_uploads():
+    """Remove unfinished uploads untouched for CHUNKED_UPLOAD_EXPIRY seconds"""
+    cutoff = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+    stale = UploadSession.objects.filter(submission__isnull=True, updated_at__lt=cutoff)
+    count = 0
+    for session in stale.iterator():
+        abandon_upload(session)
+        count += 1
+    return count
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'materials'
 
@@ -8,6 +8,9 @@ urlpatterns = [
     path('', views.material_list, name='my_materials'),
     path('category/<int:category_id>/', views.category_detail, name='category_detail'),
     path('category/<int:category_id>/material/<int:material_id>/', views.material_detail, name='material_detail'),
+    path('category/<int:category_id>/material/<int:material_id>/download/', views.material_download, name='material_download'),
+    path('category/<int:category_id>/material/<int:material_id>/complete/', views.material_complete, name='material_complete'),
+    path('category/<int:category_id>/pack/', views.course_pack, name='course_pack'),
     
     # Payments
     path('checkout/<int:category_id>/<str:level>/', views.checkout, name='checkout'),
@@ -21,7 +24,22 @@ urlpatterns = [
     path('submission/<int:pk>/', views.submission_detail, name='submission_detail'),
     path('submission/<int:pk>/review/', views.review_submission, name='review_submission'),
     path('mentor-dashboard/', views.mentor_dashboard, name='mentor_dashboard'),
+    path('mentor-dashboard/profile/', views.mentor_profile, name='mentor_profile'),
+    # Prometheus scrape target (materials/sla.py)
+    path('metrics', views.metrics, name='metrics'),
+    
+    # Resumable (chunked) uploads for work submissions
+    path('uploads/', views.upload_create, name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.upload_complete, name='upload_complete'),
     
     # Dashboard
     path('my-learning/', views.my_learning, name='my_learning'),
+    
+    # Catalogue JSON API for the mobile client
+    path('api/v1/', api.api_root, name='api_root'),
+    path('api/v1/categories/', api.api_categories, name='api_categories'),
+    path('api/v1/materials/', api.api_materials, name='api_materials'),
+    path('api/v1/access/', api.api_access, name='api_access'),
+    path('api/v1/sync/', api.api_sync, name='api_sync'),
 ]
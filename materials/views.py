@@ -1,45 +1,66 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import hmac
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from .models import SkillCategory, LearningMaterial, UserSkillAccess, Payment, WorkSubmission, MentorFeedback
-from .forms import WorkSubmissionForm, MentorFeedbackForm
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
+from users.roles import get_roles
+from .models import (
+    SkillCategory, LearningMaterial, UserSkillAccess, Payment, WorkSubmission, MentorFeedback, UploadSession,
+    CategoryProgress,
+)
+from .forms import WorkSubmissionForm, MentorFeedbackForm, MentorProfileForm
+from .catalogue import acatalogue_version
+from .shortcuts import arender
+from . import assignment, packs, progress, recommendations, sla, tasks, uploads
 
 # ==================== MATERIALS VIEWS ====================
 
-def material_list(request):
+async def material_list(request):
     """Browse all skills and materials"""
-    categories = SkillCategory.objects.all().prefetch_related('materials')
+    categories = [category async for category in SkillCategory.objects.all().prefetch_related('materials')]
     
     # Get user's access levels if logged in
+    user = await request.auser()
     user_access = {}
-    if request.user.is_authenticated:
-        access_queryset = UserSkillAccess.objects.filter(user=request.user)
-        user_access = {access.category_id: access.access_level for access in access_queryset}
+    purchases = []
+    if user.is_authenticated:
+        purchases = [access async for access in UserSkillAccess.objects.filter(user=user).select_related('category')]
+        user_access = {access.category_id: access.access_level for access in purchases}
     
     context = {
         'categories': categories,
+        'purchases': purchases,
         'user_access': user_access,
     }
-    return render(request, 'materials/my_materials.html', context)
+    return await arender(request, 'materials/my_materials.html', context)
 
 
 @login_required
-def category_detail(request, category_id):
+async def category_detail(request, category_id):
     """View materials for a specific skill category"""
-    category = get_object_or_404(SkillCategory, pk=category_id)
+    category = await aget_object_or_404(SkillCategory, pk=category_id)
+    user = await request.auser()
     
     # Get user's access level for this category
     user_access_level = 'basic'  # Default (free)
     try:
-        access = UserSkillAccess.objects.get(user=request.user, category=category)
+        access = await UserSkillAccess.objects.aget(user=user, category=category)
         user_access_level = access.access_level
     except UserSkillAccess.DoesNotExist:
         # User has only basic (free) access
         pass
     
     # Get all materials for this category
-    all_materials = LearningMaterial.objects.filter(category=category).order_by('order')
+    all_materials = [material async for material in LearningMaterial.objects.filter(category=category).order_by('order')]
     
     # Filter materials based on user's access level
     accessible_materials = []
@@ -61,12 +82,17 @@ def category_detail(request, category_id):
                 locked_materials.append(material)
     
     # Calculate percentages
-    total_materials = all_materials.count()
+    total_materials = len(all_materials)
     accessible_count = len(accessible_materials)
     percentage_unlocked = (accessible_count / total_materials * 100) if total_materials > 0 else 0
     
+    progress_summary = await CategoryProgress.objects.filter(
+        user=user, category=category
+    ).select_related('next_material').afirst()
+    
     context = {
         'category': category,
+        'progress': progress_summary,
         'user_access_level': user_access_level,
         'accessible_materials': accessible_materials,
         'locked_materials': locked_materials,
@@ -74,47 +100,122 @@ def category_detail(request, category_id):
         'accessible_count': accessible_count,
         'percentage_unlocked': round(percentage_unlocked),
     }
-    return render(request, 'materials/category_detail.html', context)
+    return await arender(request, 'materials/category_detail.html', context)
 
 
-@login_required
-def material_detail(request, category_id, material_id):
-    """View a specific learning material (video or PDF)"""
-    category = get_object_or_404(SkillCategory, pk=category_id)
-    material = get_object_or_404(LearningMaterial, pk=material_id, category=category)
-    
+async def _can_access(user, material):
+    """Whether the user's tier in the material's category unlocks it"""
     # Check user's access level for this category
     user_access_level = 'basic'  # Default
     try:
-        access = UserSkillAccess.objects.get(user=request.user, category=material.category)
+        access = await UserSkillAccess.objects.aget(user=user, category_id=material.category_id)
         user_access_level = access.access_level
     except UserSkillAccess.DoesNotExist:
         pass
     
-    # Check if user can access this material
-    can_access = False
     if material.access_level == 'basic':
-        can_access = True
-    elif material.access_level == 'enterprise' and user_access_level in ['enterprise', 'premium']:
-        can_access = True
-    elif material.access_level == 'premium' and user_access_level == 'premium':
-        can_access = True
+        return True
+    if material.access_level == 'enterprise':
+        return user_access_level in ['enterprise', 'premium']
+    if material.access_level == 'premium':
+        return user_access_level == 'premium'
+    return False
+
+
+def _locked(request, material):
+    messages.warning(request, f'You need {material.get_access_level_display()} access to view this material.')
+    return redirect('materials:checkout', category_id=material.category_id, level=material.access_level)
+
+
+@login_required
+async def material_detail(request, category_id, material_id):
+    """View a specific learning material (video or PDF)"""
+    material = await aget_object_or_404(
+        LearningMaterial.objects.select_related('category'), pk=material_id, category_id=category_id
+    )
+    user = await request.auser()
     
+    can_access = await _can_access(user, material)
     if not can_access:
-        messages.warning(request, f'You need {material.get_access_level_display()} access to view this material.')
-        return redirect('materials:checkout', category_id=material.category.id, level=material.access_level)
+        return _locked(request, material)
+    progress.record(user, material.id, progress.VIEW)
     
-    # Get related materials (same category, excluding current)
-    related_materials = LearningMaterial.objects.filter(
-        category=material.category
-    ).exclude(id=material.id).order_by('order')[:3]
+    # Lessons other learners took alongside this one (materials/recommendations.py)
+    related_materials = await recommendations.arelated_materials(user, material)
     
     context = {
         'material': material,
         'can_access': can_access,
         'related_materials': related_materials,
+        'embed_url': material.get_youtube_embed_url(privacy_enhanced=True),
     }
-    return render(request, 'materials/material_view.html', context)
+    return await arender(request, 'materials/material_view.html', context)
+
+
+@login_required
+async def material_download(request, category_id, material_id):
+    """Record a PDF download, then hand the learner over to the file"""
+    material = await aget_object_or_404(LearningMaterial, pk=material_id, category_id=category_id)
+    if not material.pdf_file:
+        raise Http404('This material has no PDF')
+    user = await request.auser()
+    if not await _can_access(user, material):
+        return _locked(request, material)
+    progress.record(user, material.id, progress.DOWNLOAD)
+    return redirect(material.pdf_file.url)
+
+
+@login_required
+@require_POST
+async def material_complete(request, category_id, material_id):
+    """Mark a material as completed"""
+    material = await aget_object_or_404(LearningMaterial, pk=material_id, category_id=category_id)
+    user = await request.auser()
+    if not await _can_access(user, material):
+        return _locked(request, material)
+    progress.record(user, material.id, progress.COMPLETE)
+    messages.success(request, f'Marked "{material.title}" as complete.')
+    return redirect('materials:material_detail', category_id=category_id, material_id=material.id)
+
+
+@login_required
+async def course_pack(request, category_id):
+    """Download every PDF the learner's tier unlocks in a category as one ZIP"""
+    category = await aget_object_or_404(SkillCategory, pk=category_id)
+    user = await request.auser()
+    
+    user_access_level = 'basic'
+    try:
+        access = await UserSkillAccess.objects.aget(user=user, category=category)
+        user_access_level = access.access_level
+    except UserSkillAccess.DoesNotExist:
+        pass
+    
+    # Everyone on a tier shares one stored pack per catalogue version
+    version = await acatalogue_version()
+    key = packs.pack_key(category.id, user_access_level, version)
+    name = await cache.aget(key)
+    if name:
+        pdf_ids = [pk async for pk in packs.pack_materials(category.id, user_access_level)
+                   .exclude(pdf_file='').exclude(pdf_file__isnull=True).values_list('pk', flat=True)]
+        progress.record_many(user, pdf_ids, progress.DOWNLOAD)
+        # Streamed rather than redirected to: the stored pack is only for this tier
+        response = StreamingHttpResponse(packs.aiter_stored(name), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{packs.pack_filename(category, user_access_level)}"'
+        return response
+    
+    materials = [material async for material in packs.pack_materials(category.id, user_access_level)]
+    if not any(material.pdf_file for material in materials):
+        messages.info(request, 'There are no PDFs to download for your access level yet.')
+        return redirect('materials:category_detail', category_id=category.id)
+    progress.record_many(user, [m.id for m in materials if m.pdf_file], progress.DOWNLOAD)
+    
+    if await cache.aadd(f'{key}:building', True, packs.BUILD_LOCK_TIMEOUT):
+        await sync_to_async(tasks.build_course_pack.enqueue)(category.id, user_access_level)
+    index, files = packs.pack_index(category, user_access_level, version, materials)
+    response = StreamingHttpResponse(packs.aiter_pack(index, files), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{packs.pack_filename(category, user_access_level)}"'
+    return response
 
 
 # ==================== PAYMENT VIEWS ====================
@@ -173,23 +274,26 @@ def checkout(request, category_id, level):
             # In production, you'd verify with Safaricom Daraja API
             # For now, we accept any valid-looking code
             
-            # Create payment record
-            payment = Payment.objects.create(
-                user=request.user,
-                category=category,
-                access_level=level,
-                amount=amount,
-                mpesa_code=mpesa_code,
-                phone_number=phone_number,
-                is_verified=True  # Auto-verify for simulation
-            )
-            
-            # Grant or upgrade access to user
-            user_access, created = UserSkillAccess.objects.update_or_create(
-                user=request.user,
-                category=category,
-                defaults={'access_level': level}
-            )
+            with transaction.atomic():
+                # Create payment record
+                payment = Payment.objects.create(
+                    user=request.user,
+                    category=category,
+                    access_level=level,
+                    amount=amount,
+                    mpesa_code=mpesa_code,
+                    phone_number=phone_number,
+                    is_verified=True  # Auto-verify for simulation
+                )
+                # Confirms the code and emails the receipt
+                tasks.verify_payment.enqueue(payment.id)
+
+                # Grant or upgrade access to user
+                user_access, created = UserSkillAccess.objects.update_or_create(
+                    user=request.user,
+                    category=category,
+                    defaults={'access_level': level}
+                )
             
             messages.success(request, f'🎉 Payment successful! You now have {level.title()} access to {category.name}')
             return redirect('materials:payment_success')
@@ -207,7 +311,7 @@ def checkout(request, category_id, level):
 def payment_success(request):
     """Payment success page"""
     # Get user's most recent payment
-    latest_payment = Payment.objects.filter(user=request.user, is_verified=True).first()
+    latest_payment = Payment.objects.filter(user=request.user, is_verified=True).select_related('category').first()
     
     context = {
         'latest_payment': latest_payment,
@@ -216,14 +320,18 @@ def payment_success(request):
 
 
 @login_required
-def payment_history(request):
+async def payment_history(request):
     """View all user's payments"""
-    payments = Payment.objects.filter(user=request.user).order_by('-created_at')
+    user = await request.auser()
+    payments = [
+        payment async for payment in
+        Payment.objects.filter(user=user).select_related('category').order_by('-created_at')
+    ]
     
     context = {
         'payments': payments,
     }
-    return render(request, 'materials/payment_history.html', context)
+    return await arender(request, 'users/payment_history.html', context)
 
 
 # ==================== WORK SUBMISSION VIEWS ====================
@@ -236,13 +344,14 @@ def submit_work(request, category_id=None):
         category = get_object_or_404(SkillCategory, pk=category_id)
     
     if request.method == 'POST':
-        form = WorkSubmissionForm(request.POST, request.FILES)
+        form = WorkSubmissionForm.for_request(request)(request.POST, request.FILES)
         if form.is_valid():
             submission = form.save(commit=False)
             submission.user = request.user
             if category:
                 submission.category = category
             submission.save()
+            tasks.notify_mentors_of_submission.enqueue(submission.id)
             messages.success(request, 'Your work has been submitted successfully! A mentor will review it soon.')
             return redirect('materials:my_submissions')
     else:
@@ -255,15 +364,122 @@ def submit_work(request, category_id=None):
     return render(request, 'materials/submit_work.html', context)
 
 
+# ==================== CHUNKED UPLOAD VIEWS ====================
+
+def _upload_status(session, status=200):
+    """JSON body and tus-style headers describing an upload session"""
+    response = JsonResponse({
+        'id': str(session.id),
+        'offset': session.offset,
+        'size': session.total_size,
+        'url': reverse('materials:upload_chunk', args=[session.id]),
+        'complete_url': reverse('materials:upload_complete', args=[session.id]),
+    }, status=status)
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.total_size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 @login_required
-def my_submissions(request):
+@require_POST
+def upload_create(request):
+    """Start a resumable upload for a work submission"""
+    title = request.POST.get('title', '').strip()
+    description = request.POST.get('description', '').strip()
+    filename = request.POST.get('filename', '').strip()
+    try:
+        total_size = int(request.POST.get('size', ''))
+    except ValueError:
+        total_size = 0
+    
+    errors = {}
+    if not title:
+        errors['title'] = 'Title is required'
+    if not description:
+        errors['description'] = 'Description is required'
+    if not filename:
+        errors['filename'] = 'Filename is required'
+    if not 0 < total_size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+        errors['size'] = f'File size must be between 1 byte and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes'
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+    
+    category = None
+    if request.POST.get('category_id'):
+        category = get_object_or_404(SkillCategory, pk=request.POST['category_id'])
+    
+    session = uploads.start_upload(request.user, category, title, description, filename, total_size)
+    response = _upload_status(session, status=201)
+    response['Location'] = reverse('materials:upload_chunk', args=[session.id])
+    return response
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def upload_chunk(request, upload_id):
+    """Report the resume offset (GET/HEAD), append a chunk (PATCH) or abandon (DELETE)"""
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    
+    if request.method == 'DELETE':
+        if session.submission_id:
+            return JsonResponse({'error': 'Upload already completed'}, status=409)
+        uploads.abandon_upload(session)
+        return HttpResponse(status=204)
+    
+    if request.method != 'PATCH':
+        return _upload_status(session)
+    
+    try:
+        expected_offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Upload-Offset and Content-Length headers are required'}, status=400)
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK or expected_offset + length > session.total_size:
+        return JsonResponse({'error': 'Chunk too large'}, status=413)
+    
+    try:
+        offset = uploads.write_chunk(session, expected_offset, request, length)
+    except uploads.UploadConflict:
+        session.refresh_from_db()
+        return _upload_status(session, status=409)
+    response = HttpResponse(status=204)
+    response['Upload-Offset'] = str(offset)
+    return response
+
+
+@login_required
+@require_POST
+def upload_complete(request, upload_id):
+    """Finish a resumable upload and create the WorkSubmission"""
+    get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    try:
+        submission, created = uploads.finish_upload(upload_id, request.user)
+    except uploads.UploadConflict:
+        session = UploadSession.objects.get(pk=upload_id)
+        return _upload_status(session, status=409)
+    except uploads.UploadRejected as exc:
+        uploads.abandon_upload(UploadSession.objects.get(pk=upload_id))
+        return JsonResponse({'error': str(exc)}, status=415)
+    
+    if created:
+        tasks.notify_mentors_of_submission.enqueue(submission.id)
+    return JsonResponse({
+        'submission_id': submission.pk,
+        'redirect': reverse('materials:submission_detail', args=[submission.pk]),
+    }, status=201)
+
+
+@login_required
+async def my_submissions(request):
     """View all submissions by the logged-in user"""
-    submissions = WorkSubmission.objects.filter(user=request.user)
+    user = await request.auser()
+    submissions = [submission async for submission in WorkSubmission.objects.filter(user=user)]
     
     context = {
         'submissions': submissions,
     }
-    return render(request, 'materials/my_submissions.html', context)
+    return await arender(request, 'materials/my_submissions.html', context)
 
 
 @login_required
@@ -273,12 +489,13 @@ def submission_detail(request, pk):
     Staff and mentors can view any submission; learners can view only their own.
     """
     # Allow mentors/staff to view any submission
-    is_reviewer = request.user.is_authenticated and (request.user.is_staff or getattr(request.user, 'user_type', None) == 'mentor' or request.user.groups.filter(name='mentors').exists())
+    is_reviewer = get_roles(request).is_reviewer
 
+    submissions = WorkSubmission.objects.select_related('user', 'feedback__mentor')
     if is_reviewer:
-        submission = get_object_or_404(WorkSubmission, pk=pk)
+        submission = get_object_or_404(submissions, pk=pk)
     else:
-        submission = get_object_or_404(WorkSubmission, pk=pk, user=request.user)
+        submission = get_object_or_404(submissions, pk=pk, user=request.user)
 
     context = {
         'submission': submission,
@@ -290,8 +507,8 @@ def submission_detail(request, pk):
 @login_required
 def review_submission(request, pk):
     """Allow mentors/staff to add or edit feedback and recommendation for a submission"""
-    # Only staff or users with a mentor role can review
-    if not (request.user.is_staff or getattr(request.user, 'user_type', None) == 'mentor'):
+    # Only staff or mentors can review
+    if not get_roles(request).is_reviewer:
         messages.error(request, 'You do not have permission to review submissions.')
         return redirect('materials:my_submissions')
 
@@ -309,10 +526,12 @@ def review_submission(request, pk):
             obj = form.save(commit=False)
             obj.submission = submission
             obj.mentor = request.user
-            obj.save()
-            # mark submission as reviewed
-            submission.is_reviewed = True
-            submission.save()
+            # The learner's email is queued with the feedback (materials/notifications.py)
+            with transaction.atomic():
+                obj.save()
+                # mark submission as reviewed
+                submission.is_reviewed = True
+                submission.save()
             messages.success(request, 'Feedback saved.')
             return redirect('materials:submission_detail', pk=submission.pk)
     else:
@@ -329,15 +548,24 @@ def review_submission(request, pk):
 def mentor_dashboard(request):
     """Mentor dashboard showing submissions to review"""
     # Only staff or mentors can access
-    if not (request.user.is_staff or getattr(request.user, 'user_type', None) == 'mentor' or request.user.groups.filter(name='mentors').exists()):
+    if not get_roles(request).is_reviewer:
         messages.error(request, 'You do not have permission to access this page.')
         return redirect('home')
 
-    # Get all submissions, grouped by status
-    pending_submissions = WorkSubmission.objects.filter(is_reviewed=False).select_related('user', 'category').order_by('-submitted_at')
+    # Mentors join the assignment rota on their first visit (materials/assignment.py)
+    profile = assignment.profile_for(request.user) if get_roles(request).is_mentor else None
+
+    # Work assigned to this reviewer first, then everything else still pending
+    pending = WorkSubmission.objects.filter(is_reviewed=False).select_related('user', 'category')
+    my_submissions = pending.filter(assigned_to=request.user).order_by('-submitted_at')
+    pending_submissions = pending.exclude(assigned_to=request.user).select_related('assigned_to').order_by('-submitted_at')
     reviewed_submissions = WorkSubmission.objects.filter(is_reviewed=True).select_related('user', 'category', 'feedback__mentor').order_by('-submitted_at')[:10]
 
     context = {
+        'profile': profile,
+        # Time to first review, from the stored sketches (materials/sla.py)
+        'turnaround': sla.dashboard(request.user),
+        'my_submissions': my_submissions,
         'pending_submissions': pending_submissions,
         'reviewed_submissions': reviewed_submissions,
         'pending_count': pending_submissions.count(),
@@ -345,23 +573,82 @@ def mentor_dashboard(request):
     return render(request, 'materials/mentor_dashboard.html', context)
 
 
+@login_required
+def mentor_profile(request):
+    """Let a reviewer choose the skills they review and go offline or back online"""
+    if not get_roles(request).is_reviewer:
+        messages.error(request, 'You do not have permission to access this page.')
+        return redirect('home')
+
+    profile = assignment.profile_for(request.user)
+    was_available = profile.is_available
+    if request.method == 'POST':
+        form = MentorProfileForm(request.POST, instance=profile)
+        if form.is_valid():
+            profile = form.save(commit=False)
+            # Only the mentor's own choices; the load counters are kept by materials.assignment
+            profile.save(update_fields=['is_available'])
+            form.save_m2m()
+            if profile.is_available != was_available:
+                # Going offline hands open reviews on; coming back picks up unassigned work
+                offline = [] if profile.is_available else [profile.pk]
+                tasks.rebalance_reviews.enqueue(offline)
+            messages.success(request, 'Review preferences saved.')
+            return redirect('materials:mentor_dashboard')
+    else:
+        form = MentorProfileForm(instance=profile)
+
+    return render(request, 'materials/mentor_profile.html', {'form': form, 'profile': profile})
+
+
+def metrics(request):
+    """Review turnaround for Prometheus, for signed-in staff or a scraper holding METRICS_TOKEN"""
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get('Authorization', '').encode()
+    if not (request.user.is_authenticated and request.user.is_staff) and not (
+        token and hmac.compare_digest(supplied, f'Bearer {token}'.encode())
+    ):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(sla.metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ==================== USER DASHBOARD ====================
 
 @login_required
-def my_learning(request):
+async def my_learning(request):
     """User's learning dashboard"""
+    user = await request.auser()
+
     # Get all skills user has access to
-    user_access = UserSkillAccess.objects.filter(user=request.user).select_related('category')
+    user_access = [access async for access in UserSkillAccess.objects.filter(user=user).select_related('category')]
+    
+    # The whole progress summary comes from the rollup table in one query
+    lesson_count = LearningMaterial.objects.filter(category=OuterRef('category')).order_by().values(
+        'category'
+    ).annotate(count=Count('id')).values('count')
+    progress_by_category = {
+        row.category_id: row async for row in CategoryProgress.objects.filter(user=user)
+        .select_related('category', 'next_material')
+        .annotate(total_lessons=Coalesce(Subquery(lesson_count), 0))
+        .order_by('-last_activity_at')
+    }
+    for access in user_access:
+        access.progress = progress_by_category.pop(access.category_id, None)
     
     # Get recent submissions
-    recent_submissions = WorkSubmission.objects.filter(user=request.user)[:5]
+    recent_submissions = [submission async for submission in WorkSubmission.objects.filter(user=user)[:5]]
     
     # Get payment history
-    recent_payments = Payment.objects.filter(user=request.user, is_verified=True)[:5]
+    recent_payments = [
+        payment async for payment in
+        Payment.objects.filter(user=user, is_verified=True).select_related('category')[:5]
+    ]
     
     context = {
         'user_access': user_access,
+        # Free (basic) skills the learner has started without buying a tier
+        'other_progress': list(progress_by_category.values()),
         'recent_submissions': recent_submissions,
         'recent_payments': recent_payments,
     }
-    return render(request, 'materials/my_learning.html', context)
+    return await arender(request, 'materials/my_learning.html', context)
@@ -0,0 +1,71 @@
+"""
+YouTube URL parsing.
+
+Accepts the URL forms people paste:
+
+    https://www.youtube.com/watch?v=ID&t=1m30s
+    https://m.youtube.com/watch?v=ID
+    https://youtu.be/ID?t=90
+    https://www.youtube.com/shorts/ID
+    https://www.youtube.com/embed/ID?start=90
+    https://www.youtube-nocookie.com/embed/ID
+    https://www.youtube.com/live/ID
+"""
+import re
+from urllib.parse import parse_qs, urlsplit
+
+VIDEO_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+TIMESTAMP = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$')
+YOUTUBE_HOSTS = {'youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com'}
+PATH_PREFIXES = ('embed', 'shorts', 'live', 'v')
+
+EMBED_URL = 'https://www.youtube.com/embed/{}'
+PRIVACY_EMBED_URL = 'https://www.youtube-nocookie.com/embed/{}'
+POSTER_URL = 'https://i.ytimg.com/vi/{}/hqdefault.jpg'
+
+
+def parse_timestamp(value):
+    """Seconds from ``90``, ``90s``, ``1m30s`` or ``1h2m3s``; None if unparseable"""
+    match = TIMESTAMP.match((value or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_youtube_url(url):
+    """Return ``(video_id, start_seconds)`` for a YouTube URL, or ``(None, None)``"""
+    if not url:
+        return None, None
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = parse_qs(parts.query)
+    segments = [segment for segment in parts.path.split('/') if segment]
+
+    video_id = None
+    if host == 'youtu.be' and segments:
+        video_id = segments[0]
+    elif host in YOUTUBE_HOSTS:
+        if segments[:1] == ['watch']:
+            video_id = query.get('v', [None])[0]
+        elif len(segments) >= 2 and segments[0] in PATH_PREFIXES:
+            video_id = segments[1]
+    if not video_id or not VIDEO_ID.match(video_id):
+        return None, None
+
+    start = None
+    for key in ('t', 'start'):
+        if key in query:
+            start = parse_timestamp(query[key][0])
+            break
+    if start is None and parts.fragment.startswith('t='):
+        start = parse_timestamp(parts.fragment[2:])
+    return video_id, start or None
+
+
+def embed_url(video_id, start=None, privacy_enhanced=False):
+    """Player URL for an iframe"""
+    url = (PRIVACY_EMBED_URL if privacy_enhanced else EMBED_URL).format(video_id)
+    return f'{url}?start={start}' if start else url
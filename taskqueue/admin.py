@@ -0,0 +1,90 @@
+from django.contrib import admin
+from django.db.models import Count
+from django.utils import timezone
+from . import mail
+from .models import Task, TaskLease, DeadLetter, OutboxEmail
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'status', 'priority', 'attempts', 'max_attempts', 'run_after', 'created_at']
+    list_filter = ['queue', 'status']
+    search_fields = ['name']
+    readonly_fields = ['created_at', 'last_error']
+
+    def changelist_view(self, request, extra_context=None):
+        """Show pending/running/dead counts per queue above the task list"""
+        depth = {}
+        for row in Task.objects.order_by().values('queue', 'status').annotate(count=Count('id')):
+            depth.setdefault(row['queue'], {'queue': row['queue'], 'pending': 0, 'running': 0, 'dead': 0})
+            depth[row['queue']][row['status']] = row['count']
+        for row in DeadLetter.objects.order_by().values('queue').annotate(count=Count('id')):
+            depth.setdefault(row['queue'], {'queue': row['queue'], 'pending': 0, 'running': 0, 'dead': 0})
+            depth[row['queue']]['dead'] = row['count']
+        overdue = Task.objects.filter(status='pending', run_after__lte=timezone.now()).order_by('run_after').first()
+
+        extra_context = extra_context or {}
+        extra_context['queue_depth'] = sorted(depth.values(), key=lambda d: d['queue'])
+        extra_context['oldest_due'] = overdue.run_after if overdue else None
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(TaskLease)
+class TaskLeaseAdmin(admin.ModelAdmin):
+    list_display = ['task', 'worker', 'expires_at']
+    list_select_related = ['task']
+
+
+@admin.register(DeadLetter)
+class DeadLetterAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'attempts', 'created_at', 'failed_at']
+    list_filter = ['queue', 'name']
+    readonly_fields = ['failed_at']
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        """Put selected dead tasks back in their queue with fresh attempts"""
+        requeued = 0
+        for dead in queryset:
+            Task.objects.create(queue=dead.queue, name=dead.name, args=dead.args, kwargs=dead.kwargs)
+            dead.delete()
+            requeued += 1
+        self.message_user(request, f'{requeued} task(s) requeued.')
+    requeue.short_description = 'Requeue selected tasks'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'digest', 'attempts', 'send_after', 'sent_at']
+    list_filter = ['status', 'digest']
+    search_fields = ['to']
+    # What gets sent, and to whom, is fixed by the code that queued it
+    fields = [
+        'to', 'from_email', 'subject', 'message', 'html_message', 'digest', 'sensitive', 'status', 'attempts',
+        'send_after', 'claim', 'claimed_at', 'sent_at', 'last_error', 'created_at',
+    ]
+    readonly_fields = [
+        'to', 'from_email', 'subject', 'message', 'html_message', 'digest', 'sensitive',
+        'claim', 'claimed_at', 'sent_at', 'last_error', 'created_at',
+    ]
+    actions = ['send_again']
+
+    def has_add_permission(self, request):
+        return False
+
+    def message(self, obj):
+        return '(hidden: contains a password reset link or other credential)' if obj.sensitive else obj.body
+    message.short_description = 'Body'
+
+    def html_message(self, obj):
+        return '(hidden)' if obj.sensitive and obj.html_body else obj.html_body
+    html_message.short_description = 'HTML body'
+
+    def send_again(self, request, queryset):
+        """Queue selected emails to be sent now, with fresh attempts"""
+        now = timezone.now()
+        count = queryset.exclude(status='sending').update(status='pending', attempts=0, send_after=now, claim='')
+        if count:
+            mail.schedule_sender(now)
+        self.message_user(request, f'{count} email(s) queued.')
+    send_again.short_description = 'Send selected emails again'
@@ -0,0 +1,232 @@
+"""
+Transactional email outbox.
+
+    from taskqueue.mail import queue_email
+
+    queue_email('Payment received', body, [user.email])
+
+``queue_email()`` writes OutboxEmail rows in the caller's transaction, so a
+message exists only if the change it reports commits, and no request waits
+on the mail server. It also queues the ``send_outbox`` task, unless one is
+already due by then.
+
+``deliver()`` (the ``send_outbox`` task) claims due messages in batches of
+EMAIL_BATCH_SIZE and sends each batch over a single SMTP connection, at no
+more than EMAIL_RATE_LIMIT messages a minute across all workers. When the
+budget runs out it schedules itself for when the minute frees up. Messages
+queued without ``digest`` go first, so notifications cannot delay them.
+
+Notifications queued with ``digest=True`` are combined per address: the
+first goes out at once, and any that follow within EMAIL_DIGEST_WINDOW of
+it wait for the window to close and are sent together as one email.
+
+Messages queued with ``sensitive=True``, such as password reset links, are
+deleted as soon as the server accepts them, and the admin never shows their
+bodies.
+
+A message the server refuses, or a batch whose connection cannot be opened,
+is retried with the task queue's backoff until EMAIL_MAX_ATTEMPTS, then left
+as failed for the admin to retry. Delivery is at least once: if a worker dies
+after the server accepted a batch but before the batch was recorded as sent,
+the batch goes out again after EMAIL_CLAIM_TIMEOUT.
+"""
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import OutboxEmail, Task
+from .registry import enqueue_task
+from .worker import retry_delay
+
+logger = logging.getLogger(__name__)
+
+SENDER_TASK = 'taskqueue.tasks.send_outbox'
+RATE_WINDOW = timedelta(minutes=1)
+# Sent messages stay visible in the admin this long
+SENT_RETENTION = timedelta(days=30)
+
+
+def digest_due(addresses):
+    """{address: earliest time another digest may go to it} for ``addresses`` emailed recently"""
+    window = timedelta(seconds=settings.EMAIL_DIGEST_WINDOW)
+    last_sent = (
+        OutboxEmail.objects.filter(to__in=addresses, status='sent', digest=True)
+        .order_by().values('to').annotate(last=Max('sent_at')).values_list('to', 'last')
+    )
+    return {to: last + window for to, last in last_sent}
+
+
+def queue_email(subject, body, recipient_list, from_email=None, html_body='', digest=False, sensitive=False):
+    """Record one email per address in ``recipient_list`` for the background sender"""
+    addresses = list(dict.fromkeys(address for address in recipient_list if address))
+    if not addresses:
+        return []
+    now = timezone.now()
+    due = digest_due(addresses) if digest else {}
+    rows = OutboxEmail.objects.bulk_create([
+        OutboxEmail(
+            to=address, from_email=from_email or '', subject=subject, body=body, html_body=html_body,
+            digest=digest, sensitive=sensitive, send_after=max(now, due.get(address, now)),
+        )
+        for address in addresses
+    ])
+    schedule_sender(min(row.send_after for row in rows))
+    return rows
+
+
+def schedule_sender(when):
+    """Queue ``send_outbox`` to run at ``when`` unless a pending one runs by then"""
+    if Task.objects.filter(queue='default', status='pending', name=SENDER_TASK, run_after__lte=when).exists():
+        return
+    enqueue_task(SENDER_TASK, at=when)
+
+
+def sent_recently():
+    return OutboxEmail.objects.filter(sent_at__gt=timezone.now() - RATE_WINDOW).count()
+
+
+def release_stale_claims():
+    """Return batches claimed by a worker that never finished them to the outbox"""
+    cutoff = timezone.now() - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT)
+    released = OutboxEmail.objects.filter(status='sending', claimed_at__lt=cutoff).update(status='pending', claim='')
+    if released:
+        logger.warning('Released %d email(s) from unfinished batches', released)
+    return released
+
+
+def claim_batch(limit):
+    """Claim up to ``limit`` due messages, plus every pending digest message to the same addresses.
+
+    Transactional messages (password resets, receipts) are claimed before
+    digest notifications, so a backlog of notifications never holds them
+    behind the rate limit.
+    """
+    now = timezone.now()
+    pending = OutboxEmail.objects.filter(status='pending', send_after__lte=now).order_by('send_after', 'pk')
+    due = list(pending.filter(digest=False).values_list('pk', flat=True)[:limit])
+    if len(due) < limit:
+        due += pending.filter(digest=True).values_list('pk', flat=True)[:limit - len(due)]
+    if not due:
+        return []
+    token = uuid.uuid4().hex
+    claimed = OutboxEmail.objects.filter(claim=token)
+    with transaction.atomic():
+        # The status check keeps a message another worker claimed first out of this batch
+        OutboxEmail.objects.filter(pk__in=due, status='pending').update(status='sending', claim=token, claimed_at=now)
+        digest_to = set(claimed.filter(digest=True).values_list('to', flat=True))
+        if digest_to:
+            OutboxEmail.objects.filter(to__in=digest_to, status='pending', digest=True).update(
+                status='sending', claim=token, claimed_at=now,
+            )
+    return list(claimed.order_by('send_after', 'pk'))
+
+
+def build_message(rows):
+    """The EmailMessage for one row, or for several digest rows to one address"""
+    first = rows[0]
+    from_email = first.from_email or settings.DEFAULT_FROM_EMAIL
+    if len(rows) == 1:
+        message = EmailMultiAlternatives(first.subject, first.body, from_email, [first.to])
+        if first.html_body:
+            message.attach_alternative(first.html_body, 'text/html')
+        return message
+    body = '\n\n'.join(f'{row.subject}\n{"-" * len(row.subject)}\n{row.body}' for row in rows)
+    return EmailMultiAlternatives(f'You have {len(rows)} new notifications', body, from_email, [first.to])
+
+
+def compose(rows):
+    """(rows, message) pairs: a message per row, and one per address for digest rows"""
+    digests = {}
+    messages = []
+    for row in rows:
+        if row.digest:
+            digests.setdefault(row.to, []).append(row)
+        else:
+            messages.append(([row], build_message([row])))
+    messages.extend((group, build_message(group)) for group in digests.values())
+    return messages
+
+
+def mark_sent(rows):
+    if rows:
+        sent = OutboxEmail.objects.filter(pk__in=[row.pk for row in rows])
+        # A link that still works has no business sitting in the outbox
+        sent.filter(sensitive=True).delete()
+        sent.update(status='sent', sent_at=timezone.now(), claim='', last_error='')
+
+
+def retry(rows, error):
+    """Put ``rows`` back with a backoff, or fail those out of attempts"""
+    now = timezone.now()
+    for row in rows:
+        row.attempts += 1
+        row.claim = ''
+        row.last_error = f'{type(error).__name__}: {error}'
+        if row.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            row.status = 'failed'
+            logger.error('Giving up on email %s to %s: %s', row.pk, row.to, row.last_error)
+        else:
+            row.status = 'pending'
+            row.send_after = now + timedelta(seconds=retry_delay(row.attempts))
+    OutboxEmail.objects.bulk_update(rows, ['attempts', 'claim', 'last_error', 'status', 'send_after'])
+
+
+def send_batch(rows):
+    """Send ``rows`` over one connection; returns how many were sent"""
+    messages = compose(rows)
+    connection = get_connection()
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as exc:
+        logger.warning('Cannot connect to the mail server: %s', exc)
+        retry(rows, exc)
+        return 0
+
+    sent, failed = [], []
+    try:
+        for group, message in messages:
+            try:
+                connection.send_messages([message])
+            except (smtplib.SMTPException, OSError) as exc:
+                failed.append((group, exc))
+            else:
+                sent.extend(group)
+    finally:
+        try:
+            connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass  # everything sent was already accepted
+        mark_sent(sent)
+        for group, exc in failed:
+            retry(group, exc)
+    return len(sent)
+
+
+def deliver():
+    """Send due messages until none are left or the rate limit is reached; returns how many were sent"""
+    release_stale_claims()
+    sent, resume = 0, None
+    while True:
+        budget = settings.EMAIL_RATE_LIMIT - sent_recently()
+        if budget <= 0:
+            window = OutboxEmail.objects.filter(sent_at__gt=timezone.now() - RATE_WINDOW)
+            resume = (window.aggregate(Min('sent_at'))['sent_at__min'] or timezone.now()) + RATE_WINDOW
+            break
+        rows = claim_batch(min(budget, settings.EMAIL_BATCH_SIZE))
+        if not rows:
+            break
+        sent += send_batch(rows)
+
+    # The rest of the backlog, retries and digests waiting for their window
+    upcoming = OutboxEmail.objects.filter(status='pending').aggregate(Min('send_after'))['send_after__min']
+    if upcoming:
+        schedule_sender(max(upcoming, resume) if resume else upcoming)
+    OutboxEmail.objects.filter(status='sent', sent_at__lt=timezone.now() - SENT_RETENTION).delete()
+    return sent
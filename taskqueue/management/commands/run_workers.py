@@ -0,0 +1,43 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from taskqueue.worker import DEFAULT_QUEUES, Worker
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers for the configured queues'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Queue to serve (repeatable); defaults to every queue in TASK_QUEUES',
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--lease', type=int, default=300, help='Seconds before an unrenewed claim expires')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queues are empty')
+
+    def handle(self, *args, **options):
+        configured = getattr(settings, 'TASK_QUEUES', DEFAULT_QUEUES)
+        unknown = set(options['queues'] or []) - set(configured)
+        if unknown:
+            raise CommandError(f"Unknown queue(s): {', '.join(sorted(unknown))}")
+
+        worker = Worker(
+            queues=options['queues'],
+            poll_interval=options['poll_interval'],
+            lease_seconds=options['lease'],
+        )
+
+        def stop(signum, frame):
+            self.stdout.write('Finishing running tasks, then stopping...')
+            worker.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        queues = ', '.join(f"{name} x{config.get('concurrency', 1)} ({config.get('executor', 'thread')})"
+                           for name, config in worker.queues.items())
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker.worker_id} serving: {queues}'))
+        worker.run(burst=options['burst'])
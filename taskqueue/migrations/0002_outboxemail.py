@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskqueue', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to', models.EmailField(max_length=254)),
+                ('from_email', models.CharField(blank=True, max_length=254)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('html_body', models.TextField(blank=True)),
+                ('digest', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim', models.CharField(blank=True, max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['send_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'send_after'], name='outbox_due_idx'), models.Index(fields=['to', 'status'], name='outbox_recipient_idx'), models.Index(fields=['sent_at'], name='outbox_sent_idx'), models.Index(fields=['claim'], name='outbox_claim_idx')],
+            },
+        ),
+    ]
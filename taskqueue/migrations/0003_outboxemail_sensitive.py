@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskqueue', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='sensitive',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A unit of background work waiting for, or claimed by, a worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=200)  # dotted path of the @task function
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    priority = models.IntegerField(default=0)  # higher runs first
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_after', 'id']
+        indexes = [
+            # Matches the claim query: queue + status, then due date
+            models.Index(fields=['queue', 'status', 'run_after'], name='task_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.queue}] ({self.status})"
+
+
+class TaskLease(models.Model):
+    """Claim on a running task.
+
+    The primary key is the lock: only one worker can insert a lease for a
+    task. This is how tasks are claimed on SQLite, which has no SKIP LOCKED.
+    A lease that expires (worker crashed) puts the task back in the queue.
+    """
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name='lease')
+    worker = models.CharField(max_length=100)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.task_id} leased by {self.worker}"
+
+
+class DeadLetter(models.Model):
+    """Tasks that used up all their attempts, kept for inspection and requeueing"""
+    queue = models.CharField(max_length=50)
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-failed_at']
+
+    def __str__(self):
+        return f"{self.name} [{self.queue}] failed after {self.attempts} attempt(s)"
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent, written in the same transaction as the change it reports"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)  # blank: DEFAULT_FROM_EMAIL
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    digest = models.BooleanField(default=False)  # may be combined with other notifications to the same address
+    sensitive = models.BooleanField(default=False)  # carries a credential such as a reset link: hidden in the admin, deleted once sent
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True)  # batch that is sending it
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['send_after', 'id']
+        indexes = [
+            # Due messages, in sending order
+            models.Index(fields=['status', 'send_after'], name='outbox_due_idx'),
+            # Pending digest messages and last digest sent, per address
+            models.Index(fields=['to', 'status'], name='outbox_recipient_idx'),
+            # Rate limit window and pruning
+            models.Index(fields=['sent_at'], name='outbox_sent_idx'),
+            models.Index(fields=['claim'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to} ({self.status})"
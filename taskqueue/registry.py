@@ -0,0 +1,61 @@
+"""
+Registering and enqueueing background tasks.
+
+    from taskqueue.registry import task
+
+    @task(queue='default', max_attempts=5)
+    def send_receipt(payment_id):
+        ...
+
+    send_receipt.enqueue(payment.id)
+
+Arguments must be JSON-serialisable. ``enqueue`` writes a row in the current
+transaction, so the task only becomes visible if the triggering write commits.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Task
+
+_registry = {}
+
+
+def task(queue='default', max_attempts=5, priority=0):
+    """Register a function as a background task"""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        _registry[name] = func
+        func.task_name = name
+
+        def enqueue(*args, **kwargs):
+            return enqueue_task(name, args, kwargs, queue=queue, max_attempts=max_attempts, priority=priority)
+
+        func.enqueue = enqueue
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Return the function registered under ``name``"""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'No task registered as {name!r}') from None
+
+
+def enqueue_task(name, args=(), kwargs=None, queue='default', max_attempts=5, priority=0, delay=None, at=None):
+    """Add a task row to ``queue``, optionally not before ``delay`` seconds or the time ``at``"""
+    get_task(name)
+    run_after = at or timezone.now()
+    if delay:
+        run_after += timedelta(seconds=delay)
+    return Task.objects.create(
+        queue=queue,
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=max_attempts,
+        priority=priority,
+        run_after=run_after,
+    )
@@ -0,0 +1,11 @@
+"""
+Background tasks for the task queue itself.
+"""
+from . import mail
+from .registry import task
+
+
+@task()
+def send_outbox():
+    """Send due emails from the outbox (taskqueue/mail.py)"""
+    mail.deliver()
@@ -0,0 +1,261 @@
+import socket
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from materials.models import MentorFeedback, Payment, SkillCategory, UserSkillAccess, WorkSubmission
+from materials import tasks
+from . import mail
+from .mail import deliver, queue_email
+from .models import OutboxEmail, Task
+from .testing import SMTPStandInMixin
+from .worker import Worker
+
+User = get_user_model()
+
+INLINE_QUEUES = {'default': {'concurrency': 2, 'executor': 'inline'}}
+
+
+def closed_port():
+    """A localhost port nothing is listening on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@override_settings(EMAIL_BATCH_SIZE=50, EMAIL_RATE_LIMIT=100, EMAIL_DIGEST_WINDOW=900, EMAIL_MAX_ATTEMPTS=3)
+class OutboxTests(SMTPStandInMixin, TestCase):
+    """Test the outbox against a local SMTP server"""
+    refuse = ['bounce@example.com']
+
+    def test_rolled_back_write_sends_nothing(self):
+        """Test an email queued in a transaction that rolls back disappears with it"""
+        try:
+            with transaction.atomic():
+                queue_email('Hello', 'Body', ['a@example.com'])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_queue_schedules_one_sender(self):
+        """Test queueing several emails leaves a single sender task"""
+        for i in range(3):
+            queue_email(f'Hello {i}', 'Body', [f'user{i}@example.com'])
+        self.assertEqual(list(Task.objects.values_list('name', flat=True)), [mail.SENDER_TASK])
+
+    def test_batch_shares_a_connection(self):
+        """Test a batch is sent over one SMTP connection"""
+        queue_email('Hello', 'Body', [f'user{i}@example.com' for i in range(5)])
+        with self.settings(EMAIL_BATCH_SIZE=2):
+            self.assertEqual(deliver(), 5)
+        self.assertEqual(self.smtp.connections, 3)
+        self.assertEqual(sorted(to for _, (to,), _ in self.smtp.messages), [f'user{i}@example.com' for i in range(5)])
+        self.assertEqual(OutboxEmail.objects.filter(status='sent').count(), 5)
+
+    def test_html_alternative(self):
+        """Test an HTML body is sent alongside the text"""
+        queue_email('Hello', 'Plain', ['a@example.com'], html_body='<p>Rich</p>')
+        deliver()
+        message = self.smtp.messages[0][2]
+        self.assertEqual(message.get_content_type(), 'multipart/alternative')
+        self.assertIn('<p>Rich</p>', message.as_string())
+
+    def test_refused_recipient_is_retried(self):
+        """Test a refused message backs off and is failed after EMAIL_MAX_ATTEMPTS"""
+        queue_email('Hello', 'Body', ['bounce@example.com', 'ok@example.com'])
+        Task.objects.all().delete()  # as if this were the sender task running
+        self.assertEqual(deliver(), 1)
+        bounce = OutboxEmail.objects.get(to='bounce@example.com')
+        self.assertEqual((bounce.status, bounce.attempts), ('pending', 1))
+        self.assertGreater(bounce.send_after, timezone.now())
+        self.assertIn('SMTPRecipientsRefused', bounce.last_error)
+        # The retry is scheduled
+        self.assertTrue(Task.objects.filter(name=mail.SENDER_TASK, run_after__gte=bounce.send_after).exists())
+
+        for _ in range(2):
+            OutboxEmail.objects.filter(pk=bounce.pk).update(send_after=timezone.now())
+            deliver()
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), ('failed', 3))
+
+    def test_unreachable_server(self):
+        """Test a batch that cannot connect is put back for later"""
+        queue_email('Hello', 'Body', ['a@example.com'])
+        with self.settings(EMAIL_PORT=closed_port()):
+            self.assertEqual(deliver(), 0)
+        row = OutboxEmail.objects.get()
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+
+    def test_rate_limit(self):
+        """Test the sender stops at EMAIL_RATE_LIMIT and resumes when the minute frees up"""
+        queue_email('Hello', 'Body', [f'user{i}@example.com' for i in range(5)])
+        Task.objects.all().delete()  # as if this were the sender task running
+        with self.settings(EMAIL_RATE_LIMIT=3):
+            self.assertEqual(deliver(), 3)
+            self.assertEqual(deliver(), 0)
+        self.assertEqual(OutboxEmail.objects.filter(status='pending').count(), 2)
+        resume = Task.objects.get(name=mail.SENDER_TASK).run_after
+        self.assertGreater(resume, timezone.now() + timedelta(seconds=30))
+
+    def test_transactional_mail_goes_first(self):
+        """Test a backlog of notifications does not hold back an email queued after it"""
+        queue_email('Reviewed', 'Good', [f'user{i}@example.com' for i in range(5)], digest=True)
+        queue_email('Reset your password', 'Link', ['reset@example.com'])
+        Task.objects.all().delete()
+        with self.settings(EMAIL_RATE_LIMIT=2):
+            self.assertEqual(deliver(), 2)
+        self.assertIn(['reset@example.com'], [to for _, to, _ in self.smtp.messages])
+
+    def test_digest_combines_notifications(self):
+        """Test the first notification goes at once and the next ones wait to go together"""
+        queue_email('Reviewed: Poster', 'Good', ['learner@example.com'], digest=True)
+        deliver()
+        queue_email('Reviewed: Logo', 'Better', ['learner@example.com'], digest=True)
+        queue_email('Reviewed: Flyer', 'Best', ['learner@example.com'], digest=True)
+        self.assertEqual(deliver(), 0)
+        self.assertEqual(len(self.smtp.messages), 1)
+
+        OutboxEmail.objects.filter(subject='Reviewed: Logo').update(send_after=timezone.now())
+        self.assertEqual(deliver(), 2)
+        self.assertEqual(len(self.smtp.messages), 2)
+        digest = self.smtp.messages[1][2]
+        self.assertEqual(digest['Subject'], 'You have 2 new notifications')
+        self.assertIn('Reviewed: Logo', digest.get_payload())
+        self.assertIn('Reviewed: Flyer', digest.get_payload())
+
+    def test_stale_claim_is_released(self):
+        """Test a batch left claimed by a dead worker is sent again"""
+        queue_email('Hello', 'Body', ['a@example.com'])
+        OutboxEmail.objects.update(status='sending', claim='dead', claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(deliver(), 1)
+
+
+@override_settings(TASK_QUEUES=INLINE_QUEUES, EMAIL_RATE_LIMIT=100)
+class NotificationTests(SMTPStandInMixin, TestCase):
+    """Test the emails learners and mentors get go through the outbox"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='learner', password='testpass123!', email='l@example.com')
+        self.mentor = User.objects.create_user(
+            username='mentor', password='testpass123!', email='m@example.com', user_type='mentor'
+        )
+        self.category = SkillCategory.objects.create(name='Graphic Design', slug='graphic-design', description='d')
+
+    def test_password_reset_does_not_wait_for_mail_server(self):
+        """Test the reset request only records the email, and the worker sends it"""
+        with self.settings(EMAIL_PORT=closed_port()):
+            started = time.monotonic()
+            response = self.client.post(reverse('password_reset'), {'email': 'l@example.com'})
+            self.assertLess(time.monotonic() - started, 5)
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertEqual(OutboxEmail.objects.get().to, 'l@example.com')
+
+        Worker(poll_interval=0).run(burst=True)
+
+        (_, recipients, message), = self.smtp.messages
+        self.assertEqual(recipients, ['l@example.com'])
+        self.assertIn('/password-reset-confirm/', message.get_payload())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_admin_hides_reset_link(self):
+        """Test staff see neither the body of a reset email nor a way to change where it goes"""
+        self.client.post(reverse('password_reset'), {'email': 'l@example.com'})
+        row = OutboxEmail.objects.get()
+        User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        self.client.login(username='admin', password='testpass123!')
+        url = reverse('admin:taskqueue_outboxemail_change', args=[row.pk])
+        response = self.client.get(url)
+        self.assertNotContains(response, '/password-reset-confirm/')
+        self.assertNotContains(response, 'name="to"')
+
+        self.client.post(url, {'to': 'a@example.com', 'status': 'pending', 'attempts': 0,
+                               'send_after_0': '2026-01-01', 'send_after_1': '00:00:00'})
+        self.assertEqual(OutboxEmail.objects.get().to, 'l@example.com')
+
+    def test_feedback_notifies_learner(self):
+        """Test saving feedback, even in the admin, queues the learner's email"""
+        submission = WorkSubmission.objects.create(
+            user=self.user, category=self.category, title='Poster', description='d', file='work_submissions/p.png'
+        )
+        feedback = MentorFeedback.objects.create(submission=submission, mentor=self.mentor, feedback='Nice', rating='good')
+        feedback.feedback = 'Nicer'
+        feedback.save()
+        self.assertEqual(list(OutboxEmail.objects.values_list('to', 'subject', 'digest')), [
+            ('l@example.com', 'Your work "Poster" has been reviewed', True),
+            ('l@example.com', 'The review of your work "Poster" was updated', True),
+        ])
+
+    def test_submission_notifies_mentors(self):
+        """Test active mentors get a digest-able notice of new work"""
+        User.objects.create_user(
+            username='former', password='testpass123!', email='f@example.com', user_type='mentor', is_active=False,
+        )
+        User.objects.create_user(
+            username='exstaff', password='testpass123!', email='s@example.com', is_staff=True, is_active=False,
+        )
+        submission = WorkSubmission.objects.create(
+            user=self.user, category=self.category, title='Poster', description='d', file='work_submissions/p.png'
+        )
+        tasks.notify_mentors_of_submission(submission.pk)
+        row = OutboxEmail.objects.get()
+        self.assertEqual((row.to, row.digest), ('m@example.com', True))
+
+    def test_verified_payment_gets_receipt(self):
+        """Test verify_payment sends a receipt, and a reused code gets none"""
+        payment = Payment.objects.create(
+            user=self.user, category=self.category, access_level='premium', amount=Decimal('200.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678', is_verified=True,
+        )
+        tasks.verify_payment(payment.pk)
+        reused = Payment.objects.create(
+            user=self.user, category=self.category, access_level='premium', amount=Decimal('200.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678', is_verified=True,
+        )
+        tasks.verify_payment(reused.pk)
+        self.assertEqual(list(OutboxEmail.objects.values_list('subject', flat=True)), ['Payment received: Graphic Design'])
+
+    def test_reused_code_loses_access(self):
+        """Test only the later use of a code is flagged, whichever is checked first, and loses what it bought"""
+        original = Payment.objects.create(
+            user=self.user, category=self.category, access_level='enterprise', amount=Decimal('100.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678', is_verified=True,
+        )
+        reused = Payment.objects.create(
+            user=self.mentor, category=self.category, access_level='premium', amount=Decimal('200.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678', is_verified=True,
+        )
+        UserSkillAccess.objects.create(user=self.user, category=self.category, access_level='enterprise')
+        UserSkillAccess.objects.create(user=self.mentor, category=self.category, access_level='premium')
+
+        with self.assertLogs('materials.tasks', 'WARNING'):
+            tasks.verify_payment(reused.pk)
+        tasks.verify_payment(original.pk)
+        self.assertEqual(
+            dict(Payment.objects.values_list('pk', 'is_verified')), {original.pk: True, reused.pk: False}
+        )
+        self.assertEqual(dict(UserSkillAccess.objects.values_list('user_id', 'access_level')), {
+            self.user.pk: 'enterprise', self.mentor.pk: 'basic',
+        })
+        self.assertEqual(list(OutboxEmail.objects.values_list('to', flat=True)), ['l@example.com'])
+
+    def test_admin_verification_gets_receipt(self):
+        """Test a payment switched to verified gets a receipt once"""
+        payment = Payment.objects.create(
+            user=self.user, category=self.category, access_level='premium', amount=Decimal('200.00'),
+            mpesa_code='QA12BC3456', phone_number='0712345678',
+        )
+        self.assertFalse(OutboxEmail.objects.exists())
+        payment.is_verified = True
+        payment.save()
+        payment.save()
+        self.assertEqual(OutboxEmail.objects.count(), 1)
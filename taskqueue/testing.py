@@ -0,0 +1,108 @@
+"""
+A local SMTP server for tests, so the outbox is exercised through Django's
+real SMTP backend without a mail server.
+
+    with SMTPStandIn() as smtp, override_settings(**smtp.settings()):
+        mail.deliver()
+    smtp.messages  # [(sender, [recipients], email.message.Message)]
+"""
+import email
+import socketserver
+import threading
+
+from django.test import override_settings
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server.stand_in
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost SMTP stand-in')
+        sender, recipients = None, []
+        for raw in self.rfile:
+            command, _, arg = raw.decode().rstrip('\r\n').partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif command == 'HELO':
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                sender, recipients = arg.partition(':')[2].split()[0].strip('<>'), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                address = arg.partition(':')[2].strip().strip('<>')
+                if address in server.refuse:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for line in self.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                with server.lock:
+                    server.messages.append((sender, recipients, email.message_from_bytes(b''.join(lines))))
+                self.reply('250 OK')
+            elif command in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStandIn:
+    """Accepts mail on a free localhost port; ``refuse`` lists recipients it rejects"""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.stand_in = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def settings(self):
+        return {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': '127.0.0.1',
+            'EMAIL_PORT': self.port,
+            'EMAIL_HOST_USER': '',
+            'EMAIL_HOST_PASSWORD': '',
+            'EMAIL_USE_TLS': False,
+            'EMAIL_USE_SSL': False,
+        }
+
+
+class SMTPStandInMixin:
+    """Run each test against its own SMTPStandIn, available as ``self.smtp``"""
+    refuse = ()
+
+    def setUp(self):
+        super().setUp()
+        self.smtp = SMTPStandIn(self.refuse).__enter__()
+        self.addCleanup(self.smtp.__exit__, None, None, None)
+        overridden = override_settings(**self.smtp.settings())
+        overridden.enable()
+        self.addCleanup(overridden.disable)
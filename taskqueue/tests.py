@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from materials.models import SkillCategory, WorkSubmission
+from .models import Task, TaskLease, DeadLetter
+from .registry import task, enqueue_task
+from .worker import Worker, claim_tasks, requeue_expired_leases
+
+User = get_user_model()
+
+calls = []
+
+
+@task(max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+INLINE_QUEUES = {'default': {'concurrency': 2, 'executor': 'inline'}}
+
+
+@override_settings(TASK_QUEUES=INLINE_QUEUES, TASK_RETRY_BASE_DELAY=0)
+class TaskQueueTests(TestCase):
+    """Test enqueueing, claiming, retries and dead-lettering"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Test a queued task runs once and leaves the queue"""
+        record.enqueue('hello')
+        Worker(poll_interval=0).run(burst=True)
+
+        self.assertEqual(calls, ['hello'])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(TaskLease.objects.exists())
+
+    def test_unknown_task_rejected(self):
+        """Test enqueueing an unregistered name fails immediately"""
+        with self.assertRaises(LookupError):
+            enqueue_task('nope.missing')
+
+    def test_delayed_task_not_claimed_early(self):
+        """Test run_after holds a task back"""
+        enqueue_task(record.task_name, ['later'], delay=60)
+        self.assertEqual(claim_tasks('default', 10, 'w1', 60), [])
+
+    def test_failed_task_retries_then_dead_letters(self):
+        """Test a failing task is retried with backoff, then dead-lettered"""
+        explode.enqueue()
+        worker = Worker(poll_interval=0)
+        worker.fill()
+        worker.reap()
+
+        t = Task.objects.get()
+        self.assertEqual((t.status, t.attempts), ('pending', 1))
+        self.assertIn('boom', t.last_error)
+
+        Worker(poll_interval=0).run(burst=True)
+
+        self.assertFalse(Task.objects.exists())
+        dead = DeadLetter.objects.get()
+        self.assertEqual(dead.attempts, 2)
+        self.assertIn('RuntimeError', dead.error)
+
+    def test_lease_prevents_double_claim(self):
+        """Test two workers cannot claim the same task"""
+        record.enqueue('once')
+        first = claim_tasks('default', 10, 'w1', 60)
+        second = claim_tasks('default', 10, 'w2', 60)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(TaskLease.objects.get().worker, 'w1')
+
+    def test_expired_lease_requeues_task(self):
+        """Test a crashed worker's task goes back to the queue"""
+        record.enqueue('again')
+        claim_tasks('default', 10, 'w1', 60)
+        TaskLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(requeue_expired_leases(), 1)
+        self.assertEqual(Task.objects.get().status, 'pending')
+        self.assertEqual(len(claim_tasks('default', 10, 'w2', 60)), 1)
+
+
+@override_settings(TASK_QUEUES=INLINE_QUEUES)
+class ViewEnqueueTests(TestCase):
+    """Test views hand their side effects to the queue"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!', email='l@example.com')
+        self.mentor = User.objects.create_user(
+            username='mentor', password='testpass123!', email='m@example.com', is_staff=True
+        )
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design'
+        )
+
+    def test_checkout_enqueues_payment_verification(self):
+        """Test checkout queues verify_payment"""
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('materials:checkout', args=[self.category.id, 'enterprise']),
+            {'phone_number': '0712345678', 'mpesa_code': 'QA12BC3456'}
+        )
+        self.assertEqual(Task.objects.get().name, 'materials.tasks.verify_payment')
+
+    def test_review_enqueues_learner_email(self):
+        """Test saving feedback queues an email that the worker sends"""
+        submission = WorkSubmission.objects.create(
+            user=self.user, category=self.category, title='Poster', description='d', file='work_submissions/p.png'
+        )
+        self.client.force_login(self.mentor)
+        self.client.post(
+            reverse('materials:review_submission', args=[submission.pk]),
+            {'rating': 'good', 'feedback': 'Nice layout', 'recommendation': ''}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+        Worker(poll_interval=0).run(burst=True)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['l@example.com'])
+
+
+@override_settings(TASK_QUEUES={'default': {'concurrency': 3, 'executor': 'thread'}})
+class ThreadPoolWorkerTests(TransactionTestCase):
+    """Test the thread-pool executor runs tasks concurrently"""
+
+    def test_thread_pool_drains_queue(self):
+        """Test every queued task runs exactly once"""
+        calls.clear()
+        for i in range(6):
+            record.enqueue(i)
+        Worker(poll_interval=0.01).run(burst=True)
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertFalse(Task.objects.exists())
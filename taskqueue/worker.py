@@ -0,0 +1,227 @@
+"""
+Claiming, running and retiring queued tasks.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+supports it (PostgreSQL), so workers never wait on each other's rows. On
+SQLite each claim inserts a ``TaskLease`` row; its primary key guarantees a
+single owner. Either way a running task holds a lease that the worker renews
+while it runs; a lease that expires (worker killed) requeues the task.
+"""
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DeadLetter, Task, TaskLease
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUES = {'default': {'concurrency': 4, 'executor': 'thread'}}
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, in seconds, after ``attempts`` failures"""
+    base = getattr(settings, 'TASK_RETRY_BASE_DELAY', 10)
+    cap = getattr(settings, 'TASK_RETRY_MAX_DELAY', 3600)
+    delay = min(base * 2 ** (attempts - 1), cap)
+    return delay * random.uniform(0.8, 1.0)
+
+
+def claim_tasks(queue, limit, worker_id, lease_seconds):
+    """Claim up to ``limit`` due tasks from ``queue`` for ``worker_id``"""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    due = Task.objects.filter(queue=queue, status='pending', run_after__lte=now)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            tasks = list(due.select_for_update(skip_locked=True)[:limit])
+            if not tasks:
+                return []
+            ids = [t.pk for t in tasks]
+            TaskLease.objects.filter(task_id__in=ids).delete()
+            TaskLease.objects.bulk_create([TaskLease(task=t, worker=worker_id, expires_at=expires_at) for t in tasks])
+            Task.objects.filter(pk__in=ids).update(status='running', attempts=F('attempts') + 1)
+        for t in tasks:
+            t.status = 'running'
+            t.attempts += 1
+        return tasks
+
+    claimed = []
+    for t in due[:limit]:
+        try:
+            with transaction.atomic():
+                TaskLease.objects.create(task=t, worker=worker_id, expires_at=expires_at)
+                updated = Task.objects.filter(pk=t.pk, status='pending').update(
+                    status='running', attempts=F('attempts') + 1
+                )
+                if not updated:
+                    raise IntegrityError('task already claimed')
+        except IntegrityError:
+            continue  # another worker won this one
+        t.status = 'running'
+        t.attempts += 1
+        claimed.append(t)
+    return claimed
+
+
+def requeue_expired_leases():
+    """Return tasks whose worker stopped renewing its lease to the queue"""
+    with transaction.atomic():
+        expired = list(TaskLease.objects.filter(expires_at__lt=timezone.now()).values_list('task_id', flat=True))
+        if expired:
+            Task.objects.filter(pk__in=expired, status='running').update(status='pending')
+            TaskLease.objects.filter(task_id__in=expired).delete()
+            logger.warning('Requeued %d task(s) with expired leases', len(expired))
+    return len(expired)
+
+
+def complete_task(task):
+    """Remove a finished task from the queue"""
+    Task.objects.filter(pk=task.pk).delete()
+
+
+def fail_task(task, error):
+    """Schedule a retry, or dead-letter the task once it is out of attempts"""
+    with transaction.atomic():
+        if task.attempts >= task.max_attempts:
+            DeadLetter.objects.create(
+                queue=task.queue, name=task.name, args=task.args, kwargs=task.kwargs,
+                attempts=task.attempts, error=error, created_at=task.created_at,
+            )
+            Task.objects.filter(pk=task.pk).delete()
+            logger.error('Task %s (%s) dead-lettered after %d attempt(s)', task.pk, task.name, task.attempts)
+            return
+        TaskLease.objects.filter(task_id=task.pk).delete()
+        Task.objects.filter(pk=task.pk).update(
+            status='pending',
+            last_error=error,
+            run_after=timezone.now() + timedelta(seconds=retry_delay(task.attempts)),
+        )
+
+
+def execute(name, args, kwargs):
+    """Run a registered task; runs inside the executor thread or process"""
+    try:
+        return get_task(name)(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _init_process():
+    django.setup()
+
+
+class InlineExecutor:
+    """Runs tasks in the worker's own thread; useful for debugging and tests"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def make_executor(config):
+    """Build the executor described by a TASK_QUEUES entry"""
+    kind = config.get('executor', 'thread')
+    concurrency = config.get('concurrency', 1)
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task')
+    if kind == 'process':
+        # Children must not inherit open database connections
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=concurrency, initializer=_init_process)
+    if kind == 'inline':
+        return InlineExecutor()
+    raise ValueError(f'Unknown task executor {kind!r}')
+
+
+class Worker:
+    """Polls the configured queues and runs tasks up to each queue's concurrency"""
+
+    def __init__(self, queues=None, poll_interval=1.0, lease_seconds=300, worker_id=None):
+        all_queues = getattr(settings, 'TASK_QUEUES', DEFAULT_QUEUES)
+        self.queues = {name: all_queues[name] for name in (queues or all_queues)}
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.executors = {name: make_executor(config) for name, config in self.queues.items()}
+        self.in_flight = {name: {} for name in self.queues}
+        self.stopping = False
+
+    def fill(self):
+        """Claim work for every queue with free slots; returns how many were claimed"""
+        claimed = 0
+        for name, config in self.queues.items():
+            free = config.get('concurrency', 1) - len(self.in_flight[name])
+            for t in claim_tasks(name, free, self.worker_id, self.lease_seconds):
+                future = self.executors[name].submit(execute, t.name, t.args, t.kwargs)
+                self.in_flight[name][future] = t
+                claimed += 1
+        return claimed
+
+    def reap(self):
+        """Record the outcome of finished tasks"""
+        for running in self.in_flight.values():
+            for future in [f for f in running if f.done()]:
+                t = running.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    complete_task(t)
+                else:
+                    fail_task(t, ''.join(traceback.format_exception(exc)))
+
+    def renew_leases(self):
+        ids = [t.pk for running in self.in_flight.values() for t in running.values()]
+        if ids:
+            TaskLease.objects.filter(task_id__in=ids).update(
+                expires_at=timezone.now() + timedelta(seconds=self.lease_seconds)
+            )
+
+    def futures(self):
+        return [f for running in self.in_flight.values() for f in running]
+
+    def run(self, burst=False):
+        """Process tasks until stop() is called, or until idle when ``burst``"""
+        try:
+            while not self.stopping:
+                self.reap()
+                requeue_expired_leases()
+                self.renew_leases()
+                claimed = self.fill()
+                pending = self.futures()
+                if burst and not claimed and not pending:
+                    break
+                if pending:
+                    wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                elif not claimed:
+                    time.sleep(self.poll_interval)
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        self.stopping = True
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+        self.reap()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tujiimarishe.settings')
 
 application = get_asgi_application()
+
+# Write buffered learning-progress events when the server process exits
+from materials.progress import flush_at_exit  # noqa: E402  (needs apps loaded)
+
+flush_at_exit()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,11 +41,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'users',
     'materials',
+    'taskqueue',
 ]
 
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# ModelBackend that hashes passwords on a bounded thread pool in async views
+AUTHENTICATION_BACKENDS = ['users.backends.PooledHashModelBackend']
+PASSWORD_HASH_WORKERS = 4
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.lite.LiteModeMiddleware',
 ]
 
 ROOT_URLCONF = 'tujiimarishe.urls'
@@ -66,6 +74,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.lite.lite_mode',
+                'users.roles.roles',
             ],
         },
     },
@@ -89,6 +99,35 @@ DATABASES = {
 }
 
 
+# Cache
+# File-based so every worker process on the box shares one cache without an
+# external server. Point this at Redis/Memcached when running on several hosts.
+# Kept outside the checkout; set CACHE_DIR to move it. Tests use a local-memory
+# cache instead (tujiimarishe/test_runner.py).
+CACHE_DIR = Path(os.environ.get('CACHE_DIR') or Path(tempfile.gettempdir()) / 'tujiimarishe-cache')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+TEST_RUNNER = 'tujiimarishe.test_runner.LocalCacheTestRunner'
+
+# Sessions
+# Read from the cache on warm requests; writes go through to django_session
+# so a cache flush does not log everyone out. For small, non-sensitive
+# payloads 'django.contrib.sessions.backends.signed_cookies' avoids the DB
+# entirely. Expired rows are pruned with `python manage.py sweep_sessions`.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_COOKIE_AGE = 1209600  # 2 weeks
+SESSION_SWEEP_BATCH_SIZE = 500
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 # Reduced validators for development speed; add them back for production
@@ -133,6 +172,82 @@ MEDIA_ROOT = BASE_DIR / 'media'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB in bytes
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB in bytes
 
+# Uploads are hashed, type-sniffed and size-checked as they stream in
+# (see materials/upload_handlers.py)
+FILE_UPLOAD_HANDLERS = ['materials.upload_handlers.InspectingUploadHandler']
+
+# Allowed types per upload field, detected from magic bytes: {field: {mime: max bytes}}
+UPLOAD_TYPE_LIMITS = {
+    'file': {
+        'application/pdf': 20 * 1024 * 1024,
+        'image/png': 10 * 1024 * 1024,
+        'image/jpeg': 10 * 1024 * 1024,
+        'image/gif': 10 * 1024 * 1024,
+        'image/webp': 10 * 1024 * 1024,
+        'image/vnd.adobe.photoshop': 100 * 1024 * 1024,
+        'application/zip': 100 * 1024 * 1024,  # also .docx/.pptx/.xlsx
+        'application/x-ole-storage': 20 * 1024 * 1024,
+        'video/mp4': 200 * 1024 * 1024,
+    },
+    'pdf_file': {
+        'application/pdf': 50 * 1024 * 1024,
+    },
+}
+
+# Chunked, resumable uploads for work submissions (see materials/uploads.py)
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'tmp' / 'uploads'
+CHUNKED_UPLOAD_MAX_SIZE = 200 * 1024 * 1024  # 200MB per file
+CHUNKED_UPLOAD_MAX_CHUNK = 5 * 1024 * 1024  # 5MB per PATCH request
+CHUNKED_UPLOAD_EXPIRY = 24 * 60 * 60  # seconds an unfinished upload is kept
+
+# Learning-progress events are buffered per worker and written in batches
+# (see materials/progress.py)
+PROGRESS_BATCH_SIZE = 200
+PROGRESS_FLUSH_INTERVAL = 10  # seconds the oldest buffered event may wait
+PROGRESS_SPOOL_DIR = BASE_DIR / 'tmp' / 'progress'
+
+# Seconds a user's mentor-group membership is cached (users/roles.py)
+ROLE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Admin changelists stop counting a filtered list here (users/admin_mixins.py)
+ADMIN_COUNT_LIMIT = 10000
+
+# Rows read per query by the CSV/XLSX exports (users/exports.py)
+EXPORT_CHUNK_SIZE = 2000
+
+# Lessons stored per lesson by the nightly build_recommendations (materials/recommendations.py);
+# more than the page shows, so some are left after hiding the ones a viewer's tier does not unlock
+RECOMMENDATION_NEIGHBOURS = 12
+
+# Hours a mentor with no reviews yet is assumed to take per submission (materials/assignment.py)
+MENTOR_DEFAULT_TURNAROUND = 48
+
+# Bearer token a Prometheus scraper sends to /metrics (materials/sla.py); staff can
+# read it when signed in. None turns token access off
+METRICS_TOKEN = None
+
+# Background tasks (python manage.py run_workers)
+# executor: 'thread' for I/O-bound work, 'process' for CPU-bound work
+TASK_QUEUES = {
+    'default': {'concurrency': 4, 'executor': 'thread'},
+    'cpu': {'concurrency': 2, 'executor': 'process'},
+}
+TASK_RETRY_BASE_DELAY = 10  # seconds; doubles on every failed attempt
+TASK_RETRY_MAX_DELAY = 3600
+
+# Email
+DEFAULT_FROM_EMAIL = 'Tujiimarishe Digital Hub <noreply@tujiimarishe.co.ke>'
+if DEBUG:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_TIMEOUT = 30  # seconds; a stalled mail server must not hold a worker forever
+
+# Email outbox, delivered by the send_outbox task (taskqueue/mail.py)
+EMAIL_BATCH_SIZE = 50  # messages sent over one SMTP connection
+EMAIL_RATE_LIMIT = 60  # messages a minute, across all workers
+EMAIL_DIGEST_WINDOW = 900  # seconds; notifications to one address within this are combined
+EMAIL_MAX_ATTEMPTS = 6
+EMAIL_CLAIM_TIMEOUT = 600  # seconds before a batch claimed by a dead worker is sent again
+
 # Login/Logout redirects
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
@@ -0,0 +1,17 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class LocalCacheTestRunner(DiscoverRunner):
+    """Runs the tests against a local-memory cache of their own, never the shared file cache"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES=TEST_CACHES)
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tujiimarishe.settings')
 
 application = get_wsgi_application()
+
+# Write buffered learning-progress events when the server process exits
+from materials.progress import flush_at_exit  # noqa: E402  (needs apps loaded)
+
+flush_at_exit()
@@ -5,11 +5,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
+from .admin_mixins import LargeTableAdminMixin
+from .exports import USER_COLUMNS, export_action, export_set_password_links
 from .models import User
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     """
     Custom User Admin
     """
@@ -109,7 +111,11 @@ class UserAdmin(BaseUserAdmin):
     profile_image_preview.short_description = 'Profile Picture'
     
     # Add actions
-    actions = ['make_student', 'make_mentor', 'make_admin', 'activate_users', 'deactivate_users']
+    actions = [
+        'make_student', 'make_mentor', 'make_admin', 'activate_users', 'deactivate_users',
+        export_action('csv', USER_COLUMNS, 'users'), export_action('xlsx', USER_COLUMNS, 'users'),
+        export_set_password_links,
+    ]
     
     def make_student(self, request, queryset):
         """Change selected users to students"""
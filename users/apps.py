@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, pre_delete, pre_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.models import Group
+        from . import roles
+
+        # Cached mentor-group membership (users/roles.py)
+        m2m_changed.connect(roles.groups_changed, sender=self.get_model('User').groups.through,
+                            dispatch_uid='roles-groups-changed')
+        pre_save.connect(roles.group_renamed, sender=Group, dispatch_uid='roles-group-renamed')
+        pre_delete.connect(roles.group_deleted, sender=Group, dispatch_uid='roles-group-deleted')
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import verify_password
+
+UserModel = get_user_model()
+
+# Password hashing is CPU-bound. A small dedicated pool keeps a burst of
+# logins from blocking the event loop or starving other requests.
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_HASH_WORKERS', 4),
+    thread_name_prefix='password-hash',
+)
+
+
+async def run_password_hasher(func, *args):
+    """Run a hashing function on the bounded password-hash pool"""
+    return await sync_to_async(func, thread_sensitive=False, executor=password_hash_executor)(*args)
+
+
+class PooledHashModelBackend(ModelBackend):
+    """
+    ModelBackend whose async path hashes on ``password_hash_executor``.
+
+    Django's ModelBackend.aauthenticate() verifies the password on the event
+    loop itself. Here only the hash leaves the loop; the user lookup and any
+    hash upgrade still go through the async ORM on the request's connection.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so a missing user takes as long as a wrong password.
+            await run_password_hasher(UserModel().set_password, password)
+            return None
+
+        is_correct, must_update = await run_password_hasher(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            await run_password_hasher(user.set_password, password)
+            await user.asave(update_fields=['password'])
+        return user
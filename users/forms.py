@@ -1,6 +1,9 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordResetForm
+from django.contrib.auth import get_user_model, aauthenticate
+from django.template import loader
+
+from taskqueue.mail import queue_email
 
 User = get_user_model()
 
@@ -26,3 +29,32 @@ class LoginForm(AuthenticationForm):
         self.fields['username'].widget.attrs['placeholder'] = 'Username'
         self.fields['password'].widget.attrs['class'] = 'form-control'
         self.fields['password'].widget.attrs['placeholder'] = 'Password'
+        self.credentials_checked = False
+
+    async def acheck_credentials(self):
+        """Authenticate from an async view; is_valid() then reuses the result"""
+        username = self.data.get('username')
+        password = self.data.get('password')
+        if username and password:
+            self.user_cache = await aauthenticate(self.request, username=username, password=password)
+        self.credentials_checked = True
+
+    def clean(self):
+        if not self.credentials_checked:
+            return super().clean()
+        if self.cleaned_data.get('username') is not None and self.cleaned_data.get('password'):
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
+        return self.cleaned_data
+
+
+class OutboxPasswordResetForm(PasswordResetForm):
+    """Puts the reset email in the outbox instead of sending it during the request"""
+
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = loader.render_to_string(html_email_template_name, context) if html_email_template_name else ''
+        queue_email(subject, body, [to_email], from_email=from_email, html_body=html_body, sensitive=True)
@@ -0,0 +1,21 @@
+"""
+Database functions shared by the users and materials apps.
+"""
+from django.db.models import Func
+from django.db.models.functions import Collate
+
+
+class NoCase(Func):
+    """A text column compared without regard to case, for indexes and lookups.
+
+    On SQLite this is ``column COLLATE NOCASE``: an index on it is what lets
+    SQLite answer a case-insensitive ``LIKE 'abc%'`` (the admin's prefix
+    search) from an index, and ``IN``/``=`` against it ignore case. Other
+    databases have no NOCASE collation, so there it is ``LOWER(column)``;
+    compare it with lowercased values.
+    """
+    function = 'LOWER'
+    arity = 1
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return Collate(self.source_expressions[0], 'NOCASE').as_sql(compiler, connection, **extra_context)
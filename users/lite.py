@@ -0,0 +1,51 @@
+"""
+Lite rendering mode for learners on slow or metered connections.
+
+In lite mode ``base.html`` swaps the Bootstrap, Font Awesome and site
+stylesheets (and the hero background they pull in) for a small inline
+stylesheet, and drops the Bootstrap JavaScript.
+
+Lite mode is chosen, in order of precedence, by:
+
+1. the ``lite`` cookie set by the toggle in the footer,
+2. the signed-in user's ``prefers_lite`` setting,
+3. a ``Save-Data: on`` request header.
+"""
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+LITE_COOKIE = 'lite'
+LITE_COOKIE_AGE = 365 * 24 * 60 * 60
+
+
+def is_lite(request):
+    """Whether to serve the lite version of pages for this request"""
+    cookie = request.COOKIES.get(LITE_COOKIE)
+    if cookie in ('0', '1'):
+        return cookie == '1'
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.prefers_lite:
+        return True
+    return request.headers.get('Save-Data', '').strip().lower() == 'on'
+
+
+def lite_mode(request):
+    """Context processor exposing ``lite`` to templates"""
+    return {'lite': is_lite(request)}
+
+
+@sync_and_async_middleware
+def LiteModeMiddleware(get_response):
+    """Mark responses as varying on Save-Data so caches keep both versions apart"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            patch_vary_headers(response, ['Save-Data'])
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            patch_vary_headers(response, ['Save-Data'])
+            return response
+    return middleware
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+def sweep_expired_sessions(batch_size=500, pause=0.0):
+    """Delete expired sessions in batches, returning how many were removed.
+
+    Each batch is its own short DELETE so SQLite's write lock is released
+    between batches instead of being held for the whole table.
+    """
+    deleted = 0
+    now = timezone.now()
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now)
+            .values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            return deleted
+        count, _ = Session.objects.filter(session_key__in=keys).delete()
+        deleted += count
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = 'Delete expired rows from django_session in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=getattr(settings, 'SESSION_SWEEP_BATCH_SIZE', 500),
+            help='Rows deleted per statement',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Seconds to sleep between batches so requests can take the write lock',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and sweep every N seconds (0 = sweep once and exit)',
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write('Sessions are stored in signed cookies; nothing to sweep.')
+            return
+
+        while True:
+            deleted = sweep_expired_sessions(options['batch_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
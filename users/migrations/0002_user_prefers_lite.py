@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='prefers_lite',
+            field=models.BooleanField(default=False, help_text='Serve the low-data version of pages'),
+        ),
+    ]
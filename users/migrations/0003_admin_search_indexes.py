@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:19
+
+import users.functions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_user_prefers_lite'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(users.functions.NoCase('username'), name='user_username_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(users.functions.NoCase('email'), name='user_email_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(users.functions.NoCase('first_name'), name='user_first_name_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(users.functions.NoCase('last_name'), name='user_last_name_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(users.functions.NoCase('phone_number'), name='user_phone_ci_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from .functions import NoCase
+
 class User(AbstractUser):
     """
     Custom User model extending Django's AbstractUser
@@ -69,6 +71,11 @@ class User(AbstractUser):
         help_text='User location/address'
     )
     
+    prefers_lite = models.BooleanField(
+        default=False,
+        help_text='Serve the low-data version of pages'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -76,6 +83,15 @@ class User(AbstractUser):
         ordering = ['-created_at']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+            # Case-insensitive prefix search in the admin (users.admin_mixins)
+            models.Index(NoCase('username'), name='user_username_ci_idx'),
+            models.Index(NoCase('email'), name='user_email_ci_idx'),
+            models.Index(NoCase('first_name'), name='user_first_name_ci_idx'),
+            models.Index(NoCase('last_name'), name='user_last_name_ci_idx'),
+            models.Index(NoCase('phone_number'), name='user_phone_ci_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
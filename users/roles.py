@@ -0,0 +1,128 @@
+"""
+Mentor and reviewer roles, resolved once per request and cached per user.
+
+* ``is_mentor``: ``user_type == 'mentor'`` or a member of the ``mentors``
+  group;
+* ``is_reviewer``: a mentor or staff; reviewers see every submission, review
+  work and use the mentor dashboard.
+
+``is_staff`` and ``user_type`` are columns of the user row that
+AuthenticationMiddleware loads anyway, so they are read fresh on every
+request: a ``make_mentor``/``make_student`` admin action (a bulk
+``update()``, which sends no signals) takes effect on the user's next
+request without any invalidation. Group membership is the only part that
+costs a query; it is cached under ``roles:<user id>`` for ROLE_CACHE_TIMEOUT
+and dropped whenever the user's groups change, or a group they belong to is
+renamed or deleted (receivers connected in UsersConfig.ready).
+
+``reviewers()`` is the same rule as a queryset filter, for code that picks
+reviewers in bulk (e.g. assigning work) and only wants active accounts.
+
+Templates get the roles through the ``roles`` context processor. Async
+views must call ``aget_roles()`` before rendering (``arender`` does), since
+a cache miss queries the database.
+"""
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+MENTOR_GROUP = 'mentors'
+
+
+@dataclass(frozen=True)
+class Roles:
+    is_mentor: bool = False
+    is_reviewer: bool = False
+
+
+NO_ROLES = Roles()
+
+
+def role_key(user_id):
+    return f'roles:{user_id}'
+
+
+def in_mentor_group(user):
+    """Whether ``user`` is in the mentors group, from the cache when possible"""
+    key = role_key(user.pk)
+    member = cache.get(key)
+    if member is None:
+        member = user.groups.filter(name=MENTOR_GROUP).exists()
+        cache.set(key, member, settings.ROLE_CACHE_TIMEOUT)
+    return member
+
+
+def resolve(user):
+    if not user.is_authenticated:
+        return NO_ROLES
+    is_mentor = user.user_type == 'mentor' or in_mentor_group(user)
+    return Roles(is_mentor=is_mentor, is_reviewer=is_mentor or user.is_staff)
+
+
+def reviewers(prefix=''):
+    """Q for active users who are reviewers, on a queryset whose users are at ``prefix``"""
+    membership = get_user_model().groups.through.objects.filter(
+        user_id=OuterRef(f'{prefix}pk'), group__name=MENTOR_GROUP,
+    )
+    return Q(**{f'{prefix}is_active': True}) & (
+        Q(**{f'{prefix}user_type': 'mentor'}) | Q(**{f'{prefix}is_staff': True}) | Exists(membership)
+    )
+
+
+def get_roles(request):
+    """The request user's Roles, resolved at most once per request"""
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        roles = request._roles = resolve(request.user)
+    return roles
+
+
+async def aget_roles(request):
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        roles = request._roles = await sync_to_async(resolve)(await request.auser())
+    return roles
+
+
+def roles(request):
+    """Context processor exposing ``roles`` to templates"""
+    return {'roles': get_roles(request)}
+
+
+def _members(group):
+    return get_user_model().objects.filter(groups=group).values_list('pk', flat=True)
+
+
+def forget(user_ids):
+    """Drop the cached group membership of ``user_ids``"""
+    cache.delete_many([role_key(user_id) for user_id in user_ids])
+
+
+def groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for User.groups, from either side"""
+    if action == 'pre_clear' and reverse:
+        # pk_set is None for a clear; note the members while they still exist
+        instance._role_members = list(_members(instance))
+    elif action in ('post_add', 'post_remove'):
+        forget(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        forget(getattr(instance, '_role_members', []) if reverse else [instance.pk])
+
+
+def group_renamed(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for Group: renaming to or from "mentors" changes who is a mentor"""
+    if raw or instance.pk is None:
+        return
+    old_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    if MENTOR_GROUP in (old_name, instance.name) and old_name != instance.name:
+        forget(_members(instance))
+
+
+def group_deleted(sender, instance, **kwargs):
+    """pre_delete receiver for Group; membership rows go without m2m_changed"""
+    if instance.name == MENTOR_GROUP:
+        forget(_members(instance))
@@ -0,0 +1,49 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .functions import NoCase
+
+User = get_user_model()
+
+
+class UserAdminTests(TestCase):
+    """Test the user changelist stays index-bound"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        User.objects.bulk_create([
+            User(username=f'learner{i}', email=f'learner{i}@example.com', first_name='Wanjiku' if i % 2 else 'Otieno')
+            for i in range(20)
+        ])
+        self.client.force_login(self.admin)
+
+    def test_changelist_estimates_count(self):
+        """Test the unfiltered list does not COUNT(*) the user table"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:users_user_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql'] and 'users_user' in q['sql']])
+
+    def test_search_is_prefix_and_indexed(self):
+        """Test name search matches prefixes case-insensitively without scanning users"""
+        response = self.client.get(reverse('admin:users_user_changelist'), {'q': 'wanj'})
+        self.assertEqual(len(response.context['cl'].result_list), 10)
+
+        queryset, _ = admin.site._registry[User].get_search_results(None, User.objects.all(), 'wanj')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertNotIn('SCAN users_user', plan)
+
+    def test_nocase_outside_sqlite(self):
+        """Test the search indexes fall back to LOWER() on databases without a NOCASE collation"""
+        query = User.objects.alias(ci=NoCase('email')).filter(ci='a@example.com').query
+        compiler = query.get_compiler(connection=connection)
+        sql, _ = query.annotations['ci'].as_sql(compiler, connection)
+        self.assertEqual(sql, 'LOWER("users_user"."email")')
+        self.assertIn('COLLATE "NOCASE"', compiler.compile(query.annotations['ci'])[0])
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from materials.models import LearningMaterial, SkillCategory
+
+User = get_user_model()
+
+
+class LiteModeTests(TestCase):
+    """Test the low-data rendering mode"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+        self.category = SkillCategory.objects.create(
+            name='Graphic Design', slug='graphic-design', icon='fa-paint-brush', description='Design ' * 20
+        )
+        for i in range(15):
+            LearningMaterial.objects.create(
+                category=self.category, title=f'Lesson {i}', description='Learn the basics of layout ' * 3,
+                material_type='video', youtube_url='https://youtu.be/x',
+                access_level=['basic', 'enterprise', 'premium'][i % 3], order=i,
+            )
+        self.client.force_login(self.user)
+        self.url = reverse('materials:category_detail', args=[self.category.id])
+
+    def test_save_data_header_serves_lite_page(self):
+        """Test Save-Data: on drops external CSS, icon fonts and scripts"""
+        response = self.client.get(self.url, HTTP_SAVE_DATA='on')
+        html = response.content.decode()
+
+        self.assertNotIn('bootstrap', html)
+        self.assertNotIn('font-awesome', html)
+        self.assertNotIn('style.css', html)
+        self.assertNotIn('<script', html)
+        self.assertLess(len(response.content), 30 * 1024)
+        self.assertIn('Save-Data', response['Vary'])
+
+    def test_full_page_by_default(self):
+        """Test the normal site is unchanged without Save-Data"""
+        html = self.client.get(self.url).content.decode()
+        self.assertIn('bootstrap.min.css', html)
+
+    def test_toggle_overrides_header_and_saves_preference(self):
+        """Test the footer toggle sets a cookie and the account preference"""
+        response = self.client.post(reverse('toggle_lite'), {'next': self.url}, HTTP_SAVE_DATA='on')
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(response.cookies['lite'].value, '0')
+        self.assertIn('bootstrap.min.css', self.client.get(self.url, HTTP_SAVE_DATA='on').content.decode())
+
+        self.client.post(reverse('toggle_lite'), {'next': self.url})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.prefers_lite)
+
+    def test_account_preference_applies_on_new_device(self):
+        """Test prefers_lite is honoured without a cookie or header"""
+        User.objects.filter(pk=self.user.pk).update(prefers_lite=True)
+        self.assertNotIn('bootstrap', self.client.get(self.url).content.decode())
+
+    def test_toggle_rejects_offsite_redirect(self):
+        """Test next must stay on this site"""
+        response = self.client.post(reverse('toggle_lite'), {'next': 'https://evil.example/'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
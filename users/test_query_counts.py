@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from materials.models import SkillCategory, Payment
+from materials.testing import QueryCountMixin
+
+User = get_user_model()
+
+
+class UsersViewQueryCountTests(QueryCountMixin, TestCase):
+    """Every view in users.views runs the same number of queries at 1, 10 and 100 rows"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='testpass123!')
+
+    def seed_payments(self, n):
+        for i in range(n):
+            category = SkillCategory.objects.create(
+                name=f'Skill {i}', slug=f'skill-{i}', icon='fa-book', description='Skill'
+            )
+            Payment.objects.create(
+                user=self.user, category=category, access_level='enterprise', amount=Decimal('100.00'),
+                mpesa_code=f'QA{i:08d}', phone_number='0712345678', is_verified=True
+            )
+
+    def seed_users(self, n):
+        User.objects.bulk_create([User(username=f'user{i}') for i in range(n)])
+
+    def test_home(self):
+        self.client.force_login(self.user)
+        self.assertConstantQueries(reverse('home'), self.seed_payments)
+
+    def test_register(self):
+        self.assertConstantQueries(reverse('register'), self.seed_users)
+
+    def test_login(self):
+        self.assertConstantQueries(reverse('login'), self.seed_users)
+
+    def test_logout(self):
+        self.assertConstantQueries(reverse('logout'), self.seed_users, status=302)
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        self.assertConstantQueries(reverse('profile'), self.seed_payments)
+
+    def test_payment_history(self):
+        self.client.force_login(self.user)
+        self.assertConstantQueries(reverse('payment_history'), self.seed_payments)
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import roles
+
+User = get_user_model()
+
+class RoleResolverTests(TestCase):
+    """Test mentor and reviewer roles are resolved from one cached rule"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='amina', password='testpass123!')
+        self.mentors = Group.objects.create(name=roles.MENTOR_GROUP)
+        self.client.force_login(self.user)
+
+    def can_open_dashboard(self):
+        return self.client.get(reverse('materials:mentor_dashboard')).status_code == 200
+
+    def test_warm_role_check_runs_no_group_query(self):
+        """Test pages after the first resolve roles without touching auth_group"""
+        self.client.get(reverse('materials:my_submissions'))
+        for url in (reverse('materials:my_submissions'), reverse('profile')):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            self.assertFalse([q for q in ctx.captured_queries if 'auth_group' in q['sql']], url)
+
+    def test_group_membership_grants_and_revokes(self):
+        """Test joining or leaving the mentors group takes effect on the next request"""
+        self.assertFalse(self.can_open_dashboard())
+        self.user.groups.add(self.mentors)
+        self.assertTrue(self.can_open_dashboard())
+        self.user.groups.remove(self.mentors)
+        self.assertFalse(self.can_open_dashboard())
+        self.mentors.app_users.add(self.user)
+        self.assertTrue(self.can_open_dashboard())
+        self.mentors.app_users.clear()
+        self.assertFalse(self.can_open_dashboard())
+
+    def test_group_rename_and_delete(self):
+        """Test renaming or deleting the mentors group drops its members' cached role"""
+        self.user.groups.add(self.mentors)
+        self.assertTrue(self.can_open_dashboard())
+        self.mentors.name = 'alumni'
+        self.mentors.save()
+        self.assertFalse(self.can_open_dashboard())
+        self.mentors.name = roles.MENTOR_GROUP
+        self.mentors.save()
+        self.assertTrue(self.can_open_dashboard())
+        self.mentors.delete()
+        self.assertFalse(self.can_open_dashboard())
+
+    def test_admin_actions_change_role(self):
+        """Test make_mentor and make_student apply on the user's next request"""
+        admin = User.objects.create_superuser(username='admin', password='testpass123!', email='a@example.com')
+        url = reverse('admin:users_user_changelist')
+        for action, expected in (('make_mentor', True), ('make_student', False)):
+            self.client.force_login(admin)
+            self.client.post(url, {'action': action, '_selected_action': [self.user.pk]})
+            self.client.force_login(self.user)
+            self.assertIs(self.can_open_dashboard(), expected, action)
+
+    def test_group_mentor_can_review(self):
+        """Test review_submission follows the same rule as the dashboard"""
+        from materials.models import WorkSubmission
+        learner = User.objects.create_user(username='learner')
+        submission = WorkSubmission.objects.create(
+            user=learner, title='Portfolio', description='d', file='work_submissions/x.txt',
+        )
+        self.user.groups.add(self.mentors)
+        response = self.client.get(reverse('materials:review_submission', args=[submission.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_template_link(self):
+        """Test the mentor link follows the resolved role on sync and async pages"""
+        for url in (reverse('profile'), reverse('materials:my_submissions')):
+            self.assertNotContains(self.client.get(url), 'Mentor Dashboard')
+        self.user.groups.add(self.mentors)
+        for url in (reverse('profile'), reverse('materials:my_submissions')):
+            self.assertContains(self.client.get(url), 'Mentor Dashboard')
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class CachedSessionTests(TestCase):
+    """Test that warm requests read the session from the cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123!')
+
+    def test_warm_page_view_skips_session_table(self):
+        """Test no django_session query runs once the session is cached"""
+        self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123!'})
+        self.client.get(reverse('profile'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('profile'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'django_session' in q['sql']])
+
+    def test_login_writes_through_to_database(self):
+        """Test the session survives in the database for durability"""
+        self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123!'})
+        self.assertTrue(Session.objects.filter(session_key=self.client.session.session_key).exists())
+
+
+class SweepSessionsCommandTests(TestCase):
+    """Test the sweep_sessions management command"""
+
+    def make_sessions(self, count, expire_date):
+        Session.objects.bulk_create([
+            Session(session_key=f'{expire_date:%Y%m%d%H%M%S}{i:020d}', session_data='', expire_date=expire_date)
+            for i in range(count)
+        ])
+
+    def test_deletes_only_expired_sessions(self):
+        """Test expired sessions are removed in batches and live ones kept"""
+        self.make_sessions(25, timezone.now() - timedelta(days=1))
+        self.make_sessions(3, timezone.now() + timedelta(days=1))
+
+        out = StringIO()
+        call_command('sweep_sessions', batch_size=10, pause=0, stdout=out)
+
+        self.assertIn('Deleted 25 expired session(s).', out.getvalue())
+        self.assertEqual(Session.objects.count(), 3)
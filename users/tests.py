@@ -4,7 +4,7 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .models import WorkSubmission, MentorFeedback
+from materials.models import WorkSubmission, MentorFeedback
 import tempfile
 
 User = get_user_model()
@@ -251,7 +251,7 @@ class WorkSubmissionViewTests(TestCase):
     def test_submission_requires_login(self):
         """Test that submission requires user to be logged in"""
         self.client.logout()
-        response = self.client.get(reverse('my_submissions'))
+        response = self.client.get(reverse('materials:my_submissions'))
         self.assertNotEqual(response.status_code, 200)
         # Should redirect to login
         self.assertEqual(response.status_code, 302)
@@ -289,10 +289,10 @@ class MentorFeedbackViewTests(TestCase):
         """Test that only staff members can give feedback"""
         # Login as regular user
         self.client.login(username='student', password='pass123!')
-        response = self.client.get(reverse('give_feedback', args=[self.submission.id]))
+        response = self.client.get(reverse('materials:review_submission', args=[self.submission.id]))
         self.assertEqual(response.status_code, 302)  # Redirect
         
         # Login as mentor (staff)
         self.client.login(username='mentor', password='pass123!')
-        response = self.client.get(reverse('give_feedback', args=[self.submission.id]))
+        response = self.client.get(reverse('materials:review_submission', args=[self.submission.id]))
         self.assertEqual(response.status_code, 200)  # Success
\ No newline at end of file
@@ -1,17 +1,20 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views  # This imports from users.views
+from .forms import OutboxPasswordResetForm
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
+    path('lite/', views.toggle_lite, name='toggle_lite'),
     
     # Password reset URLs
     path('password-reset/',
          auth_views.PasswordResetView.as_view(
-             template_name='users/password_reset.html'
+             template_name='users/password_reset.html',
+             form_class=OutboxPasswordResetForm,
          ),
          name='password_reset'),
     
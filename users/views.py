@@ -1,11 +1,16 @@
 from django.shortcuts import render, redirect
 import time
 import logging
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import alogin, logout
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from .forms import RegisterForm, LoginForm
+from .lite import LITE_COOKIE, LITE_COOKIE_AGE, is_lite
 from materials.models import Payment
+from materials.shortcuts import arender
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.conf import settings
 
@@ -27,47 +32,40 @@ def register(request):
         form = RegisterForm()
     return render(request, 'users/register.html', {'form': form})
 
-def user_login(request):
+async def user_login(request):
     if request.method == 'POST':
         t0 = time.time()
         form = LoginForm(request, data=request.POST)
         t1 = time.time()
+        # The password hash runs on a bounded pool (users.backends), not the event loop
+        await form.acheck_credentials()
+        t2 = time.time()
         if form.is_valid():
-            t2 = time.time()
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            t_auth_start = time.time()
-            user = authenticate(username=username, password=password)
-            t_auth_end = time.time()
-            if user is not None:
-                t_login_start = time.time()
-                login(request, user)
-                t_login_end = time.time()
-                messages.success(request, f'Welcome back, {username}!')
-                # Respect 'next' parameter when present (safe redirect).
-                # Accept relative URLs (start with '/') or validate full URLs.
-                next_url = request.POST.get('next') or request.GET.get('next')
-                if next_url:
-                    is_relative = str(next_url).startswith('/')
-                    is_safe = url_has_allowed_host_and_scheme(next_url, allowed_hosts=set(settings.ALLOWED_HOSTS) or {request.get_host()})
-                    if is_relative or is_safe:
-                        # log timings before redirect
-                        logging.getLogger(__name__).info(
-                            f"login timings: form_init={(t1-t0):.3f}s, form_validate={(t2-t1):.3f}s, authenticate={(t_auth_end-t_auth_start):.3f}s, login={(t_login_end-t_login_start):.3f}s"
-                        )
-                        return redirect(next_url)
-                # log timings
-                logging.getLogger(__name__).info(
-                    f"login timings: form_init={(t1-t0):.3f}s, form_validate={(t2-t1):.3f}s, authenticate={(t_auth_end-t_auth_start):.3f}s, login={(t_login_end-t_login_start):.3f}s"
-                )
-                return redirect('home')
-            else:
-                logging.getLogger(__name__).info(
-                    f"login timings (failed): form_init={(t1-t0):.3f}s, form_validate={(t2-t1):.3f}s, authenticate={(t_auth_end-t_auth_start):.3f}s"
-                )
+            user = form.get_user()
+            username = user.get_username()
+            t_login_start = time.time()
+            await alogin(request, user)
+            t_login_end = time.time()
+            messages.success(request, f'Welcome back, {username}!')
+            logging.getLogger(__name__).info(
+                f"login timings: form_init={(t1-t0):.3f}s, authenticate={(t2-t1):.3f}s, login={(t_login_end-t_login_start):.3f}s"
+            )
+            # Respect 'next' parameter when present (safe redirect).
+            # Accept relative URLs (start with '/') or validate full URLs.
+            next_url = request.POST.get('next') or request.GET.get('next')
+            if next_url:
+                is_relative = str(next_url).startswith('/')
+                is_safe = url_has_allowed_host_and_scheme(next_url, allowed_hosts=set(settings.ALLOWED_HOSTS) or {request.get_host()})
+                if is_relative or is_safe:
+                    return redirect(next_url)
+            return redirect('home')
+        else:
+            logging.getLogger(__name__).info(
+                f"login timings (failed): form_init={(t1-t0):.3f}s, authenticate={(t2-t1):.3f}s"
+            )
     else:
         form = LoginForm()
-    return render(request, 'users/login.html', {'form': form})
+    return await arender(request, 'users/login.html', {'form': form})
 
 def user_logout(request):
     logout(request)
@@ -94,3 +92,19 @@ def profile(request):
         'user': user
     }
     return render(request, 'users/profile.html', context)
+
+
+@require_POST
+def toggle_lite(request):
+    """Switch lite mode on or off for this browser, and the account if signed in"""
+    lite = not is_lite(request)
+    if request.user.is_authenticated:
+        get_user_model().objects.filter(pk=request.user.pk).update(prefers_lite=lite)
+    
+    next_url = request.POST.get('next') or request.META.get('HTTP_REFERER')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+        next_url = reverse('home')
+    response = redirect(next_url)
+    response.set_cookie(LITE_COOKIE, '1' if lite else '0', max_age=LITE_COOKIE_AGE, samesite='Lax')
+    return response
+